@@ -0,0 +1,150 @@
+# W. Fifita Menu Planner - Background I/O
+
+"""
+Keeps file I/O off the Tkinter main thread. A BackgroundWorker runs jobs one at a time on a
+worker thread and hands each result back to the main thread with root.after, because Tk
+widgets may only be touched from the thread running the main loop. An Autosaver uses the
+worker to save the plan in progress, coalescing rapid changes so that a burst of clicks
+causes only one write.
+"""
+
+import json
+import os
+import queue
+import sys
+import threading
+
+from instrumentation import timed
+
+
+class BackgroundWorker:
+    """Runs jobs on one background thread and calls their callbacks on the Tk main thread."""
+
+    def __init__(self, root, poll_ms=50):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.pending = 0  # Jobs submitted whose callbacks have not run yet
+        self.thread = threading.Thread(target=self.run, name="menu-planner-io", daemon=True)
+        self.thread.start()
+
+    def submit(self, job, on_done=None, on_error=None):
+        """
+        Runs job() in the background. When it finishes, on_done(result) or on_error(exception)
+        is called on the main thread.
+        """
+        self.pending += 1
+        if self.pending == 1:
+            # Only poll for results while there is work outstanding
+            self.root.after(self.poll_ms, self.poll)
+        self.jobs.put((job, on_done, on_error))
+
+    def run(self):
+        """The worker thread: runs jobs in the order they were submitted, until close() is called."""
+        while True:
+            job, on_done, on_error = self.jobs.get()
+            if job is None:
+                break
+            try:
+                result = job()
+            except Exception as error:
+                self.results.put((on_error, error))
+            else:
+                self.results.put((on_done, result))
+
+    def poll(self):
+        """
+        Runs the callbacks of finished jobs on the main thread. A callback that raises is
+        reported like any other Tk callback error, and polling carries on for the jobs still
+        outstanding.
+        """
+        try:
+            while True:
+                try:
+                    callback, value = self.results.get_nowait()
+                except queue.Empty:
+                    break
+                self.pending -= 1
+                if callback is not None:
+                    try:
+                        callback(value)
+                    except Exception:
+                        self.root.report_callback_exception(*sys.exc_info())
+        finally:
+            if self.pending:
+                self.root.after(self.poll_ms, self.poll)
+
+    def close(self, timeout=5):
+        """
+        Lets the jobs already submitted finish, waiting at most `timeout` seconds, and stops the
+        worker thread. Their callbacks are not run.
+        """
+        self.jobs.put((None, None, None))
+        self.thread.join(timeout)
+
+
+@timed("io.write_json_atomically")
+def write_json_atomically(path, data):
+    """Writes JSON to a temporary file and renames it over the target, so a crash never leaves half a file."""
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "w") as file:
+        json.dump(data, file)
+    os.replace(temporary_path, path)
+
+
+@timed("io.read_json")
+def read_json(path):
+    """Reads a JSON file, returning None if it does not exist."""
+    try:
+        with open(path, "r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+class Autosaver:
+    """
+    Saves the plan in progress in the background. Changes within `delay_ms` of each other are
+    coalesced, so only the latest state is written, once.
+    """
+
+    def __init__(self, root, worker, path="autosave.json", delay_ms=1000):
+        self.root = root
+        self.worker = worker
+        self.path = path
+        self.delay_ms = delay_ms
+        self.latest = None  # The newest state waiting to be written
+        self.timer = None
+
+    def schedule(self, state):
+        """Remembers the newest state and writes it after the delay, unless a write is already scheduled."""
+        self.latest = state
+        if self.timer is None:
+            self.timer = self.root.after(self.delay_ms, self.flush)
+
+    def flush(self):
+        """Writes the newest state now."""
+        if self.timer is not None:
+            self.root.after_cancel(self.timer)
+            self.timer = None
+        state, self.latest = self.latest, None
+        if state is not None:
+            self.worker.submit(lambda: write_json_atomically(self.path, state))
+
+    def clear(self):
+        """Forgets any unsaved state and deletes the autosave file, e.g. once a receipt is saved."""
+        if self.timer is not None:
+            self.root.after_cancel(self.timer)
+            self.timer = None
+        self.latest = None
+
+        def remove():
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+        self.worker.submit(remove)
+
+    def load(self, on_done, on_error=None):
+        """Reads the autosaved state in the background and passes it (or None) to on_done."""
+        self.worker.submit(lambda: read_json(self.path), on_done, on_error)
@@ -0,0 +1,211 @@
+# W. Fifita Menu Planner - Batch Planner
+
+"""
+Non-interactive planning for large sets of orders. Orders are streamed from a file or stdin,
+one per line, either as CSV (budget,food,drink,dessert) or as a JSON object with the same
+keys. Budgets are given in dollars (e.g. 12 or 12.50) and converted to whole cents, so every
+total is exact integer arithmetic. Each order is validated and priced, and a receipt (or an error for that line) is
+written straight out as one line of JSON, so memory use stays flat however many orders
+there are.
+
+Every step is a generator: read_orders -> price_orders -> write_results. For big batch jobs,
+run_batch_parallel shards the input into chunks of lines and prices them in a process pool,
+writing the results back out in input order.
+"""
+
+import csv
+import json
+import sys
+
+from money import to_cents
+
+
+def compile_prices(menu):
+    """
+    Builds a lookup per category from lowercase item name to (item name, price in cents, JSON text),
+    so an order can be priced with one dict lookup per category, matched without caring about
+    case, and written out without encoding the item name again.
+    """
+    compiled = []
+    for category in menu:
+        lookup = {}
+        for item, details in menu[category].items():
+            lookup[item.lower()] = (item, details["price"], f"{json.dumps(category)}:{json.dumps(item)}")
+        compiled.append((category, lookup))
+    return compiled
+
+
+def read_orders(lines, categories, first_line=1):
+    """
+    Turns lines of input into (line number, order) pairs, where an order is a (budget, choices)
+    tuple with one choice per category. Lines that cannot be read give an error string instead.
+    """
+    fields = ["budget"] + list(categories)
+    for line_number, line in enumerate(lines, first_line):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            try:
+                order = json.loads(line)
+            except ValueError:
+                order = None
+            if not isinstance(order, dict):
+                yield line_number, "Invalid JSON."
+                continue
+            yield line_number, (order.get("budget"), [order.get(category) for category in categories])
+        else:
+            # Only use the csv module when a value is quoted, plain splitting is much faster
+            values = next(csv.reader([line])) if '"' in line else line.split(",")
+            if line_number == 1 and values[0].strip().lower() == "budget":
+                continue  # Header line
+            if len(values) != len(fields):
+                yield line_number, f"Expected {len(fields)} values: {', '.join(fields)}."
+                continue
+            yield line_number, (values[0], values[1:])
+
+
+def price_orders(orders, prices):
+    """
+    Validates and prices each order. The rules match the interactive planner: a positive
+    budget, one valid item per category and a total that does not exceed the budget.
+    Yields (line number, error or None, JSON text of the choices, budget, total) per order, with
+    money in cents;
+    lines rejected before pricing have None for the last three.
+    """
+    for line_number, order in orders:
+        if isinstance(order, str):
+            yield line_number, order, None, None, None
+            continue
+
+        budget, choices = order
+        try:
+            budget = to_cents(budget)
+        except ValueError:
+            yield line_number, "Budget must be a dollar amount.", None, None, None
+            continue
+        if budget <= 0:
+            yield line_number, "Budget must be greater than zero.", None, None, None
+            continue
+
+        fragments = []
+        total = 0
+        for (category, lookup), choice in zip(prices, choices):
+            match = lookup.get(choice.strip().lower()) if isinstance(choice, str) else None
+            if match is None:
+                yield line_number, f"Invalid {category} choice: {choice}", None, None, None
+                break
+            fragments.append(match[2])
+            total += match[1]
+        else:
+            error = "Selections exceed the budget." if total > budget else None
+            yield line_number, error, ",".join(fragments), budget, total
+
+
+def format_result(result):
+    """Turns one priced order into a line of JSON: a receipt, or an error for that line."""
+    line_number, error, choices, budget, total = result
+    if choices is None:
+        return '{"line":%d,"error":%s}\n' % (line_number, json.dumps(error))
+    if error is not None:
+        return '{"line":%d,%s,"budget_cents":%d,"total_cents":%d,"error":%s}\n' % (
+            line_number, choices, budget, total, json.dumps(error))
+    return '{"line":%d,%s,"budget_cents":%d,"total_cents":%d,"remaining_cents":%d}\n' % (
+        line_number, choices, budget, total, budget - total)
+
+
+def write_results(results, output):
+    """Writes each result as one line of JSON and returns (orders written, errors)."""
+    written = errors = 0
+    write = output.write
+    for result in results:
+        write(format_result(result))
+        written += 1
+        if result[1] is not None:
+            errors += 1
+    return written, errors
+
+
+def run_batch(input_file, output_file, menu):
+    """Streams orders from input_file to receipts in output_file and returns (orders, errors)."""
+    prices = compile_prices(menu)
+    orders = read_orders(input_file, [category for category, lookup in prices])
+    return write_results(price_orders(orders, prices), output_file)
+
+
+# Compiled prices for the current worker process, set once by init_worker
+worker_prices = None
+
+
+def init_worker(prices):
+    """Runs once in each worker process so the compiled prices are not sent with every chunk."""
+    global worker_prices
+    worker_prices = prices
+
+
+def price_chunk(chunk):
+    """Prices one chunk of input in a worker and returns (JSON Lines text, orders, errors)."""
+    first_line, data = chunk
+    lines = data.decode("utf-8").split("\n")
+    categories = [category for category, lookup in worker_prices]
+    output = []
+    errors = 0
+    for result in price_orders(read_orders(lines, categories, first_line), worker_prices):
+        output.append(format_result(result))
+        if result[1] is not None:
+            errors += 1
+    return "".join(output), len(output), errors
+
+
+def read_chunks(binary_file, chunk_bytes):
+    """
+    Splits binary input into (first line number, bytes) chunks that end on a line break.
+    The main process only copies bytes and counts newlines, leaving all parsing to the workers.
+    """
+    first_line = 1
+    leftover = b""
+    while True:
+        block = binary_file.read(chunk_bytes)
+        if not block:
+            break
+        data = leftover + block
+        end = data.rfind(b"\n") + 1
+        if end == 0:
+            leftover = data  # No complete line yet
+            continue
+        leftover = data[end:]
+        yield first_line, data[:end]
+        first_line += data.count(b"\n", 0, end)
+    if leftover:
+        yield first_line, leftover
+
+
+def run_batch_parallel(binary_input, output_file, menu, workers=None, chunk_bytes=1 << 20):
+    """
+    Like run_batch, but prices chunks of orders across a pool of worker processes (one per
+    CPU core by default). The input must be opened in binary mode. Results are written in
+    input order and (orders, errors) is returned.
+    """
+    import multiprocessing  # Only parallel runs need it, and it is slow to import
+
+    written = errors = 0
+    prices = compile_prices(menu)
+    with multiprocessing.Pool(workers, initializer=init_worker, initargs=(prices,)) as pool:
+        # imap keeps the chunks in input order while the workers run ahead
+        for text, chunk_orders, chunk_errors in pool.imap(price_chunk, read_chunks(binary_input, chunk_bytes)):
+            output_file.write(text)
+            written += chunk_orders
+            errors += chunk_errors
+    return written, errors
+
+
+def open_input(path, binary=False):
+    """Opens an input path for reading, where "-" means stdin."""
+    if binary:
+        return sys.stdin.buffer if path == "-" else open(path, "rb")
+    return sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+
+
+def open_output(path):
+    """Opens an output path for writing, where "-" means stdout."""
+    return sys.stdout if path == "-" else open(path, "w", encoding="utf-8", buffering=1 << 20)
@@ -0,0 +1,403 @@
+# W. Fifita Menu Planner - Planner Benchmarks
+
+"""
+Times the planner's hot paths on synthetic catalogs of different sizes: pricing a selection,
+budget validation, enumerating affordable meals, suggesting a group plan, saving, loading and exporting receipts, switching pages
+in the Tkinter app, batch pricing with the iteration 1 planner, and cold start: how long a fresh
+process takes to import the planning engine and to paint the first window. Results are printed as JSON
+(seconds per operation, keyed like "price_selection[30]" for a catalog with 30 items per
+category) and compared with a stored baseline, so a change that makes something slower is
+caught before it is merged. The cold-start numbers are also checked against fixed targets.
+
+The GUI benchmarks need a display. On a machine without one, run under a virtual display such
+as `xvfb-run python benchmark_planner.py`; if no display can be opened they are skipped and
+listed under "skipped" in the results.
+
+Run with:  python benchmark_planner.py --save-baseline       (record the baseline)
+           python benchmark_planner.py                       (compare with it)
+           python benchmark_planner.py --sizes 3,30 --output results.json
+"""
+
+import argparse
+import importlib.util
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from planner_engine import MenuPlan
+from batch_planner import run_batch
+from combo_solver import CombinationSolver
+from meal_optimizer import MealOptimizer
+from price_table import PriceTable
+from receipt_renderer import ReceiptRenderer, export_receipts
+from receipt_store import ReceiptLog
+
+CATEGORIES = ("food", "drink", "dessert")
+DEFAULT_SIZES = "3,30,300"
+DEFAULT_BASELINE = "benchmark_baseline.json"
+
+# A benchmark is reported as a regression when it is this much slower than the baseline
+DEFAULT_TOLERANCE = 0.25
+
+# Cold-start targets in seconds; missing one fails the run like a regression does
+COLD_START_TARGETS = {"cold_import_engine": 0.05, "cold_first_paint": 0.5}
+
+FOLDER = os.path.dirname(os.path.abspath(__file__))
+
+# Run in a fresh interpreter: import every non-GUI planner module and check Tkinter stayed out
+IMPORT_ENGINE = """
+import sys, time
+sys.path.insert(0, {folder!r})
+start = time.perf_counter()
+import planner_engine, money, catalog_loader, combo_solver, price_table, receipt_store, batch_planner
+print(time.perf_counter() - start, "tkinter" in sys.modules, flush=True)
+"""
+
+# Run in a fresh interpreter: start the iteration 3 app and print once the first page is drawn
+FIRST_PAINT = """
+import importlib.util, sys
+sys.path.insert(0, {folder!r})
+spec = importlib.util.spec_from_file_location("menu_planner_iteration_3", {path!r})
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+module.load_gui()
+root = module.tk.Tk()
+app = module.MenuPlanner(root)
+root.update()
+print("painted", flush=True)
+root.destroy()
+"""
+
+
+def synthetic_menu(items_per_category, seed=1):
+    """Builds a menu with the same categories as the real one and random prices (in cents) and ratings."""
+    rng = random.Random(seed)
+    ratings = random.Random(seed + 1)  # Separate, so the prices match catalogs from older baselines
+    return {category: {f"{category.title()} {number}": {"price": rng.randint(1, 20) * 50,
+                                                        "description": f"Test {category} number {number}",
+                                                        "rating": ratings.randint(10, 50) / 10}
+                       for number in range(items_per_category)}
+            for category in CATEGORIES}
+
+
+def random_selections(menu, count, rng):
+    """Returns `count` random meals as lists of one item per category."""
+    items = [list(menu[category]) for category in CATEGORIES]
+    return [[rng.choice(names) for names in items] for _ in range(count)]
+
+
+def price_lookup(menu):
+    """The same compiled prices the GUI uses, falling back to the solver for very large menus."""
+    try:
+        return PriceTable(menu)
+    except ValueError:
+        return CombinationSolver(menu)
+
+
+def measure(function, operations, repeat=5):
+    """
+    Runs function() `repeat` times and returns the median seconds per operation, where one
+    call of function() does `operations` operations.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) / operations
+
+
+def benchmark_engine(menu, rng):
+    """Pricing, budget validation, combination enumeration and plan suggestions without any GUI."""
+    selections = random_selections(menu, 1000, rng)
+    cheapest = sum(min(details["price"] for details in menu[category].values()) for category in CATEGORIES)
+    budgets = [rng.randint(cheapest, cheapest * 3) for _ in range(1000)]
+    lookup = price_lookup(menu)
+
+    def price_selections():
+        plan = MenuPlan(menu)
+        for selection in selections:
+            for category, item in zip(CATEGORIES, selection):
+                plan.set_choice(category, item)
+
+    def validate_budgets():
+        plan = MenuPlan(menu)
+        for budget in budgets:
+            plan.set_budget(budget)
+            lookup.count_within(budget)
+            plan.is_over_budget()
+
+    def enumerate_combinations():
+        for budget in budgets[:100]:
+            lookup.combinations_within(budget, limit=10)
+
+    def suggest_plans():
+        # A new optimizer each time, so its memo of earlier budgets does not help
+        for budget in budgets[:20]:
+            MealOptimizer(menu).best_plan(budget * 4, 4)
+
+    return {
+        "build_price_table": measure(lambda: price_lookup(menu), 1, repeat=3),
+        "price_selection": measure(price_selections, len(selections)),
+        "validate_budget": measure(validate_budgets, len(budgets)),
+        "combinations_first_10": measure(enumerate_combinations, 100),
+        "suggest_plan_4_people": measure(suggest_plans, 20),
+    }
+
+
+def benchmark_receipts(menu, rng, folder):
+    """Saving receipts to the receipt log, loading the latest one back and exporting them all as text."""
+    receipts = []
+    for selection in random_selections(menu, 1000, rng):
+        plan = MenuPlan(menu, 100000)
+        for category, item in zip(CATEGORIES, selection):
+            plan.set_choice(category, item)
+        receipts.append(plan.to_dict())
+
+    log = ReceiptLog(os.path.join(folder, f"receipts-{len(menu['food'])}.jsonl"))
+    results = {
+        "receipt_save": measure(lambda: [log.append(receipt) for receipt in receipts], len(receipts), repeat=3),
+        "receipt_load": measure(lambda: [log.latest() for _ in range(1000)], 1000),
+    }
+    renderer = ReceiptRenderer(menu)
+    results["receipt_export"] = measure(lambda: export_receipts(log, io.StringIO(), renderer), len(log), repeat=3)
+    return results
+
+
+def benchmark_batch(menu, rng, order_count):
+    """Throughput of the iteration 1 batch mode, in seconds per order."""
+    lines = ["budget,food,drink,dessert"]
+    for selection in random_selections(menu, order_count, rng):
+        lines.append(f"{rng.randint(5, 40)},{','.join(selection)}")
+    text = "\n".join(lines) + "\n"
+    return {"batch_order": measure(lambda: run_batch(io.StringIO(text), io.StringIO(), menu), order_count, repeat=3)}
+
+
+def load_gui_module():
+    """Imports menu-planner_iteration-3.py, whose name is not a valid module name."""
+    path = os.path.join(FOLDER, "menu-planner_iteration-3.py")
+    spec = importlib.util.spec_from_file_location("menu_planner_iteration_3", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def benchmark_gui(menu, folder, rounds=20):
+    """
+    Page switching and the GUI's receipt save/load in a real (hidden) MenuPlanner window.
+    Returns (results, reason skipped or None).
+    """
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as error:  # No tkinter, or no display to open a window on
+        return {}, f"Tkinter could not open a window: {error}"
+
+    # The app reads the catalog and writes receipts and autosaves relative to the working folder
+    catalog_path = os.path.join(folder, f"menu-{len(menu['food'])}.json")
+    with open(catalog_path, "w") as file:
+        json.dump(menu, file)
+    previous_catalog = os.environ.get("MENU_PLANNER_CATALOG")
+    os.environ["MENU_PLANNER_CATALOG"] = catalog_path
+    previous_folder = os.getcwd()
+    os.chdir(folder)
+    try:
+        root.withdraw()
+        app = load_gui_module().MenuPlanner(root)
+        app.worker.poll_ms = 1  # Check for finished background jobs straight away
+
+        def wait_for_worker():
+            while app.worker.pending:
+                root.update()
+
+        wait_for_worker()
+        app.plan.set_budget(sum(max(details["price"] for details in menu[category].values())
+                                for category in CATEGORIES))
+        for category in CATEGORIES:
+            app.plan.set_choice(category, next(iter(menu[category])))
+
+        pages = [app.create_menu_page, app.create_food_page, app.create_drink_page,
+                 app.create_dessert_page, app.create_receipt_page]
+
+        def switch_pages():
+            for _ in range(rounds):
+                for show_page in pages:
+                    show_page()
+                    root.update_idletasks()
+            wait_for_worker()
+
+        def save_receipts():
+            for _ in range(rounds):
+                app.save_receipt()
+                wait_for_worker()
+
+        def load_receipts():
+            for _ in range(rounds):
+                app.load_previous_menu()
+                wait_for_worker()
+
+        results = {
+            "page_switch": measure(switch_pages, rounds * len(pages), repeat=3),
+            "gui_receipt_save": measure(save_receipts, rounds, repeat=3),
+            "gui_receipt_load": measure(load_receipts, rounds, repeat=3),
+        }
+    finally:
+        os.chdir(previous_folder)
+        if previous_catalog is None:
+            del os.environ["MENU_PLANNER_CATALOG"]
+        else:
+            os.environ["MENU_PLANNER_CATALOG"] = previous_catalog
+        root.destroy()
+    return results, None
+
+
+def run_fresh(code, folder):
+    """
+    Runs code in a new Python process and returns (seconds until its first line of output,
+    that line), or (None, the error) if it failed. The time includes starting the interpreter.
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", code], cwd=folder, text=True,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    line = process.stdout.readline()
+    seconds = time.perf_counter() - start
+    error = process.communicate()[1]
+    if not line:
+        return None, (error.strip().splitlines() or ["no output"])[-1]
+    return seconds, line.split()
+
+
+def benchmark_cold_start(folder, gui=True, repeat=5):
+    """Importing the engine and painting the first window, each in a fresh process."""
+    results = {}
+    skipped = {}
+    imports = []
+    for _ in range(repeat):
+        seconds, output = run_fresh(IMPORT_ENGINE.format(folder=FOLDER), folder)
+        if seconds is None:
+            skipped["cold_import_engine"] = output
+            break
+        imports.append(float(output[0]))
+        if output[1] == "True":
+            skipped["cold_import_engine"] = "importing the engine also imported tkinter"
+            break
+    else:
+        results["cold_import_engine"] = statistics.median(imports)
+
+    if gui:
+        code = FIRST_PAINT.format(folder=FOLDER, path=os.path.join(FOLDER, "menu-planner_iteration-3.py"))
+        paints = []
+        for _ in range(repeat):
+            seconds, output = run_fresh(code, folder)
+            if seconds is None:
+                skipped["cold_first_paint"] = f"Tkinter could not open a window: {output}"
+                break
+            paints.append(seconds)
+        else:
+            results["cold_first_paint"] = statistics.median(paints)
+    return results, skipped
+
+
+def run_benchmarks(sizes, order_count, gui=True):
+    """Runs every benchmark for each catalog size and returns the JSON-ready report."""
+    with tempfile.TemporaryDirectory() as folder:
+        results, skipped = benchmark_cold_start(folder, gui)
+        for size in sizes:
+            menu = synthetic_menu(size)
+            rng = random.Random(size)
+            timings = {}
+            timings.update(benchmark_engine(menu, rng))
+            timings.update(benchmark_receipts(menu, rng, folder))
+            timings.update(benchmark_batch(menu, rng, order_count))
+            if gui:
+                gui_timings, reason = benchmark_gui(menu, folder)
+                timings.update(gui_timings)
+                if reason is not None:
+                    skipped[f"gui[{size}]"] = reason
+            for name, seconds in timings.items():
+                results[f"{name}[{size}]"] = seconds
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.time(),
+        "unit": "seconds per operation",
+        "targets": COLD_START_TARGETS,
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Returns (name, baseline seconds, current seconds) for each benchmark that got slower."""
+    regressions = []
+    for name, seconds in report["results"].items():
+        previous = baseline["results"].get(name)
+        if previous and seconds > previous * (1 + tolerance):
+            regressions.append((name, previous, seconds))
+    return regressions
+
+
+def missed_targets(report):
+    """Returns (name, target seconds, measured seconds) for each cold-start target that was missed."""
+    return [(name, target, report["results"][name]) for name, target in COLD_START_TARGETS.items()
+            if report["results"].get(name, 0) > target]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the menu planner's hot paths.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"comma-separated numbers of items per category (default: {DEFAULT_SIZES})")
+    parser.add_argument("--orders", type=int, default=20000, help="number of orders in the batch benchmark")
+    parser.add_argument("--no-gui", action="store_true", help="skip the benchmarks that open a window")
+    parser.add_argument("--output", default="-", help="where to write the JSON results (default: stdout)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE,
+                        help=f"baseline results to compare with, if the file exists (default: {DEFAULT_BASELINE})")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="how much slower than the baseline counts as a regression (default: 0.25 = 25%%)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    report = run_benchmarks(sizes, args.orders, gui=not args.no_gui)
+
+    text = json.dumps(report, indent=4)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    for name, reason in report["skipped"].items():
+        print(f"Skipped {name}: {reason}", file=sys.stderr)
+    missed = missed_targets(report)
+    for name, target, seconds in missed:
+        print(f"MISSED TARGET {name}: {seconds * 1000:.1f} ms (target {target * 1000:.0f} ms)", file=sys.stderr)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            file.write(text + "\n")
+        print(f"Saved the baseline to {args.baseline}.", file=sys.stderr)
+        return 1 if missed else 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save-baseline to record one.", file=sys.stderr)
+        return 1 if missed else 0
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    regressions = compare(report, baseline, args.tolerance)
+    for name, previous, seconds in regressions:
+        print(f"REGRESSION {name}: {previous * 1e6:.2f} us -> {seconds * 1e6:.2f} us "
+              f"({seconds / previous:.2f}x slower)", file=sys.stderr)
+    if not regressions:
+        print(f"No regressions against {args.baseline}.", file=sys.stderr)
+    return 1 if regressions or missed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+# W. Fifita Menu Planner - Receipt Storage Benchmark
+
+"""
+Compares the JSON Lines receipt log with the SQLite receipt database: write throughput for
+single saves and batched saves, and query latency for loading the latest receipt, loading
+the Nth receipt and finding "all plans containing Pizza under $15".
+
+Run with:  python benchmark_storage.py --count 20000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from planner_engine import menu, MenuPlan
+from receipt_db import ReceiptDatabase
+from receipt_store import ReceiptLog
+
+
+def random_receipts(count, seed=1):
+    """Builds `count` random receipts from the menu."""
+    rng = random.Random(seed)
+    receipts = []
+    start = time.time() - 30 * 24 * 60 * 60
+    for i in range(count):
+        plan = MenuPlan(menu, rng.randint(9, 25) * 100)
+        for category in menu:
+            plan.set_choice(category, rng.choice(list(menu[category])))
+        receipt = plan.to_dict()
+        receipt["saved_at"] = start + i * 60
+        receipts.append(receipt)
+    return receipts
+
+
+def timed(function, repeat=1):
+    """Runs a function `repeat` times and returns the average seconds per run."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def benchmark_json(receipts, folder):
+    log = ReceiptLog(os.path.join(folder, "receipts.jsonl"))
+    write = timed(lambda: [log.append(receipt) for receipt in receipts])
+    middle = len(receipts) // 2
+
+    def pizza_under_15():
+        return [r for r in log if r["food"] == "Pizza" and r["total_cents"] <= 1500]
+
+    return {
+        "single writes/s": len(receipts) / write,
+        "latest (ms)": timed(log.latest, 1000) * 1000,
+        "Nth (ms)": timed(lambda: log.get(middle), 1000) * 1000,
+        "Pizza under $15 (ms)": timed(pizza_under_15, 3) * 1000,
+    }
+
+
+def benchmark_sqlite(receipts, folder, single_count):
+    # Single saves commit one transaction each, so only time a smaller sample of them
+    single = ReceiptDatabase(os.path.join(folder, "single.db"))
+    single_write = timed(lambda: [single.append(receipt) for receipt in receipts[:single_count]])
+    single.close()
+
+    database = ReceiptDatabase(os.path.join(folder, "receipts.db"))
+    batch_write = timed(lambda: database.save_many(receipts))
+    middle = len(receipts) // 2
+    results = {
+        "single writes/s": single_count / single_write,
+        "batched writes/s": len(receipts) / batch_write,
+        "latest (ms)": timed(database.latest, 1000) * 1000,
+        "Nth (ms)": timed(lambda: database.get(middle), 1000) * 1000,
+        "Pizza under $15 (ms)": timed(lambda: database.plans_containing("Pizza", 1500), 3) * 1000,
+        "average budget per day (ms)": timed(database.average_budget_per_day, 3) * 1000,
+    }
+    database.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the receipt storage backends.")
+    parser.add_argument("--count", type=int, default=20000, help="number of receipts to save")
+    parser.add_argument("--single", type=int, default=500, help="number of single SQLite saves to time")
+    args = parser.parse_args()
+
+    receipts = random_receipts(args.count)
+    with tempfile.TemporaryDirectory() as folder:
+        for name, results in [("JSON log", benchmark_json(receipts, folder)),
+                              ("SQLite", benchmark_sqlite(receipts, folder, min(args.single, args.count)))]:
+            print(f"{name}:")
+            for measure, value in results.items():
+                print(f"  {measure}: {value:,.3f}")
+
+
+if __name__ == "__main__":
+    main()
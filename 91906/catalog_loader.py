@@ -0,0 +1,380 @@
+# W. Fifita Menu Planner - Catalog Loader
+
+"""
+Loads the menu from an external catalog file instead of the dict written in the code, so
+prices can be changed without editing the program. Two formats are supported:
+
+  menu.json  {"food": {"Burger": {"price": 500, "description": "...", "rating": 4.5}, ...}, ...}
+  menu.csv   category,item,price_cents,description[,rating]  (one item per line, with a header line)
+
+The rating (out of 5) is optional and is used by the meal optimizer to suggest plans.
+
+Prices are whole cents in both formats, the same as the planner uses internally. CSV files written
+before this with a "price" column in dollars (e.g. 4.50) are still read: the header line says which
+unit the file uses. Every item from either format goes through check_item, so a bad price or a
+missing description raises a CatalogError naming the item when its category is loaded, instead of
+failing later when a receipt is printed.
+
+Catalog files bigger than COMPACT_BYTES (or any catalog, with compact=True) are read straight
+into a CompactCatalog instead, which keeps items in arrays and uses far less memory per item.
+A JSON catalog is then read a chunk at a time and each item added as it is parsed, so the nested
+dicts of the whole file never exist at once and loading peaks at little more than the result.
+
+Otherwise parsing is lazy: nothing is read until the menu is first used. A CSV catalog is then split into
+categories and each category's items are built the first time that category is looked up; a
+JSON catalog is parsed in one pass. The parsed catalog is cached against the file's modification
+time and size, and is only reloaded when the file changes.
+
+Each menu handed out is an immutable CatalogSnapshot with its own version. update_prices()
+publishes a new snapshot that shares everything else with the current one, and recent
+snapshots can be looked up by version while anything (such as a plan) still uses them.
+"""
+
+import csv
+import json
+import os
+import threading
+import weakref
+from collections.abc import Mapping
+
+from planner_engine import menu as default_menu
+from money import parse_cents
+from compact_catalog import CompactCatalog
+from catalog_snapshot import CatalogSnapshot
+from instrumentation import timed
+
+DEFAULT_CATALOG = "menu.json"
+
+# Catalog files bigger than this are loaded as a CompactCatalog rather than a menu of dicts
+COMPACT_BYTES = 16 * 1024 * 1024
+
+# Characters of a JSON catalog read at a time when streaming it into a CompactCatalog
+JSON_CHUNK = 1 << 20
+
+JSON_SPACE = " \t\r\n"
+
+
+class LazyMenu(Mapping):
+    """
+    A read-only menu (category -> item -> details) that reads the file on first use and builds
+    each category the first time it is looked up. It behaves like the menu dict everywhere the
+    planner reads from it.
+    """
+
+    def __init__(self, load_categories, parse_category):
+        self.load_categories = load_categories  # Returns category -> unparsed data
+        self.parse_category = parse_category
+        self.loaded = None
+        self.parsed = {}
+
+    @property
+    def raw(self):
+        if self.loaded is None:
+            self.loaded = self.load_categories()
+        return self.loaded
+
+    def __getitem__(self, category):
+        items = self.parsed.get(category)
+        if items is None:
+            items = self.parsed[category] = self.parse_category(self.raw[category])
+        return items
+
+    def __iter__(self):
+        return iter(self.raw)
+
+    def __len__(self):
+        return len(self.raw)
+
+    def __contains__(self, category):
+        return category in self.raw
+
+
+class CatalogError(ValueError):
+    """A catalog file has an item the planner cannot use. The message names the item."""
+
+
+def check_item(category, item, details):
+    """
+    Checks one item's details and returns them as the planner uses them: "price" in whole cents
+    greater than zero, a "description" string and, if given, a "rating" from 0 to 5.
+    """
+    if not isinstance(item, str) or not item:
+        raise CatalogError(f"An item in {category} has no name.")
+    if not isinstance(details, Mapping):
+        raise CatalogError(f"{category} item {item!r} has no price or description.")
+    for key in ("price", "description"):
+        if key not in details:
+            raise CatalogError(f"{category} item {item!r} has no {key}.")
+    price = details["price"]
+    if not isinstance(price, int) or isinstance(price, bool) or price <= 0:
+        raise CatalogError(f"{category} item {item!r} has a price of {price!r}; "
+                           "prices must be whole cents greater than zero.")
+    if not isinstance(details["description"], str):
+        raise CatalogError(f"{category} item {item!r} has a description that is not text.")
+    checked = {"price": price, "description": details["description"]}
+    rating = details.get("rating")
+    if rating is not None:
+        if not isinstance(rating, (int, float)) or isinstance(rating, bool) or not 0 <= rating <= 5:
+            raise CatalogError(f"{category} item {item!r} has a rating of {rating!r}; ratings are from 0 to 5.")
+        checked["rating"] = rating
+    return checked
+
+
+def check_category(category, items):
+    """Checks every item in a category, which must have at least one."""
+    if not isinstance(items, Mapping) or not items:
+        raise CatalogError(f"The {category} category has no items.")
+    return {item: check_item(category, item, details) for item, details in items.items()}
+
+
+def in_dollars(header):
+    """Whether a CSV catalog with this header line gives its prices in dollars (the old "price" column)."""
+    columns = next(csv.reader([header or ""]), [])
+    return len(columns) > 2 and columns[2].strip().lower() == "price"
+
+
+def parse_row(row, dollars=False):
+    """
+    Returns (category, item, price in cents, description, rating or None) for one CSV row,
+    checked by check_item. `dollars` is whether the file's prices are in dollars.
+    """
+    if len(row) < 4:
+        raise CatalogError(f"The catalog line {','.join(row)!r} needs a category, item, price and description.")
+    category, item, price, description = row[:4]
+    try:
+        price = parse_cents(price) if dollars else int(price)
+    except ValueError:
+        unit = "a dollar amount" if dollars else "whole cents"
+        raise CatalogError(f"{category} item {item!r} has a price of {price!r}, which is not {unit}.") from None
+    rating = row[4].strip() if len(row) > 4 else ""
+    if rating:
+        try:
+            rating = float(rating)
+        except ValueError:
+            raise CatalogError(f"{category} item {item!r} has a rating of {rating!r}, which is not a number.") from None
+    details = check_item(category, item, {"price": price, "description": description, "rating": rating if rating != "" else None})
+    return category, item, details["price"], description, details.get("rating")
+
+
+def load_csv(path):
+    """A lazy menu that groups the CSV lines by category, only parsing a category when used."""
+
+    dollars = False
+
+    def load_categories():
+        nonlocal dollars
+        categories = {}
+        with open(path, newline="", encoding="utf-8") as file:
+            dollars = in_dollars(next(file, None))
+            for line in file:
+                if not line.strip():
+                    continue
+                if line.startswith('"'):
+                    # A quoted category name may contain commas, so let the csv module read it
+                    category = next(csv.reader([line]))[0]
+                else:
+                    category = line.partition(",")[0]
+                categories.setdefault(category, []).append(line)
+        return categories
+
+    def parse_category(lines):
+        items = {}
+        for row in csv.reader(lines):
+            category, item, price, description, rating = parse_row(row, dollars)
+            items[item] = {"price": price, "description": description}
+            if rating is not None:
+                items[item]["rating"] = rating
+        return items
+
+    return LazyMenu(load_categories, parse_category)
+
+
+def load_json(path):
+    """A lazy menu that parses the JSON file the first time it is used."""
+
+    def load_categories():
+        # json.load is fast C code, so one pass over the whole file beats parsing piecewise
+        with open(path, "rb") as file:
+            return read_json_catalog(file)
+
+    def parse_category(items):
+        # The category was checked as a whole when the file was read
+        return items
+
+    return LazyMenu(load_categories, parse_category)
+
+
+def read_json_catalog(file):
+    """Parses a JSON catalog from an open file and checks every item in it."""
+    try:
+        data = json.load(file)
+    except ValueError as error:
+        raise CatalogError(f"The catalog is not valid JSON: {error}") from None
+    if not isinstance(data, dict) or not data:
+        raise CatalogError("The catalog has no categories.")
+    return {category: check_category(category, items) for category, items in data.items()}
+
+
+class JsonStream:
+    """
+    Reads a JSON file a chunk at a time for stream_json_catalog. Only strings and objects are
+    decoded with raw_decode, since they end with a closing character: a decode that fails at the
+    end of the buffer is retried with the next chunk added, never cut short.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.text = ""
+        self.position = 0
+        self.decoder = json.JSONDecoder()
+
+    def read_more(self):
+        """Drops the text already parsed and adds the next chunk. Returns False at the end of the file."""
+        chunk = self.file.read(JSON_CHUNK)
+        self.text = self.text[self.position:] + chunk
+        self.position = 0
+        return bool(chunk)
+
+    def peek(self):
+        """The next character that is not whitespace, or "" at the end of the file."""
+        while True:
+            while self.position < len(self.text) and self.text[self.position] in JSON_SPACE:
+                self.position += 1
+            if self.position < len(self.text):
+                return self.text[self.position]
+            if not self.read_more():
+                return ""
+
+    def expect(self, characters, what):
+        """Consumes and returns the next character, which must be one of `characters`."""
+        character = self.peek()
+        if not character or character not in characters:
+            raise CatalogError(f"The catalog is not valid JSON: expected {what} near {self.text[self.position:][:20]!r}.")
+        self.position += 1
+        return character
+
+    def value(self, what, starts='"'):
+        """Decodes the next value, which must be a string (or an object, with starts='{')."""
+        if self.peek() not in starts:
+            raise CatalogError(f"The catalog is not valid JSON: expected {what} near {self.text[self.position:][:20]!r}.")
+        while True:
+            try:
+                value, self.position = self.decoder.raw_decode(self.text, self.position)
+                return value
+            except ValueError as error:
+                if not self.read_more():
+                    raise CatalogError(f"The catalog is not valid JSON: {error}") from None
+
+
+def stream_json_catalog(file):
+    """
+    Yields (category, item, details) for each item of a JSON catalog in an open text file,
+    checked by check_item, while reading the file a chunk at a time.
+    """
+    stream = JsonStream(file)
+    stream.expect("{", "the catalog's categories")
+    if stream.peek() == "}":
+        raise CatalogError("The catalog has no categories.")
+    while True:
+        category = stream.value("a category name")
+        stream.expect(":", "':'")
+        if stream.peek() != "{":
+            raise CatalogError(f"The {category} category has no items.")
+        stream.expect("{", "items")
+        if stream.peek() == "}":
+            raise CatalogError(f"The {category} category has no items.")
+        while True:
+            item = stream.value(f"an item name in {category}")
+            stream.expect(":", "':'")
+            yield category, item, check_item(category, item, stream.value(f"the details of {category} item {item!r}", "{"))
+            if stream.expect(",}", "',' or '}'") == "}":
+                break
+        if stream.expect(",}", "',' or '}'") == "}":
+            break
+    if stream.peek():
+        raise CatalogError("The catalog is not valid JSON: there is more after the catalog.")
+
+
+def load_compact(path):
+    """Reads a whole catalog file into a CompactCatalog, one item at a time."""
+    catalog = CompactCatalog()
+    if not path.endswith(".csv"):
+        with open(path, encoding="utf-8") as file:
+            for category, item, details in stream_json_catalog(file):
+                catalog.add_item(category, item, details["price"], details["description"], details.get("rating"))
+        return catalog
+    with open(path, newline="", encoding="utf-8") as file:
+        dollars = in_dollars(next(file, None))
+        rows = csv.reader(file)
+        for row in rows:
+            if row:
+                catalog.add_item(*parse_row(row, dollars))
+    return catalog
+
+
+class CatalogLoader:
+    """
+    Loads a catalog file and caches the result against its modification time and size.
+    If the file does not exist, the built-in menu from planner_engine is used instead.
+    `compact` chooses whether to load a CompactCatalog; by default only big files are.
+    """
+
+    def __init__(self, path=None, compact=None):
+        if path is None:
+            path = os.environ.get("MENU_PLANNER_CATALOG", DEFAULT_CATALOG)
+        self.path = path
+        self.compact = compact
+        self.cache_key = None
+        self.snapshots = weakref.WeakValueDictionary()  # version -> snapshot still in use
+        self.update_lock = threading.Lock()  # Only taken by writers, readers never wait
+        self.publish(CatalogSnapshot(default_menu))  # Sets cached_menu and version
+
+    @timed("catalog.menu")
+    def menu(self):
+        """Returns the current menu snapshot, reloading it only if the catalog file has changed."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            key = None
+        else:
+            key = (stat.st_mtime_ns, stat.st_size)
+
+        if key != self.cache_key:
+            self.cache_key = key
+            if key is None:
+                menu = default_menu
+            elif self.compact or (self.compact is None and stat.st_size > COMPACT_BYTES):
+                menu = load_compact(self.path)
+            elif self.path.endswith(".csv"):
+                menu = load_csv(self.path)
+            else:
+                menu = load_json(self.path)
+            self.publish(CatalogSnapshot(menu))
+        return self.cached_menu
+
+    def publish(self, snapshot):
+        """Makes a snapshot the current menu. Swapping one reference is atomic, so no reader locks."""
+        self.snapshots[snapshot.version] = snapshot
+        self.cached_menu = snapshot
+        self.version = snapshot.version
+
+    def update_prices(self, changes):
+        """
+        Publishes a new snapshot with some prices changed ({category: {item: cents}}) and returns
+        it. Plans priced against older snapshots keep their prices. The changes last until the
+        catalog file itself changes.
+        """
+        with self.update_lock:
+            snapshot = self.menu().with_prices(changes)
+            self.publish(snapshot)
+        return snapshot
+
+    def snapshot(self, version):
+        """Returns the snapshot with the given version, or None if nothing uses it any more."""
+        return self.snapshots.get(version)
+
+    def has_changed(self):
+        """Checks whether the catalog file has changed since it was last loaded."""
+        version = self.version
+        self.menu()
+        return self.version != version
@@ -0,0 +1,97 @@
+# W. Fifita Menu Planner - Catalog Snapshots
+
+"""
+Immutable, versioned views of the menu. Every menu the planner hands out is a CatalogSnapshot
+with a version number, and a snapshot never changes once it has been made: a price update
+makes a new snapshot instead. The new snapshot shares everything that did not change with the
+old one (copy-on-write), so an update costs as much as the prices it changes rather than the
+size of the catalog, and anyone still reading the old snapshot, such as a plan priced against
+it, keeps seeing the old prices. Readers never take a lock or copy anything.
+
+Versions are microseconds since the epoch, raised if needed so each is higher than the last,
+so a version saved on a receipt is never reused by a later run of the planner.
+"""
+
+import threading
+import time
+from collections.abc import Mapping
+
+last_version = 0
+version_lock = threading.Lock()
+
+
+def new_version():
+    """Returns a version number higher than every one handed out before it."""
+    global last_version
+    with version_lock:
+        last_version = max(last_version + 1, time.time_ns() // 1000)
+        return last_version
+
+
+class PriceOverlay(Mapping):
+    """One category's items with some prices replaced, sharing the rest with the category it overlays."""
+
+    __slots__ = ("unchanged", "prices")
+
+    def __init__(self, items, prices):
+        self.unchanged = items  # The unchanged category, shared with older snapshots
+        self.prices = prices  # item -> new price in cents
+
+    def __getitem__(self, item):
+        details = self.unchanged[item]
+        price = self.prices.get(item)
+        return details if price is None else dict(details, price=price)
+
+    def __contains__(self, item):
+        return item in self.unchanged
+
+    def __iter__(self):
+        return iter(self.unchanged)
+
+    def __len__(self):
+        return len(self.unchanged)
+
+
+class CatalogSnapshot(Mapping):
+    """
+    One version of the menu (category -> item -> details). `base` is the menu as loaded from the
+    catalog file and `overlays` holds the categories whose prices have been updated since.
+    """
+
+    def __init__(self, base, version=None, overlays=None):
+        self.base = base
+        self.version = version if version is not None else new_version()
+        self.overlays = overlays or {}  # category -> PriceOverlay
+
+    def __getitem__(self, category):
+        overlay = self.overlays.get(category)
+        return overlay if overlay is not None else self.base[category]
+
+    def __contains__(self, category):
+        return category in self.base
+
+    def __iter__(self):
+        return iter(self.base)
+
+    def __len__(self):
+        return len(self.base)
+
+    def with_prices(self, changes):
+        """
+        Returns a new snapshot with some prices changed, given as {category: {item: cents}}.
+        Only the dict of overlays and the changed categories' price overlays are copied.
+        Raises KeyError for an item that is not on the menu and ValueError for a bad price.
+        """
+        overlays = dict(self.overlays)
+        for category, prices in changes.items():
+            items = self[category]
+            for item, price in prices.items():
+                if item not in items:
+                    raise KeyError(item)
+                if not isinstance(price, int) or isinstance(price, bool) or price <= 0:
+                    raise ValueError(f"The price of {item} must be whole cents greater than zero.")
+            if isinstance(items, PriceOverlay):
+                overlays[category] = PriceOverlay(items.unchanged, {**items.prices, **prices})
+            else:
+                overlays[category] = PriceOverlay(items, dict(prices))
+        return CatalogSnapshot(self.base, overlays=overlays)
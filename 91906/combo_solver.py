@@ -0,0 +1,125 @@
+# W. Fifita Menu Planner - Combination Solver
+
+"""
+Finds every meal (one item from each category) that fits within a budget. Each category's
+prices are sorted once, so the search can stop as soon as the cheapest way to finish a meal
+is already over budget, instead of trying every possible combination.
+
+Meals are counted by meeting in the middle: the categories are split into two halves, and
+each half's possible totals are worked out once, as the number of ways to make each distinct
+total in cents. A count then pairs each total from the first half with a binary search over
+the running counts of the second, so it costs about as much as the number of distinct totals
+rather than the number of meals.
+"""
+
+import heapq
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from itertools import accumulate
+
+from planner_engine import menu
+
+
+class CombinationSolver:
+    """
+    Holds the menu's prices sorted per category and answers budget questions about them.
+    Build it once and reuse it; rebuild it if the menu changes. Raises ValueError if a
+    category has no items, since then no meal can be made.
+    """
+
+    def __init__(self, menu=menu, categories=None):
+        self.categories = list(categories) if categories is not None else list(menu)
+        self.prices = []  # per category: ascending prices
+        self.items = []  # per category: item names in the same order as the prices
+        for category in self.categories:
+            ranked = sorted((details["price"], item) for item, details in menu[category].items())
+            if not ranked:
+                raise ValueError(f"The {category} category has no items.")
+            self.prices.append([price for price, item in ranked])
+            self.items.append([item for price, item in ranked])
+
+        # min_rest[i] is the cheapest possible cost of categories i onwards
+        self.min_rest = [0] * (len(self.categories) + 1)
+        for i in range(len(self.categories) - 1, -1, -1):
+            self.min_rest[i] = self.min_rest[i + 1] + self.prices[i][0]
+        self.halves = None  # Built by the first count()
+
+    def cheapest_total(self):
+        """Returns the cost of the cheapest possible meal."""
+        return self.min_rest[0]
+
+    def iter_combinations(self, budget):
+        """
+        Yields (total, (item, item, ...)) for every affordable meal, cheapest first.
+        Meals are generated lazily from a heap, so stopping early costs nothing extra.
+        """
+        if self.min_rest[0] > budget:
+            return
+        start = (0,) * len(self.categories)
+        # Each heap entry is (total, indexes, first position still allowed to move)
+        heap = [(self.min_rest[0], start, 0)]
+        while heap:
+            total, indexes, first = heapq.heappop(heap)
+            if total > budget:
+                return
+            yield total, tuple(self.items[i][index] for i, index in enumerate(indexes))
+
+            # Only move positions at or after the last one moved so each meal is reached once
+            for i in range(first, len(indexes)):
+                index = indexes[i] + 1
+                if index < len(self.prices[i]):
+                    next_total = total - self.prices[i][index - 1] + self.prices[i][index]
+                    if next_total <= budget:
+                        heapq.heappush(heap, (next_total, indexes[:i] + (index,) + indexes[i + 1:], i))
+
+    def combinations(self, budget, limit=None):
+        """Returns a list of affordable meals sorted by price, optionally only the first `limit`."""
+        found = []
+        for combination in self.iter_combinations(budget):
+            if limit is not None and len(found) >= limit:
+                break
+            found.append(combination)
+        return found
+
+    def total_counts(self, categories):
+        """
+        Returns the distinct totals of one item from each of the given categories, ascending,
+        and how many ways each total can be made.
+        """
+        counts = {0: 1}
+        for i in categories:
+            merged = defaultdict(int)
+            for price, items in Counter(self.prices[i]).items():
+                for total, ways in counts.items():
+                    merged[total + price] += ways * items
+            counts = merged
+        totals = sorted(counts)
+        return totals, [counts[total] for total in totals]
+
+    def count(self, budget):
+        """Counts the affordable meals without building them."""
+        if not self.categories:
+            return 0
+        if self.halves is None:
+            middle = len(self.categories) // 2
+            first = self.total_counts(range(middle))
+            second_totals, second_ways = self.total_counts(range(middle, len(self.categories)))
+            self.halves = first, (second_totals, list(accumulate(second_ways)))
+        (first_totals, first_ways), (second_totals, second_running) = self.halves
+
+        found = 0
+        limit = budget - second_totals[0]
+        for total, ways in zip(first_totals, first_ways):
+            if total > limit:
+                break  # Totals are ascending, so nothing later can be finished within budget
+            found += ways * second_running[bisect_right(second_totals, budget - total) - 1]
+        return found
+
+    # Same names as PriceTable, so either one can answer the planner's budget questions
+    count_within = count
+    combinations_within = combinations
+
+
+def affordable_combinations(budget, menu=menu, categories=None, limit=None):
+    """Returns every (total, (food, drink, dessert)) meal within the budget, cheapest first."""
+    return CombinationSolver(menu, categories).combinations(budget, limit)
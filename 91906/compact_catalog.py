@@ -0,0 +1,226 @@
+# W. Fifita Menu Planner - Compact Catalog
+
+"""
+A menu for very large catalogs that uses a fraction of the memory of the nested menu dict.
+
+In the menu dict every item is its own dict with its own "price" and "description" keys, which
+costs several hundred bytes an item before the text itself. Here each item is just a number (its
+item ID) into parallel arrays of prices, category codes, ratings, name numbers and description
+numbers. Names and descriptions are interned in string tables that keep each distinct string
+once, back to back in a single UTF-8 buffer, so a description shared by many items is stored
+once. Finding an item by name stays O(1): the name table hashes to the name's number, and a
+chain through the items with that name (usually just one) finds the one in the right category.
+
+CompactCatalog behaves like the read-only menu dict (catalog[category][item]["price"]), so the
+planner, price tables and optimizer work with it unchanged; the item details are built when
+they are looked up. item_id() and item() convert between names and IDs, but IDs depend on the
+order the file was read in, so plans and receipts refer to items by name.
+"""
+
+from array import array
+from collections.abc import Mapping
+
+# Ratings are kept in hundredths, with this value for an item that has no rating
+NO_RATING = -1
+
+
+class StringTable:
+    """
+    Interned strings stored back to back in one UTF-8 buffer, each with a number. An
+    open-addressing hash table of string numbers finds a string's number in O(1).
+    """
+
+    __slots__ = ("data", "ends", "slots", "mask")
+
+    def __init__(self):
+        self.data = bytearray()
+        self.ends = array("I", [0])  # String n is data[ends[n]:ends[n + 1]]
+        self.slots = array("i", [-1]) * 8  # Hash table of string numbers, -1 for an empty slot
+        self.mask = 7
+
+    def __len__(self):
+        return len(self.ends) - 1
+
+    def __getitem__(self, number):
+        return self.data[self.ends[number]:self.ends[number + 1]].decode()
+
+    def find_slot(self, encoded):
+        """The slot holding the encoded string, or the empty slot where it would go."""
+        slot = hash(encoded) & self.mask
+        while True:
+            number = self.slots[slot]
+            if number < 0 or self.data[self.ends[number]:self.ends[number + 1]] == encoded:
+                return slot
+            slot = (slot + 1) & self.mask
+
+    def find(self, text):
+        """Returns the number of a string, or -1 if the table does not hold it."""
+        return self.slots[self.find_slot(text.encode())]
+
+    def intern(self, text):
+        """Returns the number of a string, adding it to the table if it is new."""
+        encoded = text.encode()
+        slot = self.find_slot(encoded)
+        number = self.slots[slot]
+        if number < 0:
+            number = len(self)
+            self.data += encoded
+            self.ends.append(len(self.data))
+            self.slots[slot] = number
+            if len(self) * 2 > len(self.slots):
+                self.grow()  # Keep the table at most half full so probes stay short
+        return number
+
+    def grow(self):
+        """Doubles the hash table and re-inserts every string."""
+        self.slots = array("i", [-1]) * (len(self.slots) * 2)
+        self.mask = len(self.slots) - 1
+        ends = self.ends
+        for number in range(len(self)):
+            encoded = bytes(self.data[ends[number]:ends[number + 1]])
+            slot = hash(encoded) & self.mask
+            while self.slots[slot] >= 0:
+                slot = (slot + 1) & self.mask
+            self.slots[slot] = number
+
+
+class CategoryItems(Mapping):
+    """One category of a CompactCatalog, a read-only mapping of item name -> details."""
+
+    __slots__ = ("catalog", "code")
+
+    def __init__(self, catalog, code):
+        self.catalog = catalog
+        self.code = code
+
+    def __getitem__(self, name):
+        item_id = self.catalog.find(self.code, name)
+        if item_id < 0:
+            raise KeyError(name)
+        return self.catalog.details(item_id)
+
+    def __contains__(self, name):
+        return self.catalog.find(self.code, name) >= 0
+
+    def __iter__(self):
+        names, name_numbers = self.catalog.names, self.catalog.name_numbers
+        for item_id in self.catalog.members[self.code]:
+            yield names[name_numbers[item_id]]
+
+    def __len__(self):
+        return len(self.catalog.members[self.code])
+
+
+class CompactCatalog(Mapping):
+    """
+    A menu (category -> item -> details) kept in parallel arrays indexed by item ID. Items are
+    added with add_item(); looking one up builds its details dict on demand.
+    """
+
+    def __init__(self):
+        self.categories = []  # category code -> category name
+        self.category_codes = {}  # category name -> code
+        self.members = []  # category code -> IDs of its items, in menu order
+        self.prices = array("q")  # item ID -> price in cents
+        self.category_of = array("H")  # item ID -> category code
+        self.ratings = array("h")  # item ID -> rating in hundredths, or NO_RATING
+        self.name_numbers = array("I")  # item ID -> number in the name table
+        self.description_numbers = array("I")  # item ID -> number in the description table
+        self.next_same_name = array("i")  # item ID -> next item with the same name, or -1
+        self.first_with_name = array("i")  # name number -> first item with that name
+        self.names = StringTable()
+        self.descriptions = StringTable()
+
+    @classmethod
+    def from_menu(cls, menu):
+        """Builds a compact copy of a menu dict (or any menu mapping)."""
+        catalog = cls()
+        for category in menu:
+            catalog.add_category(category)
+            for item, details in menu[category].items():
+                catalog.add_item(category, item, details["price"], details.get("description", ""),
+                                 details.get("rating"))
+        return catalog
+
+    def add_category(self, category):
+        """Returns the code of a category, adding it (with no items) if it is new."""
+        code = self.category_codes.get(category)
+        if code is None:
+            code = self.category_codes[category] = len(self.categories)
+            self.categories.append(category)
+            self.members.append(array("I"))
+        return code
+
+    def add_item(self, category, name, price, description="", rating=None):
+        """
+        Adds an item and returns its ID. An item already in the category with the same name is
+        updated in place and keeps its ID.
+        """
+        code = self.add_category(category)
+        name_number = self.names.intern(name)
+        if name_number == len(self.first_with_name):
+            self.first_with_name.append(-1)
+        description_number = self.descriptions.intern(description)
+        rating = NO_RATING if rating is None else round(rating * 100)
+
+        item_id = self.find_named(code, name_number)
+        if item_id >= 0:
+            self.prices[item_id] = price
+            self.ratings[item_id] = rating
+            self.description_numbers[item_id] = description_number
+            return item_id
+
+        item_id = len(self.prices)
+        self.prices.append(price)
+        self.category_of.append(code)
+        self.ratings.append(rating)
+        self.name_numbers.append(name_number)
+        self.description_numbers.append(description_number)
+        self.next_same_name.append(self.first_with_name[name_number])
+        self.first_with_name[name_number] = item_id
+        self.members[code].append(item_id)
+        return item_id
+
+    def find_named(self, code, name_number):
+        """The ID of the item with this name number in a category, or -1."""
+        item_id = self.first_with_name[name_number]
+        while item_id >= 0 and self.category_of[item_id] != code:
+            item_id = self.next_same_name[item_id]
+        return item_id
+
+    def find(self, code, name):
+        """The ID of the named item in the category with this code, or -1 if there is none."""
+        name_number = self.names.find(name)
+        return -1 if name_number < 0 else self.find_named(code, name_number)
+
+    def item_id(self, category, name):
+        """Returns the ID of an item, raising KeyError if it is not on the menu."""
+        code = self.category_codes[category]
+        item_id = self.find(code, name)
+        if item_id < 0:
+            raise KeyError(name)
+        return item_id
+
+    def item(self, item_id):
+        """Returns (category, name) for an item ID."""
+        return self.categories[self.category_of[item_id]], self.names[self.name_numbers[item_id]]
+
+    def details(self, item_id):
+        """Builds the details dict for an item, in the same shape as the menu dict's."""
+        details = {"price": self.prices[item_id],
+                   "description": self.descriptions[self.description_numbers[item_id]]}
+        if self.ratings[item_id] != NO_RATING:
+            details["rating"] = self.ratings[item_id] / 100
+        return details
+
+    def __getitem__(self, category):
+        return CategoryItems(self, self.category_codes[category])
+
+    def __iter__(self):
+        return iter(self.categories)
+
+    def __len__(self):
+        return len(self.categories)
+
+    def __contains__(self, category):
+        return category in self.category_codes
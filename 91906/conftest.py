@@ -0,0 +1,45 @@
+# W. Fifita Menu Planner - Test Helpers
+
+"""Fixtures shared by the test modules: random menus and brute-force answers to check against."""
+
+import itertools
+
+import pytest
+
+
+def make_random_menu(rng, categories=3, most_items=5, rated=False):
+    """
+    A menu of `categories` categories with 1 to `most_items` items each. Prices are multiples of
+    25 cents from a small range, so totals repeat. With `rated`, items get a rating from 0 to 5
+    or a null or missing one.
+    """
+    menu = {}
+    for c in range(categories):
+        items = {}
+        for i in range(rng.randint(1, most_items)):
+            details = {"price": rng.randint(1, 12) * 25, "description": ""}
+            if rated:
+                rating = rng.choice(["missing", None, rng.randint(0, 50) / 10])
+                if rating != "missing":
+                    details["rating"] = rating
+            items[f"item{c}-{i}"] = details
+        menu[f"category{c}"] = items
+    return menu
+
+
+def list_every_meal(menu):
+    """(total, items) for every meal (one item per category) in the menu, by brute force."""
+    return [(sum(details["price"] for item, details in meal), tuple(item for item, details in meal))
+            for meal in itertools.product(*(menu[category].items() for category in menu))]
+
+
+@pytest.fixture
+def random_menu():
+    """make_random_menu, for tests that build menus from their own seeded random generator."""
+    return make_random_menu
+
+
+@pytest.fixture
+def every_meal():
+    """list_every_meal, the brute-force list of meals to check the solvers against."""
+    return list_every_meal
@@ -0,0 +1,209 @@
+# W. Fifita Menu Planner - Instrumentation
+
+"""
+Opt-in timing for finding slow paths in real sessions. Set MENU_PLANNER_PROFILE=1 before starting
+the planner and every Tk callback (button commands, key bindings and after() jobs), the main page
+methods and each receipt store and file call records its latency in a histogram. Press F12 in
+the app to print a report and write it to profile-report.txt, or Shift+F12 to start and stop a
+cProfile capture (saved as profile-<time>.prof). With MENU_PLANNER_PROFILE=cprofile the whole
+session is captured with cProfile as well. The report is also written when the program exits.
+
+When the variable is not set nothing is wrapped: timed() returns the function unchanged and the
+Tk hooks are never installed, so there is no overhead at all.
+"""
+
+import atexit
+import functools
+import os
+import sys
+import threading
+import time
+
+MODE = os.environ.get("MENU_PLANNER_PROFILE", "").strip().lower()
+ENABLED = MODE not in ("", "0", "off", "false", "no")
+REPORT_PATH = "profile-report.txt"
+
+
+class Histogram:
+    """Latencies bucketed by powers of two microseconds, with the count, total and maximum."""
+
+    __slots__ = ("count", "total", "longest", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.longest = 0.0
+        self.buckets = [0] * 40  # Bucket i holds times below 2**i microseconds
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.longest:
+            self.longest = seconds
+        self.buckets[min(int(seconds * 1e6).bit_length(), 39)] += 1
+
+    def percentile(self, fraction):
+        """An upper bound on the given percentile (0.5 for the median), in seconds."""
+        wanted = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= wanted:
+                return min(2 ** bucket / 1e6, self.longest)
+        return self.longest
+
+
+# Name of each timed call -> Histogram. Callbacks run on the Tk thread and storage calls on the
+# background worker, so updates are made under a lock.
+histograms = {}
+lock = threading.Lock()
+
+
+def record(name, seconds):
+    """Adds one measured call to the histogram for `name`."""
+    with lock:
+        histogram = histograms.get(name)
+        if histogram is None:
+            histogram = histograms[name] = Histogram()
+        histogram.add(seconds)
+
+
+def timed(name=None):
+    """
+    Decorator that records how long each call takes. When instrumentation is off the function
+    is returned as it is.
+    """
+    def decorate(function):
+        if not ENABLED:
+            return function
+        label = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(label, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def instrument_methods(instance, method_names, prefix):
+    """Times the named methods of one object, e.g. a receipt store. Returns the object."""
+    if ENABLED:
+        for method_name in method_names:
+            method = getattr(instance, method_name, None)
+            if method is not None:
+                setattr(instance, method_name, timed(f"{prefix}.{method_name}")(method))
+    return instance
+
+
+def callback_name(function):
+    """A readable name for a Tk callback, such as MenuPlanner.create_receipt_page."""
+    owner = getattr(function, "__self__", None)
+    if owner is not None:
+        return f"{type(owner).__name__}.{function.__name__}"
+    qualname = getattr(function, "__qualname__", type(function).__name__)
+    if qualname.endswith("after.<locals>.callit"):
+        return f"after:{function.__name__}"  # tkinter copies the scheduled function's name
+    return qualname
+
+
+tk_hooks_installed = False
+
+
+def install_tk_hooks():
+    """Times every callback Tk makes into Python by wrapping tkinter's CallWrapper."""
+    global tk_hooks_installed
+    import tkinter
+    call_wrapper = getattr(tkinter, "CallWrapper", None)
+    if tk_hooks_installed or call_wrapper is None:
+        return
+    original_call = call_wrapper.__call__
+
+    def timed_call(wrapper, *args):
+        start = time.perf_counter()
+        try:
+            return original_call(wrapper, *args)
+        finally:
+            record("tk:" + callback_name(wrapper.func), time.perf_counter() - start)
+
+    call_wrapper.__call__ = timed_call
+    tk_hooks_installed = True
+
+
+def report():
+    """Returns a table of every timed call, slowest in total first."""
+    with lock:
+        rows = sorted(histograms.items(), key=lambda row: row[1].total, reverse=True)
+        lines = [f"{'call':<48} {'calls':>8} {'total ms':>10} {'mean ms':>9} "
+                 f"{'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}"]
+        for name, histogram in rows:
+            lines.append(f"{name[:48]:<48} {histogram.count:>8} {histogram.total * 1000:>10.2f} "
+                         f"{histogram.total / histogram.count * 1000:>9.3f} "
+                         f"{histogram.percentile(0.5) * 1000:>8.3f} {histogram.percentile(0.95) * 1000:>8.3f} "
+                         f"{histogram.longest * 1000:>8.3f}")
+    return "\n".join(lines)
+
+
+def write_report(path=REPORT_PATH):
+    """Prints the report to stderr and saves it to a file."""
+    text = report()
+    print(text, file=sys.stderr)
+    with open(path, "w") as file:
+        file.write(text + "\n")
+
+
+class ProfileCapture:
+    """Starts and stops a cProfile capture, saving each one to its own .prof file."""
+
+    def __init__(self):
+        self.profiler = None
+
+    def toggle(self):
+        if self.profiler is None:
+            self.start()
+        else:
+            self.stop()
+
+    def start(self):
+        import cProfile
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+        print("cProfile capture started.", file=sys.stderr)
+
+    def stop(self):
+        import pstats
+        profiler, self.profiler = self.profiler, None
+        profiler.disable()
+        path = time.strftime("profile-%Y%m%d-%H%M%S.prof")
+        profiler.dump_stats(path)
+        print(f"cProfile capture saved to {path}.", file=sys.stderr)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(20)
+
+
+capture = ProfileCapture()
+
+
+def attach(root):
+    """Installs the Tk hooks and report hotkeys on the app window, if instrumentation is on."""
+    if not ENABLED:
+        return
+    install_tk_hooks()
+    root.bind_all("<F12>", lambda event: write_report())
+    root.bind_all("<Shift-F12>", lambda event: capture.toggle())
+
+
+def finish():
+    """Saves any capture still running and the final report when the program exits."""
+    if capture.profiler is not None:
+        capture.stop()
+    if histograms:
+        write_report()
+
+
+if ENABLED:
+    atexit.register(finish)
+    if MODE == "cprofile":
+        capture.start()
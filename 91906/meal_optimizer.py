@@ -0,0 +1,313 @@
+# W. Fifita Menu Planner - Meal Optimizer
+
+"""
+Suggests the best plan for a group: one item per category for each of `people` people, with the
+highest total score (the items' ratings by default) that fits the budget.
+
+Each category is first cut down to its Pareto frontier, the items that no other item beats on
+both price and score, which usually leaves only a handful even in a catalog of thousands. The
+best meals are then found by dynamic programming over whole-cent costs, keeping only states
+that are not dominated by a cheaper one. A group's plan combines the per-meal states by
+doubling (2 people, 4 people, ...), so 50 people need 6 combination steps rather than 50, and
+the last MEMO_SIZE results are memoised per budget. If the states would still grow too large, a
+branch-and-bound search is used instead. It starts from a greedy plan and stops at the deadline
+with the best plan found so far, so a suggestion takes at most about TIME_LIMIT seconds.
+
+Past the dynamic programme's reach (tens of people with several good items per category, such
+as 30 people at $100 from a catalog whose frontiers have 4-5 items each) the search may not
+finish in time. The plan is then good but not proven best, and `exhaustive` is False.
+"""
+
+import time
+from bisect import bisect_right
+from collections import Counter, OrderedDict
+
+from planner_engine import menu
+
+# Candidate states the dynamic programme may generate before switching to branch and bound
+WORK_LIMIT = 50_000
+
+# best_plan returns the best plan found so far once this many seconds have passed
+TIME_LIMIT = 0.08
+
+# Results kept for repeated budgets, least recently used dropped first
+MEMO_SIZE = 1000
+
+# Largest group the GUI and the service ask for a plan for
+MAX_PEOPLE = 100
+
+
+def rating(category, item, details):
+    """The default score: the item's rating from the menu, or 0 if it has none."""
+    return details.get("rating") or 0
+
+
+class TooMuchWork(Exception):
+    """Raised when the dynamic programme would generate more than WORK_LIMIT states or pass its deadline."""
+
+
+def pareto_front(states):
+    """
+    Keeps the states (cost, score, payload) that no cheaper state scores at least as well as,
+    sorted by cost. Scores strictly increase along the result, so the last state is the best.
+    """
+    states.sort(key=lambda state: (state[0], -state[1]))
+    front = []
+    best = None
+    for state in states:
+        if best is None or state[1] > best:
+            front.append(state)
+            best = state[1]
+    return front
+
+
+def upper_hull(options):
+    """
+    The indexes of the options on the upper convex hull of (price, score), cheapest first. Moving
+    along it, each upgrade adds less score per extra cent than the one before, and no other option
+    adds more per cent than the next hull option does.
+    """
+    hull = []
+    for index, (price, score, item) in enumerate(options):
+        while len(hull) >= 2:
+            (first_price, first_score, _), (last_price, last_score, _) = options[hull[-2]], options[hull[-1]]
+            # Drop the last point if it lies on or below the line from the one before it to this one
+            if (last_score - first_score) * (price - first_price) > (score - first_score) * (last_price - first_price):
+                break
+            hull.pop()
+        hull.append(index)
+    return hull
+
+
+def flatten(payload, meals):
+    """Turns a combined state's payload back into a list of meals."""
+    if payload and isinstance(payload[0], str):
+        meals.append(payload)
+    else:
+        for part in payload:
+            flatten(part, meals)
+    return meals
+
+
+class MealOptimizer:
+    """Finds the highest-scoring group plan within a budget for one version of the menu."""
+
+    def __init__(self, menu=menu, categories=None, score=rating):
+        self.categories = list(categories) if categories is not None else list(menu)
+        self.options = []  # per category: Pareto frontier of (price, score, item), cheapest first
+        for category in self.categories:
+            ranked = [(details["price"], score(category, item, details), item)
+                      for item, details in menu[category].items()]
+            self.options.append(pareto_front(ranked))
+        self.cheapest_meal = sum(options[0][0] for options in self.options) if all(self.options) else None
+        self.memo = OrderedDict()  # (budget, people) -> result, most recently used last
+        self.exhaustive = True  # False if the last search stopped at its deadline
+
+    def best_plan(self, budget, people=1):
+        """
+        Returns (score, total cost, meals) for the best plan within the budget, where meals is a
+        list with one tuple of item names (in category order) per person, or None if no plan fits.
+        """
+        if people < 1 or self.cheapest_meal is None or self.cheapest_meal * people > budget:
+            return None
+        key = (budget, people)
+        if key in self.memo:
+            self.memo.move_to_end(key)
+            self.exhaustive = True
+            return self.memo[key]
+        deadline = time.perf_counter() + TIME_LIMIT
+        try:
+            result = self.dynamic_plan(budget, people, deadline)
+            self.exhaustive = True
+        except TooMuchWork:
+            result = self.search_plan(budget, people, deadline)
+        if self.exhaustive:
+            self.memo[key] = result  # A search cut short is not kept, so it can be retried
+            if len(self.memo) > MEMO_SIZE:
+                self.memo.popitem(last=False)
+        return result
+
+    def meal_front(self, cap, work, deadline):
+        """The Pareto frontier of single meals costing at most `cap`."""
+        rest = [0] * (len(self.options) + 1)
+        for i in range(len(self.options) - 1, -1, -1):
+            rest[i] = rest[i + 1] + self.options[i][0][0]
+        states = [(0, 0, ())]
+        for i, options in enumerate(self.options):
+            work[0] += len(states) * len(options)
+            if work[0] > WORK_LIMIT or time.perf_counter() > deadline:
+                raise TooMuchWork
+            limit = cap - rest[i + 1]
+            states = pareto_front([(cost + price, score + gain, items + (item,))
+                                   for cost, score, items in states
+                                   for price, gain, item in options if cost + price <= limit])
+        return states
+
+    def combine(self, first, second, cap, work, deadline):
+        """The Pareto frontier of every pairing of a state from `first` with one from `second`."""
+        work[0] += len(first) * len(second)
+        if work[0] > WORK_LIMIT or time.perf_counter() > deadline:
+            raise TooMuchWork
+        return pareto_front([(cost + other_cost, score + other_score, (payload, other_payload))
+                             for cost, score, payload in first
+                             for other_cost, other_score, other_payload in second
+                             if cost + other_cost <= cap])
+
+    def dynamic_plan(self, budget, people, deadline=float("inf")):
+        """Dynamic programming over costs, combining meals by repeated doubling."""
+        work = [0]
+        # Any one meal may use the budget left after the cheapest meal for everyone else
+        power = self.meal_front(budget - self.cheapest_meal * (people - 1), work, deadline)
+        power_people = 1
+        result, result_people = None, 0
+        remaining = people
+        while True:
+            if remaining & 1:
+                if result is None:
+                    result, result_people = power, power_people
+                else:
+                    result_people += power_people
+                    cap = budget - self.cheapest_meal * (people - result_people)
+                    result = self.combine(result, power, cap, work, deadline)
+            remaining >>= 1
+            if not remaining:
+                break
+            power_people *= 2
+            power = self.combine(power, power, budget - self.cheapest_meal * (people - power_people), work, deadline)
+
+        if not result:
+            return None
+        cost, score, payload = result[-1]
+        return score, cost, flatten(payload, [])
+
+    def greedy_plan(self, budget, people, deadline=float("inf")):
+        """
+        A quick plan that is usually close to the best: everyone starts on the cheapest meal, then
+        the upgrade along a category's convex hull that adds the most score per extra cent is made,
+        for as many people as it fits, until none fits or the deadline passes. Returns (score,
+        cost, choices), where choices are indexes into the options for each person and category
+        in turn.
+        """
+        hulls = [upper_hull(options) for options in self.options]
+        # People are interchangeable, so each category only tracks how many people are at each
+        # step of its hull. Everyone who could take the same upgrade gains the same per cent,
+        # so it is made for all of them at once rather than one person per pass.
+        counts = [Counter({0: people}) for _ in self.options]
+        cost = self.cheapest_meal * people
+        while time.perf_counter() <= deadline:
+            best = None  # (score per cent, extra cost, category, hull step)
+            for c, (options, hull) in enumerate(zip(self.options, hulls)):
+                for step in counts[c]:
+                    if step + 1 < len(hull):
+                        current, upgrade = options[hull[step]], options[hull[step + 1]]
+                        extra = upgrade[0] - current[0]
+                        if cost + extra <= budget:
+                            gain = (upgrade[1] - current[1]) / extra
+                            if best is None or gain > best[0]:
+                                best = (gain, extra, c, step)
+            if best is None:
+                break
+            gain, extra, c, step = best
+            moved = min(counts[c][step], (budget - cost) // extra)
+            counts[c][step] -= moved
+            if not counts[c][step]:
+                del counts[c][step]
+            counts[c][step + 1] += moved
+            cost += extra * moved
+
+        # Deal the items out best first, so the first person has the best of each category
+        dealt = [sorted((hulls[c][step] for step in counts[c].elements()), reverse=True)
+                 for c in range(len(self.options))]
+        choices = [dealt[c][person] for person in range(people) for c in range(len(self.options))]
+        score = sum(self.options[c][k][1] for c in range(len(self.options)) for k in dealt[c])
+        return score, cost, choices
+
+    def search_plan(self, budget, people, deadline=float("inf")):
+        """
+        Branch and bound over every person's choice in every category, starting from the greedy
+        plan. Items are tried best first, and a branch is dropped when even the best affordable
+        items for everything still to choose could not beat the best plan found so far. At the
+        deadline the best plan so far is returned.
+
+        The search keeps its own stack rather than recursing, because it is people x categories
+        choices deep and a large group would pass Python's recursion limit.
+        """
+        width = len(self.options)
+        depth = people * width  # Choice g is person g // width's item in category g % width
+        prices = [[option[0] for option in options] for options in self.options]
+        scores = [[option[1] for option in options] for options in self.options]
+        cheapest = [options[0][0] for options in self.options]
+        rest = [0] * (depth + 1)  # rest[g]: the cheapest items for choices g onwards
+        for g in range(depth - 1, -1, -1):
+            rest[g] = rest[g + 1] + cheapest[g % width]
+        best = list(self.greedy_plan(budget, people, deadline))  # score, cost, choices
+        if time.perf_counter() > deadline:
+            self.exhaustive = False
+            return self.named_plan(best, width)
+
+        def bound(g, remaining):
+            """
+            The most choices g onwards could add with `remaining` cents left. Each is given the
+            best item it could afford if every other choice took the cheapest, which is the same
+            for every person's choice in a category, so it is worked out once per category.
+            """
+            total = 0
+            for c in range(width):
+                first = g + (c - g) % width  # The first choice from g on in category c
+                if first < depth:
+                    k = bisect_right(prices[c], remaining - (rest[g] - cheapest[c])) - 1
+                    total += (depth - first + width - 1) // width * scores[c][k]
+            return total
+
+        def first_choice(g, remaining, score, chosen):
+            """The best item to try first at choice g, or -1 if the branch cannot beat the best plan."""
+            if score + bound(g, remaining) <= best[0]:
+                return -1
+            top = bisect_right(prices[g % width], remaining - rest[g + 1]) - 1
+            # People are interchangeable, so each person's first-category item is no better than
+            # the previous person's; this skips plans that are just the same meals reordered
+            if g >= width and g % width == 0:
+                top = min(top, chosen[g - width])
+            return top
+
+        chosen = [0] * depth
+        remaining_at = [0] * (depth + 1)  # Cents left before choice g is made
+        score_at = [0] * (depth + 1)  # Score of the choices before g
+        next_choice = [0] * depth  # The next item to try at choice g, -1 once all are tried
+        remaining_at[0] = budget
+        next_choice[0] = first_choice(0, budget, 0, chosen)
+        nodes = 0
+        g = 0
+        self.exhaustive = True
+        while g >= 0:
+            k = next_choice[g]
+            if k < 0:
+                g -= 1  # Every item at this choice has been tried, so go back one
+                continue
+            next_choice[g] = k - 1
+            chosen[g] = k
+            c = g % width
+            remaining, score = remaining_at[g] - prices[c][k], score_at[g] + scores[c][k]
+            if g + 1 == depth:
+                if score > best[0]:
+                    best[0], best[1], best[2] = score, budget - remaining, chosen[:]
+                continue
+            nodes += 1
+            if nodes % 1000 == 0 and time.perf_counter() > deadline:
+                self.exhaustive = False
+                break
+            g += 1
+            remaining_at[g], score_at[g] = remaining, score
+            next_choice[g] = first_choice(g, remaining, score, chosen)
+        return self.named_plan(best, width)
+
+    def named_plan(self, plan, width):
+        """Turns (score, cost, option indexes) into (score, cost, one tuple of item names per person)."""
+        score, cost, choices = plan
+        names = [self.options[g % width][k][2] for g, k in enumerate(choices)]
+        return score, cost, [tuple(names[i:i + width]) for i in range(0, len(names), width)]
+
+
+def suggest_plan(budget, people=1, menu=menu, categories=None, score=rating):
+    """Returns (score, total, meals) for the best plan within the budget, or None if none fits."""
+    return MealOptimizer(menu, categories, score).best_plan(budget, people)
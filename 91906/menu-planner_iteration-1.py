@@ -1,24 +1,25 @@
 # W. Fifita Menu Planner - Iteration 1
 
+from planner_engine import MenuPlan
+from money import parse_cents, format_cents
+import argparse
+import os
+import sys
+
+from catalog_loader import CatalogLoader
+from combo_solver import CombinationSolver
+from receipt_renderer import ReceiptRenderer
+
 def menu_planner():
-    # Enhanced menu with prices and descriptions
-    menu = {
-        "food": {
-            "Burger": {"price": 5, "description": "Juicy beef burger with cheese"},
-            "Pizza": {"price": 8, "description": "Wood-fired margherita pizza"},
-            "Salad": {"price": 6, "description": "Fresh garden salad with vinaigrette"}
-        },
-        "drink": {
-            "Water": {"price": 1, "description": "Refreshing spring water"},
-            "Soda": {"price": 2, "description": "Chilled fizzy soda"},
-            "Juice": {"price": 3, "description": "Freshly squeezed orange juice"}
-        },
-        "dessert": {
-            "Ice Cream": {"price": 4, "description": "Creamy vanilla ice cream"},
-            "Cake": {"price": 5, "description": "Rich chocolate cake"},
-            "Pie": {"price": 3, "description": "Homemade apple pie"}
-        }
-    }
+    # Menu with prices (in cents) and descriptions, loaded from the catalog file (menu.json)
+    menu = CatalogLoader().menu()
+    try:
+        solver = CombinationSolver(menu)
+    except ValueError as error:
+        # A bad catalog item or a category with no items means there is nothing to plan
+        print(f"The menu cannot be used: {error}")
+        return
+    renderer = ReceiptRenderer(menu)
     
     # Function to display the menu
     def display_menu():
@@ -26,7 +27,7 @@ def menu_planner():
         for category, items in menu.items():
             print(f"\n{category.capitalize()}:")
             for item, details in items.items():
-                print(f"  {item}: ${details['price']} - {details['description']}")
+                print(f"  {item}: ${format_cents(details['price'])} - {details['description']}")
 
     # Function to get user input with validation
     def get_user_input(prompt, valid_options):
@@ -41,41 +42,51 @@ def menu_planner():
     def get_valid_budget():
         while True:
             try:
-                budget = float(input("Enter your budget: $"))
+                budget = parse_cents(input("Enter your budget: $"))
                 if budget > 0:
                     return budget
                 else:
                     print("Budget must be greater than zero. Please try again.")
             except ValueError:
-                print("Invalid input. Please enter a numeric value.")
+                print("Invalid input. Please enter a dollar amount such as 12.50.")
 
     # Function to get user selection and validate budget
     def get_selection_and_validate_budget():
         budget = get_valid_budget()
+
+        # Make sure at least one meal fits before asking for choices
+        while solver.cheapest_total() > budget:
+            print(f"The cheapest meal costs ${format_cents(solver.cheapest_total())}. Please enter a larger budget.")
+            budget = get_valid_budget()
+
         while True:
             display_menu()
-            food_choice = get_user_input("\nSelect a food item: ", menu["food"].keys())
-            drink_choice = get_user_input("Select a drink item: ", menu["drink"].keys())
-            dessert_choice = get_user_input("Select a dessert item: ", menu["dessert"].keys())
+            plan = MenuPlan(menu, budget)
+            plan.set_food_choice(get_user_input("\nSelect a food item: ", menu["food"].keys()))
+            plan.set_drink_choice(get_user_input("Select a drink item: ", menu["drink"].keys()))
+            plan.set_dessert_choice(get_user_input("Select a dessert item: ", menu["dessert"].keys()))
             
-            total_cost = menu["food"][food_choice]["price"] + menu["drink"][drink_choice]["price"] + menu["dessert"][dessert_choice]["price"]
-            if total_cost <= budget:
-                return budget, food_choice, drink_choice, dessert_choice, total_cost
+            # The plan keeps its total up to date as each choice is made
+            if not plan.is_over_budget():
+                return plan
             else:
-                print("\nYour selections exceed your budget. Please try again.\n")
+                print("\nYour selections exceed your budget. Please try again.")
+                
+                # Suggest the cheapest meals that do fit
+                print("Some meals that fit your budget:")
+                for total, items in solver.combinations(budget, limit=3):
+                    print(f"  {', '.join(items)} - ${format_cents(total)}")
+                print()
 
     # Main program flow
     while True:
-        budget, food_choice, drink_choice, dessert_choice, total_cost = get_selection_and_validate_budget()
+        plan = get_selection_and_validate_budget()
         
-        # Print receipt
+        # Print receipt, the same text the GUI's receipt page shows
         print("\nReceipt:")
-        print(f"  Food: {food_choice} - ${menu['food'][food_choice]['price']} ({menu['food'][food_choice]['description']})")
-        print(f"  Drink: {drink_choice} - ${menu['drink'][drink_choice]['price']} ({menu['drink'][drink_choice]['description']})")
-        print(f"  Dessert: {dessert_choice} - ${menu['dessert'][dessert_choice]['price']} ({menu['dessert'][dessert_choice]['description']})")
-        print(f"\nTotal Cost: ${total_cost}")
-        remaining_budget = budget - total_cost
-        print(f"Remaining Budget: ${remaining_budget}")
+        print(renderer.render_plan(plan))
+        remaining_budget = plan.budget - plan.total
+        print(f"Remaining Budget: ${format_cents(remaining_budget)}")
 
         # Ask if the user wants to restart or exit
         restart = get_user_input("\nWould you like to plan another menu? (yes/no): ", ["Yes", "No"])
@@ -83,5 +94,51 @@ def menu_planner():
             print("Thank you for using the menu planner. Goodbye!")
             break
 
+# Function to price a file of orders without asking any questions
+def batch_planner(input_path, output_path, workers=1):
+    # Only batch runs need the batch module (and multiprocessing), so it is imported here
+    from batch_planner import run_batch, run_batch_parallel, open_input, open_output
+
+    input_file = open_input(input_path, binary=workers != 1)
+    output_file = open_output(output_path)
+    try:
+        if workers == 1:
+            orders, errors = run_batch(input_file, output_file, CatalogLoader().menu())
+        else:
+            # Share the work across a pool of processes
+            orders, errors = run_batch_parallel(input_file, output_file, CatalogLoader().menu(), workers)
+    finally:
+        if input_file not in (sys.stdin, sys.stdin.buffer):
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+    print(f"Processed {orders} orders with {errors} errors.", file=sys.stderr)
+
+# Argument type for --workers, so a bad count is an error message rather than a traceback.
+# 0 or "auto" means one worker per CPU core.
+def worker_count(text):
+    if text.strip().lower() in ("0", "auto"):
+        return os.cpu_count() or 1
+    try:
+        number = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a whole number or 'auto': {text!r}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, or 0 for one per CPU core, not {number}")
+    return number
+
 # Run the menu planner
-menu_planner()
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="W. Fifita Menu Planner")
+    parser.add_argument("--batch", metavar="FILE", 
+                        help="price orders from FILE (or - for stdin) instead of asking interactively")
+    parser.add_argument("--output", metavar="FILE", default="-", 
+                        help="where to write the JSON Lines receipts in batch mode (default: stdout)")
+    parser.add_argument("--workers", type=worker_count, default=1, 
+                        help="number of processes to use in batch mode, or 0 or auto for one per CPU core (default: 1)")
+    args = parser.parse_args()
+
+    if args.batch:
+        batch_planner(args.batch, args.output, args.workers)
+    else:
+        menu_planner()
\ No newline at end of file
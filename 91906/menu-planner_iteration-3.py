@@ -1,8 +1,38 @@
 # W. Fifita Menu Planner - Iteration 3
 
-import tkinter as tk
-from tkinter import messagebox
-import json
+import getpass
+from collections import Counter
+
+from planner_engine import MenuPlan
+from money import parse_cents, format_cents
+from background_io import BackgroundWorker, Autosaver, read_json
+from catalog_loader import CatalogLoader, CatalogError
+from combo_solver import CombinationSolver
+from meal_optimizer import MAX_PEOPLE, MealOptimizer
+from price_table import PriceTable
+from receipt_renderer import ReceiptRenderer
+from receipt_store import open_receipt_store
+from search_index import SearchIndex
+from instrumentation import timed, attach as attach_instrumentation
+
+# Group order lines listed on the receipt page before the rest are summarised
+RECEIPT_BASKET_LINES = 8
+
+# Tkinter and the widgets built on it are imported by load_gui when the window is opened, so
+# the planning code in this file can be imported without paying for the GUI
+tk = None
+messagebox = None
+VirtualListView = None
+
+
+def load_gui():
+    """Imports Tkinter and the custom widgets the first time the GUI is started."""
+    global tk, messagebox, VirtualListView
+    if tk is None:
+        import tkinter
+        from tkinter import messagebox as tk_messagebox
+        from virtual_list import VirtualListView as virtual_list_view
+        tk, messagebox, VirtualListView = tkinter, tk_messagebox, virtual_list_view
 
 # Docstring for the MenuPlanner class
 """
@@ -13,60 +43,76 @@ The program ensures that selections fit within the specified budget. The updated
 includes enhanced error handling, the ability to save/load previous plans, and improved UI feedback.
 """
 
-# Menu with prices and descriptions
-menu = {
-    "food": {
-        "Burger": {"price": 5, "description": "Juicy beef burger with cheese"},
-        "Pizza": {"price": 8, "description": "Wood-fired margherita pizza"},
-        "Salad": {"price": 6, "description": "Fresh garden salad with vinaigrette"}
-    },
-    "drink": {
-        "Water": {"price": 1, "description": "Refreshing spring water"},
-        "Soda": {"price": 2, "description": "Chilled fizzy soda"},
-        "Juice": {"price": 3, "description": "Freshly squeezed orange juice"}
-    },
-    "dessert": {
-        "Ice Cream": {"price": 4, "description": "Creamy vanilla ice cream"},
-        "Cake": {"price": 5, "description": "Rich chocolate cake"},
-        "Pie": {"price": 3, "description": "Homemade apple pie"}
-    }
-}
-
 class MenuPlanner:
     def __init__(self, root):
         """
-        Initialises the MenuPlanner application and sets up frames for each stage of the UI.
+        Initialises the MenuPlanner application. Only the welcome page is built straight away,
+        the other pages are built the first time they are shown.
         """
+        load_gui()
         self.root = root
         self.root.title("Menu Planner")
-        self.root.geometry("700x300")  # Adjust window size for more space
+        self.root.geometry("700x450")  # Adjust window size for more space, including the search box
         
-        # Variables to hold budget and user choices
-        self.budget = 0.0
-        self.food_choice = None
-        self.drink_choice = None
-        self.dessert_choice = None
-
-        # Set frames for different stages of the application
-        self.welcome_frame = tk.Frame(root, bg="peachpuff", width=500, height=400)
-        self.menu_frame = tk.Frame(root, bg="peachpuff", width=500, height=400)
-        self.selection_frame = tk.Frame(root, bg="peachpuff", width=500, height=400)
-        self.receipt_frame = tk.Frame(root, bg="peachpuff", width=500, height=400)
-
-        # Ensure frames maintain size
-        self.welcome_frame.grid_propagate(False)
-        self.menu_frame.grid_propagate(False)
-        self.selection_frame.grid_propagate(False)
-        self.receipt_frame.grid_propagate(False)
+        # The menu is loaded from the catalog file (menu.json) and reloaded when the file changes
+        self.catalog = CatalogLoader()
+        self.menu = self.catalog.menu()
+        # The newest menu snapshot, which every new plan starts on. self.menu, which the pages
+        # show, is older only while the user keeps their plan at the prices it was made with.
+        self.latest_menu = self.menu
+
+        # The plan holds the budget, user choices and running total
+        self.plan = MenuPlan(self.menu)
+
+        # Compiled meal totals (or the solver, until they are ready) used to check budgets and
+        # suggest meals that fit, made when a budget is first checked
+        self.price_table = None
+
+        # Finds the best rated plan for a group within the budget, built on the first suggestion
+        self.optimizer = None
+
+        # Builds the receipt page's text from cached lines, made when a receipt is first shown
+        self.renderer = None
+
+        # Word index over item names and descriptions for the search box, built with the menu page
+        self.search_index = None
+
+        # Items of each category in display order, built on a category's first visit
+        self.category_items = {}
+
+        # History of every saved receipt, a JSON log unless MENU_PLANNER_STORAGE=sqlite.
+        # It is opened and used only by the background worker so the UI never waits on disk.
+        self.receipts = None
+        self.worker = BackgroundWorker(root)
+
+        # Saves the plan in progress shortly after it changes, one write per burst of changes.
+        # Each user gets their own autosave file so users sharing an install keep separate plans.
+        self.autosaver = Autosaver(root, self.worker, f"autosave-{getpass.getuser()}.json")
+
+        # Status bar for messages about saving and loading
+        self.status_label = tk.Label(root, text="", font=("Arial", 11), bg="peachpuff", fg="black", anchor="w")
+        self.status_label.pack(side=tk.BOTTOM, fill=tk.X)
+
+        # Each page's frame is created and its widgets built the first time it is shown;
+        # after that, switching pages only shows and updates them
+        self.page_builders = {"welcome": self.build_welcome_page, "menu": self.build_menu_page,
+                              "selection": self.build_selection_page, "receipt": self.build_receipt_page}
+        self.frames = {}  # page name -> frame, for the pages built so far
 
         # Call the welcome page to start the app
         self.create_welcome_page()
 
-    def create_welcome_page(self):
-        """Creates the welcome page with an option to proceed or exit the app."""
-        self.clear_frames()  # Clear all frames before displaying the new one
-        self.welcome_frame.pack(fill=tk.BOTH, expand=True)
-        
+        # Bring back a plan that was in progress when the app last closed
+        self.autosaver.load(self.restore_autosave)
+
+        # Time callbacks and add the F12 report hotkey when MENU_PLANNER_PROFILE is set
+        attach_instrumentation(root)
+
+        # Closing the window writes the plan in progress before the app exits
+        root.protocol("WM_DELETE_WINDOW", self.close)
+
+    def build_welcome_page(self):
+        """Builds the widgets for the welcome page."""
         # Welcome message
         welcome_label = tk.Label(self.welcome_frame, text="Welcome to the Menu Planner!", 
                                  font=("Arial", 18, "bold"), bg="peachpuff", fg="black")
@@ -76,6 +122,11 @@ class MenuPlanner:
         proceed_button = tk.Button(self.welcome_frame, text="Proceed", command=self.create_menu_page, 
                                    bg="white", fg="black", font=("Arial", 12))
         proceed_button.pack(pady=10)
+
+        # New plan button, which starts again from an empty plan on the newest menu
+        new_button = tk.Button(self.welcome_frame, text="New Plan", command=self.new_plan, 
+                               bg="white", fg="black", font=("Arial", 12))
+        new_button.pack(pady=10)
         
         # Load previous menu plan button
         load_button = tk.Button(self.welcome_frame, text="Load Previous Menu", 
@@ -83,15 +134,163 @@ class MenuPlanner:
         load_button.pack(pady=10)
         
         # Exit button
-        exit_button = tk.Button(self.welcome_frame, text="Exit", command=self.root.quit, 
+        exit_button = tk.Button(self.welcome_frame, text="Exit", command=self.close, 
                                 bg="white", fg="black", font=("Arial", 12))
         exit_button.pack(pady=10)
 
-    def create_menu_page(self):
-        """Creates the menu page where the user can input their budget and select items."""
-        self.clear_frames()  # Clear the frame for the menu
-        self.menu_frame.pack(fill=tk.BOTH, expand=True)
+    def close(self):
+        """Flushes the autosave, waits for the background writes to finish and closes the window."""
+        self.autosaver.flush()
+        self.worker.close()
+        self.root.destroy()
 
+    def show_page(self, name):
+        """Hides the current page and shows another, building it the first time it is shown."""
+        self.clear_frames()
+        frame = self.frames.get(name)
+        if frame is None:
+            frame = tk.Frame(self.root, bg="peachpuff", width=500, height=400)
+            frame.grid_propagate(False)  # Ensure frames maintain size
+            setattr(self, f"{name}_frame", frame)
+            self.page_builders[name]()
+            self.frames[name] = frame
+        frame.pack(fill=tk.BOTH, expand=True)
+
+    def meal_prices(self):
+        """
+        Returns what answers budget questions for the current menu. The first call makes a
+        CombinationSolver, which is quick to build, and starts compiling the menu's meal totals
+        in the background; once they are ready they answer instead. Menus with too many meals
+        to precompute keep the solver. Raises ValueError if a category has no items.
+        """
+        if self.price_table is None:
+            menu = self.menu
+            self.price_table = CombinationSolver(menu)
+
+            def compiled(table):
+                if self.menu is menu:
+                    self.price_table = table
+
+            self.worker.submit(lambda: PriceTable(menu), compiled, lambda error: None)
+        return self.price_table
+
+    def receipt_renderer(self):
+        """Returns the receipt renderer for the current menu, making it the first time it is needed."""
+        if self.renderer is None:
+            self.renderer = ReceiptRenderer(self.menu, RECEIPT_BASKET_LINES)
+        return self.renderer
+
+    def refresh_menu(self):
+        """Checks the catalog file for changes in the background, so prices update without a restart."""
+        def load_if_changed():
+            if not self.catalog.has_changed():
+                return None
+            menu = self.catalog.menu()
+            for category in menu:
+                menu[category]  # Parse every category here rather than on the main thread
+            return menu
+
+        def failed(error):
+            if not isinstance(error, CatalogError):
+                raise error
+            # Keep using the menu already loaded until the file is fixed
+            messagebox.showerror("Menu Problem", f"The changed menu file cannot be used. {error}")
+
+        self.worker.submit(load_if_changed, on_done=self.apply_menu, on_error=failed)
+
+    @timed()
+    def apply_menu(self, menu):
+        """
+        Switches the app and the plan over to a newly loaded menu. If that would change the price
+        of anything in the plan, the user is asked first; if they say no, the plan and the pages
+        stay on the menu the plan was priced against, and the next new plan (from the New Plan
+        button, or once a receipt is saved) uses the new menu.
+        """
+        if menu is None:
+            return
+        self.latest_menu = menu
+        changes = self.plan.price_changes(menu)
+        if changes:
+            message = "The menu has changed since you started this plan:\n"
+            for number, (category, item, old_price, new_price) in enumerate(changes):
+                if number == RECEIPT_BASKET_LINES:
+                    message += f"\n...and {len(changes) - number} more"
+                    break
+                if new_price is None:
+                    message += f"\n{item} is no longer on the menu"
+                else:
+                    message += f"\n{item}: ${format_cents(old_price)} -> ${format_cents(new_price)}"
+            if not messagebox.askyesno("Menu Updated", message + "\n\nUpdate your plan to the new menu?"):
+                self.show_status("Your plan keeps the prices it was made with. New plans use the new menu.")
+                return
+        self.use_menu(menu)
+
+        # Move the plan to the new menu; anything dropped from it was listed above
+        self.plan.reprice(self.menu)
+        self.update_choices_display()
+
+    def use_menu(self, menu):
+        """Points the pages, search and price tables at another menu snapshot."""
+        self.menu = menu
+        self.price_table = None  # Recompiled when next needed
+        self.optimizer = None
+        self.renderer = None
+        if self.search_index is not None:
+            self.search_index.sync(self.menu)  # Only re-indexes items that changed
+            self.update_search_results()
+        self.category_items.clear()
+
+    def start_plan(self, data, pinned=None):
+        """
+        Replaces the plan with one rebuilt from saved data, on the pinned menu snapshot if it is
+        given and otherwise on the newest menu, and points the pages at that menu.
+        """
+        menu = pinned if pinned is not None else self.latest_menu
+        self.plan = MenuPlan.from_dict(data, menu)
+        if self.menu is not menu:
+            self.use_menu(menu)
+
+    def new_plan(self):
+        """Discards the plan in progress and shows the menu page with an empty plan on the newest menu."""
+        self.autosaver.clear()
+        self.reset_plan()
+        self.create_menu_page()
+
+    def reset_plan(self):
+        """
+        Replaces the plan with an empty one on the newest menu. This is how a plan the user kept
+        on an older menu snapshot (see apply_menu) gives way to the new menu.
+        """
+        self.plan = MenuPlan(self.latest_menu)
+        if self.menu is not self.latest_menu:
+            self.use_menu(self.latest_menu)
+        self.update_choices_display()
+
+    def show_status(self, message):
+        """Shows a message in the status bar without interrupting the user."""
+        self.status_label.config(text=message)
+
+    def plan_changed(self):
+        """Schedules an autosave of the plan in progress."""
+        self.autosaver.schedule(self.plan.to_dict())
+
+    def restore_autosave(self, state):
+        """Restores an autosaved plan, if there is one and nothing has been chosen yet."""
+        if not state or self.plan.budget or self.plan.choices or self.plan.basket:
+            return
+        try:
+            self.start_plan(state)
+        except (KeyError, ValueError, TypeError):
+            return  # The autosave refers to items no longer on the menu
+        self.update_choices_display()
+        self.show_status("Your unsaved plan has been restored.")
+
+    def create_welcome_page(self):
+        """Shows the welcome page with an option to proceed or exit the app."""
+        self.show_page("welcome")  # Clears the other pages before displaying this one
+
+    def build_menu_page(self):
+        """Builds the widgets for the menu page."""
         # Label and entry for budget input
         budget_label = tk.Label(self.menu_frame, text="Enter your budget: $", font=("Arial", 14, "bold"), 
                                 bg="peachpuff", fg="black")
@@ -108,8 +307,10 @@ class MenuPlanner:
                                       bg="white", fg="black", font=("Arial", 12))
         set_budget_button.grid(row=0, column=2, pady=10, padx=5)
 
-        # Update the display to show user choices dynamically
-        self.update_choices_display()
+        # Label showing the budget and user choices, its text is updated in place
+        self.choices_label = tk.Label(self.menu_frame, font=("Arial", 14), 
+                                      bg="peachpuff", fg="black", justify="left")
+        self.choices_label.grid(row=1, column=0, columnspan=3, pady=10)
 
         # Buttons to select food, drink, and dessert
         food_button = tk.Button(self.menu_frame, text="Choose Food", command=self.create_food_page, 
@@ -124,146 +325,311 @@ class MenuPlanner:
                                    bg="white", fg="black", font=("Arial", 12))
         dessert_button.grid(row=2, column=2, pady=10, padx=5)
 
+        # Search box that finds items by name or description as the user types
+        search_label = tk.Label(self.menu_frame, text="Search the menu:", font=("Arial", 14, "bold"), 
+                                bg="peachpuff", fg="black")
+        search_label.grid(row=3, column=0, pady=10, padx=5)
+        self.search_index = SearchIndex.from_menu(self.menu)
+        self.search_text = tk.StringVar(self.menu_frame)
+        self.search_text.trace_add("write", lambda *args: self.update_search_results())
+        search_entry = tk.Entry(self.menu_frame, textvariable=self.search_text, font=("Arial", 14))
+        search_entry.grid(row=3, column=1, pady=10, padx=5)
+
+        # Matching items, clicking one chooses it
+        self.search_results = VirtualListView(self.menu_frame, visible_rows=2, bg="peachpuff", 
+                                              format_row=self.format_search_result, command=self.choose_search_result)
+        self.search_results.grid(row=4, column=0, columnspan=3, sticky="ew", padx=100)
+
+        # Buttons to see the whole order so far, or empty the group order
+        view_button = tk.Button(self.menu_frame, text="View Order", command=self.create_receipt_page, 
+                                bg="white", fg="black", font=("Arial", 12))
+        view_button.grid(row=5, column=0, pady=10, padx=5)
+
+        clear_button = tk.Button(self.menu_frame, text="Clear Group Order", command=self.clear_group_order, 
+                                 bg="white", fg="black", font=("Arial", 12))
+        clear_button.grid(row=5, column=2, pady=10, padx=5)
+
+        # Number of people and a button to suggest the best rated plan for them within the budget
+        people_label = tk.Label(self.menu_frame, text="People:", font=("Arial", 14, "bold"), 
+                                bg="peachpuff", fg="black")
+        people_label.grid(row=6, column=0, pady=10, padx=5)
+        self.people_box = tk.Spinbox(self.menu_frame, from_=1, to=MAX_PEOPLE, width=4, font=("Arial", 12))
+        self.people_box.grid(row=6, column=1, pady=10, padx=5)
+
+        suggest_button = tk.Button(self.menu_frame, text="Suggest a Plan", command=self.suggest_plan, 
+                                   bg="white", fg="black", font=("Arial", 12))
+        suggest_button.grid(row=6, column=2, pady=10, padx=5)
+
+    def create_menu_page(self):
+        """Shows the menu page where the user can input their budget and select items."""
+        try:
+            for category in self.menu:
+                self.menu[category]  # The catalog file is checked when it is first used
+        except CatalogError as error:
+            messagebox.showerror("Menu Problem", f"The menu file cannot be used. {error}")
+            return
+        self.show_page("menu")
+        self.refresh_menu()  # Show current prices if the catalog file has changed
+
+        # Update the display to show user choices dynamically
+        self.update_choices_display()
+
     def set_budget(self):
-        """Sets the budget based on user input and validates it."""
+        """Sets the budget based on user input, then counts the meals that fit it in the background."""
         try:
-            # Try to convert the budget entry to a float
-            self.budget = float(self.budget_entry.get())
-            
-            # Validate that the budget is a positive number
-            if self.budget <= 0:
-                raise ValueError("Budget must be greater than zero.")
-
-            # Inform the user that the budget has been set successfully
-            messagebox.showinfo("Budget Set", f"Your budget has been set to ${self.budget:.2f}")
-            self.update_choices_display()  # Update display with the new budget
-            
+            # Convert the budget entry to whole cents, the plan checks that it is positive
+            budget = parse_cents(self.budget_entry.get())
+            self.plan.set_budget(budget)
         except ValueError as e:
             # Show error message if budget is invalid
-            messagebox.showerror("Invalid Budget", "Please enter a valid positive number for the budget.")
+            messagebox.showerror("Invalid Budget", "Please enter a positive dollar amount for the budget, such as 12.50.")
             self.budget_entry.delete(0, tk.END)  # Clear the entry field
+            return
+        self.update_choices_display()  # Update display with the new budget
+        self.plan_changed()
 
+        try:
+            prices = self.meal_prices()
+        except ValueError as error:
+            messagebox.showerror("Menu Problem", f"No meals can be made from this menu. {error}")
+            return
+
+        def counted(meal_count):
+            self.show_status("")
+            # Warn the user if no meal fits the budget
+            if meal_count == 0:
+                messagebox.showwarning("Budget Too Small", 
+                                       f"No meal fits this budget. The cheapest meal costs ${format_cents(prices.cheapest_total())}.")
+            else:
+                # Inform the user that the budget has been set successfully
+                messagebox.showinfo("Budget Set", 
+                                    f"Your budget has been set to ${format_cents(budget)}\n{meal_count} meal(s) fit your budget.")
+
+        def failed(error):
+            self.show_status("")
+            messagebox.showerror("Menu Problem", f"The meals that fit your budget could not be counted: {error}")
+
+        # Counting can take a moment on a big catalog, so it is kept off the main thread.
+        # Meals are counted against what is left after any group order items.
+        remaining = budget - self.plan.basket.total
+        self.show_status("Counting the meals that fit your budget...")
+        self.worker.submit(lambda: prices.count_within(remaining), counted, failed)
+
+    @timed()
     def update_choices_display(self):
         """Updates the display to show the current budget and user choices."""
+        if "menu" not in self.frames:
+            return  # The menu page shows the choices when it is first built
         # Display current budget, food, drink, and dessert choices dynamically
-        for widget in self.menu_frame.grid_slaves(row=1):
-            widget.destroy()  # Clear previous labels
-
-        display_text = f"Budget: ${self.budget:.2f}\n"
-        display_text += f"Food: {self.food_choice if self.food_choice else 'None'}\n"
-        display_text += f"Drink: {self.drink_choice if self.drink_choice else 'None'}\n"
-        display_text += f"Dessert: {self.dessert_choice if self.dessert_choice else 'None'}"
-        
-        choices_label = tk.Label(self.menu_frame, text=display_text, font=("Arial", 14), 
-                                 bg="peachpuff", fg="black", justify="left")
-        choices_label.grid(row=1, column=0, columnspan=3, pady=10)
+        display_text = f"Budget: ${format_cents(self.plan.budget)}\n"
+        display_text += f"Food: {self.plan.food_choice if self.plan.food_choice else 'None'}\n"
+        display_text += f"Drink: {self.plan.drink_choice if self.plan.drink_choice else 'None'}\n"
+        display_text += f"Dessert: {self.plan.dessert_choice if self.plan.dessert_choice else 'None'}"
+        if self.plan.basket:
+            display_text += (f"\nGroup order: {self.plan.basket.item_count()} item(s), "
+                             f"${format_cents(self.plan.basket.total)}")
+        self.choices_label.config(text=display_text)
+
+    @timed()
+    def update_search_results(self):
+        """Shows the items matching the search box."""
+        self.search_results.set_items(self.search_index.search(self.search_text.get(), limit=50))
+
+    def format_search_result(self, result):
+        """Text for one search result row."""
+        category, item = result
+        return f"{item} (${format_cents(self.menu[category][item]['price'])}) - {category.title()}"
+
+    def choose_search_result(self, result):
+        """Chooses the item picked from the search results."""
+        category, item = result
+        self.plan.set_choice(category, item)
+        self.check_if_all_selected()
 
     def create_food_page(self):
         """Creates the page for selecting food items."""
-        self.clear_frames()
-        self.selection_frame.pack(fill=tk.BOTH, expand=True)
         self.create_selection_page("food", self.set_food_choice)
 
     def create_drink_page(self):
         """Creates the page for selecting drink items."""
-        self.clear_frames()  # Clear the frame to prevent showing the previous page
-        self.selection_frame.pack(fill=tk.BOTH, expand=True)
         self.create_selection_page("drink", self.set_drink_choice)
 
     def create_dessert_page(self):
         """Creates the page for selecting dessert items."""
-        self.clear_frames()  # Clear the frame to prevent showing the previous page
-        self.selection_frame.pack(fill=tk.BOTH, expand=True)
         self.create_selection_page("dessert", self.set_dessert_choice)
 
+    def build_selection_page(self):
+        """Builds the widgets shared by the food, drink and dessert selection pages."""
+        # Heading label for the selection page, its text changes with the category
+        self.selection_heading = tk.Label(self.selection_frame, font=("Arial", 18, "bold"), 
+                                          bg="peachpuff", fg="black")
+        self.selection_heading.pack(pady=10)
+
+        # Scrollable list that only creates buttons for the visible rows, reused for every category
+        self.item_list = VirtualListView(self.selection_frame, visible_rows=3, bg="peachpuff",
+                                         format_row=lambda entry: f"{entry[0]} (${format_cents(entry[1]['price'])})\n{entry[1]['description']}")
+        self.item_list.pack(fill=tk.X, padx=100)
+
+        # When ticked, clicking an item adds the quantity to the group order instead of choosing it
+        order_frame = tk.Frame(self.selection_frame, bg="peachpuff")
+        order_frame.pack(pady=5)
+        self.group_order = tk.BooleanVar(order_frame, value=False)
+        group_check = tk.Checkbutton(order_frame, text="Add to group order, quantity:", variable=self.group_order, 
+                                     bg="peachpuff", fg="black", font=("Arial", 12))
+        group_check.pack(side=tk.LEFT)
+        self.quantity_box = tk.Spinbox(order_frame, from_=1, to=999, width=4, font=("Arial", 12))
+        self.quantity_box.pack(side=tk.LEFT, padx=5)
+
+        # Button to go back to the menu page
+        back_button = tk.Button(self.selection_frame, text="Back to Menu", command=self.create_menu_page, 
+                                bg="white", fg="black", font=("Arial", 12))
+        back_button.pack(pady=10)
+
+    @timed()
     def create_selection_page(self, category, select_function):
         """
-        Creates a selection page where users can choose from food, drink, or dessert options.
+        Shows a selection page where users can choose from food, drink, or dessert options.
         Parameters:
         category (str): The category of items to display (e.g., "food", "drink", "dessert").
         select_function (function): The function to call when an item is selected.
         """
-        # Clear the selection_frame completely
-        for widget in self.selection_frame.winfo_children():
-            widget.destroy()
+        self.show_page("selection")  # Clears the previous page
+        self.selection_heading.config(text=f"Select a {category.title()}")
+        self.refresh_menu()
+
+        # Show this category's items in the list, which only renders the rows that fit
+        if category not in self.category_items:
+            self.category_items[category] = list(self.menu[category].items())
+        self.item_list.set_items(self.category_items[category],
+                                 command=lambda entry: self.choose_item(category, entry[0], select_function))
+        self.item_list.focus_set()  # So the arrow keys and Return work straight away
+
+    def choose_item(self, category, item, select_function):
+        """Adds a clicked item to the group order when that box is ticked, otherwise chooses it."""
+        if not self.group_order.get():
+            select_function(item)
+            return
+        try:
+            quantity = int(self.quantity_box.get())
+            self.plan.add_item(category, item, quantity)
+        except ValueError:
+            messagebox.showerror("Invalid Quantity", "Please enter a whole number of items to add.")
+            return
+        self.plan_changed()
+        self.update_choices_display()
+        self.show_status(f"Added {quantity} x {item} to the group order, "
+                         f"${format_cents(self.plan.basket.total)} so far.")
 
-        # Pack the cleared selection_frame
-        self.selection_frame.pack(fill=tk.BOTH, expand=True)
+    def clear_group_order(self):
+        """Empties the group order basket."""
+        self.plan.clear_basket()
+        self.plan_changed()
+        self.update_choices_display()
+        self.show_status("The group order has been cleared.")
 
-        # Heading label for the selection page
-        heading_label = tk.Label(self.selection_frame, text=f"Select a {category.title()}",
-                                font=("Arial", 18, "bold"), bg="peachpuff", fg="black")
-        heading_label.pack(pady=10)
+    def suggest_plan(self):
+        """
+        Suggests the best rated meal for each person that fits the budget together. If the user
+        accepts, the first meal becomes their choices and the others make up the group order.
+        """
+        if not self.plan.budget:
+            messagebox.showerror("No Budget", "Please set a budget before asking for a suggestion.")
+            return
+        try:
+            people = int(self.people_box.get())
+            if not 1 <= people <= MAX_PEOPLE:
+                raise ValueError(people)
+        except ValueError:
+            messagebox.showerror("Invalid Number of People", 
+                                 f"Please enter how many people the plan is for, from 1 to {MAX_PEOPLE}.")
+            return
 
-        # Display all options for the selected category
-        for item, details in menu[category].items():
-            item_button = tk.Button(self.selection_frame, text=f"{item} (${details['price']})\n{details['description']}",
-                                    font=("Arial", 12), bg="white", fg="black", 
-                                    command=lambda i=item: select_function(i))
-            item_button.pack(pady=5)
+        # Finding the plan takes up to the optimizer's time limit, plus building the optimizer on
+        # a big catalog, so it runs on the worker thread. The optimizer is only used there.
+        plan, menu, budget = self.plan, self.menu, self.plan.budget
+        optimizer = self.optimizer
+
+        def find_plan():
+            nonlocal optimizer
+            if optimizer is None:
+                optimizer = MealOptimizer(menu)
+            return optimizer.best_plan(budget, people)
+
+        def failed(error):
+            self.show_status("")
+            messagebox.showerror("Suggestion Failed", f"A plan could not be suggested: {error}")
+
+        def found(suggestion):
+            self.show_status("")
+            if self.menu is menu:
+                self.optimizer = optimizer
+            if self.plan is not plan or plan.budget != budget or self.menu is not menu:
+                self.show_status("Your plan changed while a suggestion was being found. Please ask again.")
+                return
+            self.apply_suggestion(people, optimizer.categories, suggestion)
+
+        self.show_status(f"Finding the best rated plan for {people} people...")
+        self.worker.submit(find_plan, found, failed)
+
+    def apply_suggestion(self, people, categories, suggestion):
+        """Shows a suggested plan and, if the user accepts it, makes it the plan."""
+        if suggestion is None:
+            messagebox.showwarning("No Plan Fits", 
+                                   f"No plan for {people} people fits your budget of ${format_cents(self.plan.budget)}.")
+            return
+        score, total, meals = suggestion
+
+        # Identical meals are listed once with how many people have them
+        message = f"The best rated plan for {people} people within your budget:\n"
+        for meal, count in Counter(meals).items():
+            message += f"\n{count} x {', '.join(meal)}"
+        message += f"\n\nTotal: ${format_cents(total)}\n\nReplace your choices and group order with this plan?"
+        if not messagebox.askyesno("Suggested Plan", message):
+            return
 
-        # Button to go back to the menu page
-        back_button = tk.Button(self.selection_frame, text="Back to Menu", command=self.create_menu_page, 
-                                bg="white", fg="black", font=("Arial", 12))
-        back_button.pack(pady=10)
+        self.plan.clear_basket()
+        for category, item in zip(categories, meals[0]):
+            self.plan.set_choice(category, item)
+        for meal in meals[1:]:
+            for category, item in zip(categories, meal):
+                self.plan.add_item(category, item)
+        self.plan_changed()
+        self.update_choices_display()
+        self.show_status(f"Suggested plan for {people} people applied, ${format_cents(total)} in total.")
 
     def set_food_choice(self, choice):
         """Sets the user's food choice."""
-        self.food_choice = choice
+        self.plan.set_food_choice(choice)
         self.check_if_all_selected()
 
     def set_drink_choice(self, choice):
         """Sets the user's drink choice."""
-        self.drink_choice = choice
+        self.plan.set_drink_choice(choice)
         self.check_if_all_selected()
 
     def set_dessert_choice(self, choice):
         """Sets the user's dessert choice."""
-        self.dessert_choice = choice
+        self.plan.set_dessert_choice(choice)
         self.check_if_all_selected()
 
     def check_if_all_selected(self):
         """Checks if the user has selected food, drink, and dessert, and if so, moves to the receipt page."""
-        if self.food_choice and self.drink_choice and self.dessert_choice:
+        self.plan_changed()
+        if self.plan.is_complete():
             self.create_receipt_page()
         else:
             self.create_menu_page()
 
-    def create_receipt_page(self):
-        """Creates the receipt page and calculates the total cost of the selected items."""
-        self.clear_frames()
-        self.receipt_frame.pack(fill=tk.BOTH, expand=True)
-
-        total_cost = 0.0
-
-        # Calculate the total cost based on user choices
-        if self.food_choice:
-            total_cost += menu["food"][self.food_choice]["price"]
-        if self.drink_choice:
-            total_cost += menu["drink"][self.drink_choice]["price"]
-        if self.dessert_choice:
-            total_cost += menu["dessert"][self.dessert_choice]["price"]
-
-        # Check if the total cost exceeds the budget
-        if total_cost > self.budget:
-            messagebox.showerror("Over Budget", "Your selections exceed the budget. Please adjust your choices.")
-            self.create_menu_page()  # Go back to the menu page to adjust choices
-            return
-
-        # Create a summary of the selections and cost
-        receipt_text = f"Food: {self.food_choice} (${menu['food'][self.food_choice]['price']})\n"
-        receipt_text += f"Drink: {self.drink_choice} (${menu['drink'][self.drink_choice]['price']})\n"
-        receipt_text += f"Dessert: {self.dessert_choice} (${menu['dessert'][self.dessert_choice]['price']})\n"
-        receipt_text += f"\nTotal: ${total_cost:.2f}"
-
+    def build_receipt_page(self):
+        """Builds the widgets for the receipt page."""
         # Title for Receipt Page
         receipt_title = tk.Label(self.receipt_frame, text="Receipt", font=("Arial", 18, "bold"), bg="peachpuff", fg="black")
         receipt_title.pack(pady=10)
 
-        # Display the receipt
-        receipt_label = tk.Label(self.receipt_frame, text=receipt_text, font=("Arial", 14), 
-                                 bg="peachpuff", fg="black", justify="left")
-        receipt_label.pack(pady=10)
+        # Label that displays the receipt, its text is filled in when the page is shown
+        self.receipt_label = tk.Label(self.receipt_frame, font=("Arial", 14), 
+                                      bg="peachpuff", fg="black", justify="left")
+        self.receipt_label.pack(pady=10)
 
         # Button to save receipt to JSON
         save_button = tk.Button(self.receipt_frame, text="Save Receipt", command=self.save_receipt, 
@@ -275,52 +641,111 @@ class MenuPlanner:
                                 bg="white", fg="black", font=("Arial", 12))
         back_button.pack(pady=10)
 
+    @timed()
+    def create_receipt_page(self):
+        """Shows the receipt page with the total cost of the selected items."""
+        self.show_page("receipt")
+
+        # Check if the total cost exceeds the budget
+        if self.plan.is_over_budget():
+            # Suggest the cheapest meals that do fit the budget
+            message = "Your selections exceed the budget. Please adjust your choices."
+            suggestions = self.meal_prices().combinations_within(self.plan.budget - self.plan.basket.total, limit=3)
+            if suggestions:
+                message += "\n\nSome meals that fit your budget:"
+                for total, items in suggestions:
+                    message += f"\n{', '.join(items)} (${format_cents(total)})"
+            messagebox.showerror("Over Budget", message)
+            self.create_menu_page()  # Go back to the menu page to adjust choices
+            return
+
+        # Display the selections, the first few group order items and the total cost
+        self.receipt_label.config(text=self.receipt_renderer().render_plan(self.plan))
+
+    def receipt_store(self):
+        """Opens the receipt history on first use. Only called from the background worker."""
+        if self.receipts is None:
+            self.receipts = open_receipt_store(categories=list(self.latest_menu))
+        return self.receipts
+
     def save_receipt(self):
-        """Saves the current receipt as a JSON file."""
+        """Appends the current receipt to the receipt history in the background."""
+        # Only a whole meal makes a receipt; a plan still missing a choice can only be viewed
+        if not self.plan.is_complete():
+            missing = [category for category in self.menu if category not in self.plan.choices]
+            missing = " and ".join([", ".join(missing[:-1]), missing[-1]] if len(missing) > 1 else missing)
+            messagebox.showwarning("Plan Incomplete", f"Please choose your {missing} before saving the receipt.")
+            return
+
         # Collect data to save
-        receipt_data = {
-            "food": self.food_choice,
-            "drink": self.drink_choice,
-            "dessert": self.dessert_choice,
-            "budget": self.budget
-        }
-        
-        # Save the receipt data to a JSON file
-        with open("receipt.json", "w") as file:
-            json.dump(receipt_data, file, indent=4)
-        
-        messagebox.showinfo("Receipt Saved", "Your receipt has been saved as receipt.json.")
+        plan = self.plan
+        receipt_data = plan.to_dict()
+        self.show_status("Saving receipt...")
+
+        def saved(number):
+            self.autosaver.clear()  # The plan is safely saved, so the autosave is no longer needed
+            # The next plan starts empty on the newest menu, unless this one changed while saving
+            if self.plan is plan and plan.to_dict() == receipt_data:
+                self.reset_plan()
+            self.show_status(f"Your receipt has been saved as receipt #{number + 1}.")
+
+        def failed(error):
+            self.show_status("")
+            messagebox.showerror("Save Failed", f"Your receipt could not be saved: {error}")
+
+        # Append the receipt data to the history log
+        self.worker.submit(lambda: self.receipt_store().append(receipt_data), saved, failed)
 
     def load_previous_menu(self):
-        """Loads a previous menu plan from a JSON file."""
-        try:
-            # Attempt to load data from the JSON file
-            with open("receipt.json", "r") as file:
-                receipt_data = json.load(file)
-
-            # Set the loaded data to the corresponding fields
-            self.budget = receipt_data["budget"]
-            self.food_choice = receipt_data["food"]
-            self.drink_choice = receipt_data["drink"]
-            self.dessert_choice = receipt_data["dessert"]
-            
-            messagebox.showinfo("Menu Loaded", "Previous menu plan loaded successfully.")
+        """Loads the most recently saved menu plan from the receipt history in the background."""
+        def load_latest():
+            # Attempt to load the latest receipt from the history log
+            receipt_data = self.receipt_store().latest()
+
+            # Fall back to a receipt.json saved by an older version of the planner
+            if receipt_data is None:
+                receipt_data = read_json("receipt.json")
+            return receipt_data
+
+        def loaded(receipt_data):
+            if receipt_data is None:
+                # Handle the case where nothing has been saved
+                messagebox.showerror("File Not Found", "No saved menu found. Please save a receipt first.")
+                return
+            # Rebuild the plan at the prices it was saved with if that menu snapshot is still in
+            # use, otherwise at today's prices
+            pinned = self.catalog.snapshot(receipt_data.get("catalog_version"))
+            try:
+                self.start_plan(receipt_data, pinned)
+            except (KeyError, ValueError, TypeError):
+                messagebox.showerror("Error", "The saved menu file is corrupted or invalid.")
+                return
+            self.show_status("Previous menu plan loaded successfully.")
+            if pinned is not None and pinned is not self.latest_menu:
+                self.apply_menu(self.latest_menu)  # Asks before moving the plan to today's prices
+            elif pinned is None and receipt_data.get("total_cents", self.plan.total) != self.plan.total:
+                messagebox.showinfo("Prices Changed", 
+                                    f"Prices have changed since this plan was saved. It came to "
+                                    f"${format_cents(receipt_data['total_cents'])} then and comes to "
+                                    f"${format_cents(self.plan.total)} now.")
             self.create_menu_page()  # Go to the menu page with loaded data
-            
-        except FileNotFoundError:
-            # Handle the case where the file does not exist
-            messagebox.showerror("File Not Found", "No saved menu found. Please save a receipt first.")
-        except json.JSONDecodeError:
-            # Handle the case of invalid JSON
+
+        def failed(error):
+            # Handle the case of invalid JSON or an unreadable file
+            self.show_status("")
             messagebox.showerror("Error", "The saved menu file is corrupted or invalid.")
 
+        self.show_status("Loading previous menu...")
+        self.worker.submit(load_latest, loaded, failed)
+
     def clear_frames(self):
         """Clears all frames to display a new page."""
-        for frame in [self.welcome_frame, self.menu_frame, self.selection_frame, self.receipt_frame]:
+        for frame in self.frames.values():
             frame.pack_forget()
 
 # Main loop for the application
 if __name__ == "__main__":
+    load_gui()
     root = tk.Tk()
     app = MenuPlanner(root)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,64 @@
+# W. Fifita Menu Planner - Money
+
+"""
+Money is stored as a whole number of cents everywhere in the planner: menu prices, budgets,
+plan totals, receipts and saved files. Adding and comparing integers is exact, so a plan that
+costs exactly the budget is never rejected by a rounding error, and it is faster than floats
+when pricing in bulk. These helpers convert to and from the dollar amounts people type and read.
+"""
+
+
+def parse_cents(text):
+    """
+    Parses a dollar amount typed by a person, such as "12", "12.5", "$12.50" or "1,200",
+    into cents. Raises ValueError for anything else, including fractions of a cent.
+    """
+    if text.isdigit():
+        return int(text) * 100  # Whole dollars, by far the most common case
+    text = text.strip().lstrip("$").replace(",", "")
+    negative = text.startswith("-")
+    if negative:
+        text = text[1:]
+    dollars, point, cents = text.partition(".")
+    if not (dollars or cents) or (dollars and not dollars.isdigit()) or (cents and not cents.isdigit()):
+        raise ValueError(f"Not a dollar amount: {text!r}")
+    if len(cents) > 2:
+        raise ValueError(f"Amounts can only have two decimal places: {text!r}")
+    value = int(dollars or "0") * 100 + int(cents.ljust(2, "0"))
+    return -value if negative else value
+
+
+def to_cents(amount):
+    """
+    Converts a dollar amount from a file, a request or an older receipt (an int, float or string)
+    to cents, rounding to the nearest cent. Floats go through their shortest decimal form, so 8.95
+    becomes 895 rather than 894. Raises ValueError for anything that is not an amount.
+    """
+    if isinstance(amount, bool):
+        raise ValueError(f"Not a dollar amount: {amount!r}")
+    if isinstance(amount, int):
+        return amount * 100
+    if isinstance(amount, str):
+        return parse_cents(amount)
+    from decimal import Decimal, InvalidOperation  # Only floats need it, and it is slow to import
+    try:
+        return int((Decimal(repr(amount)) * 100).to_integral_value())
+    except (InvalidOperation, OverflowError, ValueError):
+        raise ValueError(f"Not a dollar amount: {amount!r}")
+
+
+def receipt_cents(receipt, field):
+    """
+    Reads a money field ("budget" or "total") from a saved receipt in cents, or None if it has
+    none. Receipts saved before money was kept in cents have the amount in dollars instead.
+    """
+    if field + "_cents" in receipt:
+        return receipt[field + "_cents"]
+    return to_cents(receipt[field]) if receipt.get(field) is not None else None
+
+
+def format_cents(cents):
+    """Formats cents as dollars with two decimal places, e.g. 1250 -> "12.50"."""
+    sign = "-" if cents < 0 else ""
+    dollars, cents = divmod(abs(cents), 100)
+    return f"{sign}{dollars}.{cents:02d}"
@@ -0,0 +1,286 @@
+# W. Fifita Menu Planner - Planning Engine
+
+"""
+The planning engine holds the menu and the plan state without any Tkinter code, so the
+GUI, the console planner and batch jobs can all share it. A MenuPlan keeps its running
+total and remaining budget up to date as each choice is made, so nothing has to be
+recomputed from the menu when the receipt is shown. A Basket holds any number of items with
+quantities, for group orders, and keeps its total up to date in the same way. A plan stays
+pinned to the version of the menu it was priced against until reprice() moves it to another.
+
+All money (prices, budgets and totals) is a whole number of cents, see money.py.
+"""
+
+from collections import Counter
+
+from money import to_cents
+
+# Menu with prices (in cents), descriptions and customer ratings out of 5
+menu = {
+    "food": {
+        "Burger": {"price": 500, "description": "Juicy beef burger with cheese", "rating": 4.5},
+        "Pizza": {"price": 800, "description": "Wood-fired margherita pizza", "rating": 4.8},
+        "Salad": {"price": 600, "description": "Fresh garden salad with vinaigrette", "rating": 3.9}
+    },
+    "drink": {
+        "Water": {"price": 100, "description": "Refreshing spring water", "rating": 3.0},
+        "Soda": {"price": 200, "description": "Chilled fizzy soda", "rating": 3.6},
+        "Juice": {"price": 300, "description": "Freshly squeezed orange juice", "rating": 4.2}
+    },
+    "dessert": {
+        "Ice Cream": {"price": 400, "description": "Creamy vanilla ice cream", "rating": 4.4},
+        "Cake": {"price": 500, "description": "Rich chocolate cake", "rating": 4.7},
+        "Pie": {"price": 300, "description": "Homemade apple pie", "rating": 4.1}
+    }
+}
+
+
+class Basket:
+    """
+    Any number of menu items from any categories, each with a quantity. Quantities are kept in
+    a Counter keyed by (category, item) and the total is adjusted on every add or remove, so a
+    change to a large group order costs the same as a change to a small one.
+    """
+
+    __slots__ = ("menu", "quantities", "total")
+
+    def __init__(self, menu=menu):
+        self.menu = menu
+        self.quantities = Counter()  # (category, item) -> quantity
+        self.total = 0
+
+    def __len__(self):
+        """The number of different items in the basket."""
+        return len(self.quantities)
+
+    def item_count(self):
+        """The number of items in the basket, counting quantities."""
+        return sum(self.quantities.values())
+
+    def quantity(self, category, item):
+        return self.quantities.get((category, item), 0)
+
+    def add(self, category, item, quantity=1):
+        """
+        Adds `quantity` of an item and returns the cost added. Raises KeyError if the item is not
+        on the menu, or ValueError if the quantity is not a positive whole number.
+        """
+        if not isinstance(quantity, int) or quantity <= 0:
+            raise ValueError("Quantity must be a positive whole number.")
+        cost = self.menu[category][item]["price"] * quantity
+        self.quantities[(category, item)] += quantity
+        self.total += cost
+        return cost
+
+    def remove(self, category, item, quantity=None):
+        """Removes `quantity` of an item (all of it by default) and returns the cost removed."""
+        held = self.quantities.get((category, item), 0)
+        if quantity is None or quantity >= held:
+            quantity = held
+            self.quantities.pop((category, item), None)
+        else:
+            self.quantities[(category, item)] = held - quantity
+        cost = self.menu[category][item]["price"] * quantity if quantity else 0
+        self.total -= cost
+        return cost
+
+    def lines(self):
+        """Yields (category, item, quantity, price, line total) in the order items were added."""
+        for (category, item), quantity in self.quantities.items():
+            price = self.menu[category][item]["price"]
+            yield category, item, quantity, price, price * quantity
+
+    def reprice(self, menu):
+        """
+        Switches the basket to a new version of the menu, dropping items no longer on it.
+        Returns the dropped (category, item) pairs.
+        """
+        self.menu = menu
+        dropped = [key for key in self.quantities if key[0] not in menu or key[1] not in menu[key[0]]]
+        for key in dropped:
+            del self.quantities[key]
+        self.total = sum(menu[category][item]["price"] * quantity
+                         for (category, item), quantity in self.quantities.items())
+        return dropped
+
+    def clear(self):
+        self.quantities.clear()
+        self.total = 0
+
+    def to_list(self):
+        """Returns the basket as a compact list of [category, item, quantity] for saving."""
+        return [[category, item, quantity] for (category, item), quantity in self.quantities.items()]
+
+    def price_list(self):
+        """Returns the unit price in cents of each line of to_list(), in the same order."""
+        return [self.menu[category][item]["price"] for category, item in self.quantities]
+
+
+class MenuPlan:
+    """
+    A single user's meal plan: a budget plus at most one chosen item per category, and a basket
+    of extra items with quantities for group orders. The total and remaining budget are updated
+    on every change instead of being summed later.
+    """
+
+    __slots__ = ("menu", "budget", "choices", "prices", "basket", "total")
+
+    def __init__(self, menu=menu, budget=0):
+        self.menu = menu
+        self.budget = budget  # cents
+        self.choices = {}  # category -> chosen item name
+        self.prices = {}  # category -> price of the chosen item
+        self.basket = Basket(menu)  # Extra items for a group order
+        self.total = 0  # Chosen items plus the basket
+
+    @property
+    def remaining(self):
+        """The budget left over after the current choices."""
+        return self.budget - self.total
+
+    @property
+    def food_choice(self):
+        return self.choices.get("food")
+
+    @property
+    def drink_choice(self):
+        return self.choices.get("drink")
+
+    @property
+    def dessert_choice(self):
+        return self.choices.get("dessert")
+
+    def set_budget(self, budget):
+        """Sets the budget in cents, raising ValueError if it is not a positive whole number."""
+        if not isinstance(budget, int):
+            raise ValueError("Budget must be a whole number of cents.")
+        if budget <= 0:
+            raise ValueError("Budget must be greater than zero.")
+        self.budget = budget
+
+    def set_choice(self, category, item):
+        """
+        Sets the chosen item for a category and adjusts the running total.
+        Raises KeyError if the category or item is not on the menu.
+        """
+        price = self.menu[category][item]["price"]
+        self.total += price - self.prices.get(category, 0)
+        self.choices[category] = item
+        self.prices[category] = price
+
+    def clear_choice(self, category):
+        """Removes the choice for a category, if there is one."""
+        if category in self.choices:
+            self.total -= self.prices.pop(category, 0)
+            del self.choices[category]
+
+    def reprice(self, menu):
+        """
+        Switches the plan to a new version of the menu, re-pricing the current choices and basket.
+        Returns what was dropped because it is no longer on the menu: the categories of dropped
+        choices and the names of dropped basket items.
+        """
+        self.menu = menu
+        dropped = []
+        for category, item in list(self.choices.items()):
+            if category in menu and item in menu[category]:
+                self.set_choice(category, item)
+            else:
+                self.clear_choice(category)
+                dropped.append(category)
+        self.total -= self.basket.total
+        for category, item in self.basket.reprice(menu):
+            dropped.append(item)
+        self.total += self.basket.total
+        return dropped
+
+    def price_changes(self, menu):
+        """
+        Compares the plan's items with their prices in another version of the menu. Returns
+        (category, item, old price, new price) for each chosen or basket item whose price is
+        different, with None as the new price if the item is no longer on the menu.
+        """
+        if menu is self.menu:
+            return []
+        changes = []
+        for category, item in dict.fromkeys(list(self.choices.items()) + list(self.basket.quantities)):
+            old_price = self.menu[category][item]["price"]
+            new_price = menu[category][item]["price"] if category in menu and item in menu[category] else None
+            if new_price != old_price:
+                changes.append((category, item, old_price, new_price))
+        return changes
+
+    def add_item(self, category, item, quantity=1):
+        """Adds `quantity` of an item to the group order basket."""
+        self.total += self.basket.add(category, item, quantity)
+
+    def remove_item(self, category, item, quantity=None):
+        """Removes `quantity` of an item (all of it by default) from the basket."""
+        self.total -= self.basket.remove(category, item, quantity)
+
+    def clear_basket(self):
+        self.total -= self.basket.total
+        self.basket.clear()
+
+    def set_food_choice(self, choice):
+        self.set_choice("food", choice)
+
+    def set_drink_choice(self, choice):
+        self.set_choice("drink", choice)
+
+    def set_dessert_choice(self, choice):
+        self.set_choice("dessert", choice)
+
+    def price_of(self, category):
+        """Returns the price in cents of the chosen item in a category, or 0 if nothing is chosen."""
+        return self.prices.get(category, 0)
+
+    def is_complete(self):
+        """Checks whether an item has been chosen for every category on the menu."""
+        return len(self.choices) == len(self.menu)
+
+    def is_over_budget(self):
+        """Checks whether the current choices cost more than the budget."""
+        return self.total > self.budget
+
+    def reset(self):
+        """Clears the budget, all choices and the basket."""
+        self.budget = 0
+        self.choices.clear()
+        self.prices.clear()
+        self.basket.clear()
+        self.total = 0
+
+    def to_dict(self):
+        """
+        Returns the plan in the same shape that is saved to receipt.json: the choice (or None) for
+        every category on the menu, the price paid for each chosen item ("prices") and basket
+        line ("basket_prices") and the version of the menu snapshot it was priced against.
+        """
+        data = {category: self.choices.get(category) for category in self.menu}
+        data.update({
+            "basket": self.basket.to_list(),
+            "prices": dict(self.prices),
+            "basket_prices": self.basket.price_list(),
+            "budget_cents": self.budget,
+            "total_cents": self.total
+        })
+        version = getattr(self.menu, "version", None)
+        if version is not None:
+            data["catalog_version"] = version  # The menu snapshot the plan was priced against
+        return data
+
+    @classmethod
+    def from_dict(cls, data, menu=menu):
+        """
+        Rebuilds a plan from a saved receipt, skipping categories with no choice. Receipts saved
+        before money was kept in cents have a "budget" in dollars instead of "budget_cents".
+        """
+        budget = data["budget_cents"] if "budget_cents" in data else to_cents(data["budget"])
+        plan = cls(menu, budget)
+        for category in menu:
+            if data.get(category):
+                plan.set_choice(category, data[category])
+        for category, item, quantity in data.get("basket", ()):
+            plan.add_item(category, item, quantity)
+        return plan
@@ -0,0 +1,463 @@
+# W. Fifita Menu Planner - Planning Service
+
+"""
+A small local HTTP/JSON service so other terminals can price and check plans against the same
+menu without running the Tkinter app. It is built on asyncio streams with a minimal HTTP/1.1
+parser, keeps connections alive and answers pipelined requests in order.
+
+Endpoints:
+  GET  /categories              list the menu categories
+  GET  /menu/<category>         items, prices and descriptions in a category
+  POST /price                   {"food": ..., "drink": ..., "dessert": ...} -> prices and total
+                                (any plan may also have "basket": [[category, item, quantity], ...])
+  POST /check-budget            the same plus a budget -> whether it fits and what is left
+  POST /combinations            {"budget": ..., "limit": 10} -> affordable meals, cheapest first
+                                (at most MAX_LIMIT of them)
+  POST /suggest                 {"budget": ..., "people": 4} -> the best rated meal for each
+                                person that fits the budget together (up to MAX_PEOPLE people)
+  POST /prices                  {"food": {"Pizza": 900}, ...} changes prices (in cents) -> the new
+                                catalog version; plans already priced keep their old prices
+  POST /receipts                save a receipt -> {"number": n}
+  GET  /receipts/latest         the most recently saved receipt
+  GET  /receipts/<n>            the receipt with number n
+  GET  /analytics               popular items and combos, average spend and budget headroom,
+                                overall and over the last hour and day
+
+Sessions keep a separate plan per user on the server:
+  POST /sessions                        start a session -> {"session": id}
+  GET  /sessions/<id>                   the session's budget, choices and total
+  POST /sessions/<id>/budget            {"budget": ...}
+  POST /sessions/<id>/choices           {"food": ..., ...} sets one or more choices
+  POST /sessions/<id>/reprice           move the plan to the current menu -> the state and the
+                                        price "changes" this made
+  POST /sessions/<id>/receipts          save the session's plan as a receipt
+  GET  /sessions/<id>/receipts/latest   the session's most recently saved receipt
+
+Priced responses include the "catalog_version" of the menu snapshot they were priced against.
+A session's plan keeps the prices it was made with when the menu changes: its state says
+"menu_updated" once a newer menu exists, and "prices_changed" if the server could no longer
+keep its old snapshot and had to re-price it.
+Money in responses is whole cents ("price", "total_cents", ...). Budgets may be sent either as
+"budget_cents" or as a dollar "budget" such as 12.5 or "12.50".
+
+Run with:  python planner_service.py --port 8080
+"""
+
+import argparse
+import asyncio
+import json
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from planner_engine import MenuPlan
+from money import to_cents
+from catalog_loader import CatalogLoader
+from combo_solver import CombinationSolver
+from meal_optimizer import MAX_PEOPLE, MealOptimizer
+from price_table import PriceTable
+from receipt_store import open_receipt_store
+from sales_analytics import SalesAnalytics
+from session_manager import SessionManager
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error"}
+
+# Requests with bigger bodies than this are refused
+MAX_BODY = 1 << 20
+
+# Most meals /combinations lists at once. They are built on the event loop, so one request
+# asking for millions would hold up every other connection.
+MAX_LIMIT = 1000
+
+
+class RequestError(Exception):
+    """Raised by a handler to send an error response with the given status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class PlannerService:
+    """The planner operations behind the HTTP routes, shared by every connection."""
+
+    def __init__(self, catalog=None, receipts=None, sessions=None):
+        self.catalog = catalog if catalog is not None else CatalogLoader()
+        self.menu = None
+        self.price_table = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="planner-service")
+        self.optimizer = None
+        self.current_menu()
+        self.analytics = SalesAnalytics(list(self.menu))  # Reads new receipts each time it is queried
+        self.receipts = receipts if receipts is not None else open_receipt_store(categories=list(self.menu))
+        self.sessions = sessions if sessions is not None else SessionManager(self.menu, receipts=self.receipts,
+                                                                             snapshot=self.catalog.snapshot)
+
+    def current_menu(self):
+        """
+        Returns the menu. When the catalog has changed, the solver answers budget questions
+        straight away while the compiled price table is built on the executor's thread.
+        """
+        menu = self.catalog.menu()
+        if menu is not self.menu:
+            self.menu = menu
+            self.optimizer = None  # Built by the first /suggest request for this menu
+            if getattr(self, "sessions", None) is not None:
+                self.sessions.menu = menu  # New sessions start on it, open ones keep their prices
+            try:
+                self.price_table = CombinationSolver(menu)
+            except ValueError:
+                self.price_table = None  # A category has no items, so no meal can be made
+            else:
+                self.executor.submit(self.compile_price_table, menu)
+        return menu
+
+    def compile_price_table(self, menu):
+        """Runs on the executor: compiles a menu's price table and uses it if that menu is still current."""
+        try:
+            table = PriceTable(menu)
+        except ValueError:
+            return  # Too many meals to precompute, so the solver keeps answering
+        if self.menu is menu:
+            self.price_table = table
+
+    def budget_from(self, body):
+        """Reads the budget in cents from a request body, or None if it has no budget."""
+        try:
+            if "budget_cents" in body:
+                budget = body["budget_cents"]
+                if not isinstance(budget, int) or isinstance(budget, bool):
+                    raise ValueError(budget)
+                return budget
+            if "budget" in body:
+                return to_cents(body["budget"])
+        except ValueError:
+            raise RequestError(400, "Budget must be a dollar amount, or a whole number of cents.")
+        return None
+
+    def plan_from(self, body):
+        """Builds a MenuPlan from the choices (and budget, if given) in a request body."""
+        menu = self.current_menu()
+        plan = MenuPlan(menu)
+        budget = self.budget_from(body)
+        if budget is not None:
+            try:
+                plan.set_budget(budget)
+            except ValueError:
+                raise RequestError(400, "Budget must be greater than zero.")
+        for category in menu:
+            choice = body.get(category)
+            if choice is None:
+                continue
+            try:
+                plan.set_choice(category, choice)
+            except (KeyError, TypeError):
+                raise RequestError(400, f"Invalid {category} choice: {choice}")
+        for line in body.get("basket") or ():
+            try:
+                category, item, quantity = line
+                plan.add_item(category, item, quantity)
+            except (KeyError, TypeError, ValueError):
+                raise RequestError(400, f"Invalid basket line: {line}")
+        return plan
+
+    def categories(self, body):
+        return {"categories": list(self.current_menu())}
+
+    def category_items(self, category):
+        menu = self.current_menu()
+        if category not in menu:
+            raise RequestError(404, f"No such category: {category}")
+        return {"category": category, "items": dict(menu[category])}
+
+    def price(self, body):
+        plan = self.plan_from(body)
+        return {"choices": dict(plan.choices), "prices": dict(plan.prices),
+                "basket_cents": plan.basket.total, "total_cents": plan.total,
+                "catalog_version": getattr(plan.menu, "version", None)}
+
+    def check_budget(self, body):
+        if "budget" not in body and "budget_cents" not in body:
+            raise RequestError(400, "A budget is required.")
+        plan = self.plan_from(body)
+        return {"choices": dict(plan.choices), "total_cents": plan.total, "budget_cents": plan.budget,
+                "within_budget": not plan.is_over_budget(), "remaining_cents": plan.remaining,
+                "complete": plan.is_complete(), "catalog_version": getattr(plan.menu, "version", None)}
+
+    def combinations(self, body):
+        budget = self.budget_from(body)
+        if budget is None:
+            raise RequestError(400, "A budget is required.")
+        limit = body.get("limit", 10)
+        if not isinstance(limit, int) or isinstance(limit, bool) or not 0 <= limit <= MAX_LIMIT:
+            raise RequestError(400, f"The limit must be a whole number from 0 to {MAX_LIMIT}.")
+        self.current_menu()
+        if self.price_table is None:
+            raise RequestError(400, "No meals can be made from this menu.")
+        categories = list(self.menu)
+        meals = self.price_table.combinations_within(budget, limit=limit)
+        return {"count": self.price_table.count_within(budget),
+                "meals": [dict(zip(categories, items), total_cents=total) for total, items in meals]}
+
+    def suggest(self, body):
+        budget = self.budget_from(body)
+        if budget is None:
+            raise RequestError(400, "A budget is required.")
+        people = body.get("people", 1)
+        if not isinstance(people, int) or isinstance(people, bool) or not 1 <= people <= MAX_PEOPLE:
+            raise RequestError(400, f"People must be a whole number from 1 to {MAX_PEOPLE}.")
+        menu = self.current_menu()
+        if self.optimizer is None:
+            self.optimizer = MealOptimizer(menu)
+        plan = self.optimizer.best_plan(budget, people)
+        if plan is None:
+            raise RequestError(400, "No plan fits the budget.")
+        score, total, meals = plan
+        categories = self.optimizer.categories
+        return {"meals": [dict(zip(categories, meal)) for meal in meals], "score": round(score, 2),
+                "total_cents": total, "remaining_cents": budget - total,
+                "optimal": self.optimizer.exhaustive}
+
+    def update_prices(self, body):
+        try:
+            snapshot = self.catalog.update_prices(body)
+        except KeyError as error:
+            raise RequestError(400, f"Not on the menu: {error.args[0]}")
+        except ValueError as error:
+            raise RequestError(400, str(error))
+        except (AttributeError, TypeError):
+            raise RequestError(400, "Prices must be given as {category: {item: cents}}.")
+        self.current_menu()
+        return {"catalog_version": snapshot.version}
+
+    def save_receipt(self, body):
+        plan = self.plan_from(body)
+        return {"number": self.receipts.append(plan.to_dict())}
+
+    def get_receipt(self, number):
+        try:
+            receipt = self.receipts.latest() if number == "latest" else self.receipts.get(int(number))
+        except (IndexError, ValueError):
+            receipt = None
+        if receipt is None:
+            raise RequestError(404, "No saved receipt with that number.")
+        return receipt
+
+    def sales(self, body):
+        """
+        Catching up on a long receipt history takes seconds, so it runs on the executor and the
+        event loop keeps answering other requests. Returns a Future of the summary.
+        """
+        def read_sales():
+            self.analytics.catch_up(self.receipts)
+            return self.analytics.summary()
+
+        return self.executor.submit(read_sales)
+
+    def session(self, session_id):
+        """Returns a session's plan, or raises a 404 if the session does not exist."""
+        self.current_menu()
+        try:
+            return self.sessions.get(session_id)
+        except KeyError:
+            raise RequestError(404, f"No such session: {session_id}")
+
+    def session_state(self, session_id):
+        session = self.session(session_id)
+        plan = session.plan
+        return {"session": session_id, "budget_cents": plan.budget, "choices": dict(plan.choices),
+                "total_cents": plan.total, "remaining_cents": plan.remaining,
+                "within_budget": not plan.is_over_budget(), "catalog_version": getattr(plan.menu, "version", None),
+                "menu_updated": plan.menu is not self.menu, "prices_changed": session.prices_changed}
+
+    def reprice_session(self, session_id):
+        self.session(session_id)
+        changes = self.sessions.reprice(session_id)
+        state = self.session_state(session_id)
+        state["changes"] = [{"category": category, "item": item, "old_cents": old_price, "new_cents": new_price}
+                            for category, item, old_price, new_price in changes]
+        return state
+
+    def set_session_budget(self, session_id, body):
+        plan = self.session(session_id).plan
+        budget = self.budget_from(body)
+        if budget is None:
+            raise RequestError(400, "A budget is required.")
+        try:
+            plan.set_budget(budget)
+        except ValueError:
+            raise RequestError(400, "Budget must be greater than zero.")
+        return self.session_state(session_id)
+
+    def set_session_choices(self, session_id, body):
+        plan = self.session(session_id).plan
+        for category, item in body.items():
+            try:
+                plan.set_choice(category, item)
+            except (KeyError, TypeError):
+                raise RequestError(400, f"Invalid {category} choice: {item}")
+        return self.session_state(session_id)
+
+    def session_request(self, method, session_id, action, body):
+        """Routes /sessions/<id>/... requests."""
+        if method == "GET" and action == []:
+            return self.session_state(session_id)
+        if method == "POST" and action == ["budget"]:
+            return self.set_session_budget(session_id, body)
+        if method == "POST" and action == ["choices"]:
+            return self.set_session_choices(session_id, body)
+        if method == "POST" and action == ["reprice"]:
+            return self.reprice_session(session_id)
+        if method == "POST" and action == ["receipts"]:
+            self.session(session_id)
+            return {"number": self.sessions.save_receipt(session_id)}
+        if method == "GET" and action == ["receipts", "latest"]:
+            self.session(session_id)
+            receipt = self.sessions.latest_receipt(session_id)
+            if receipt is None:
+                raise RequestError(404, "This session has not saved a receipt.")
+            return receipt
+        raise RequestError(404, f"No such endpoint: {method} /sessions/{session_id}/{'/'.join(action)}")
+
+    def handle(self, method, path, body):
+        """
+        Routes a request to the right operation and returns the JSON-ready result, or a Future of
+        it for operations that run on the executor.
+        """
+        parts = path.strip("/").split("/")
+        if parts[0] == "sessions" and method in ("GET", "POST"):
+            if len(parts) == 1 and method == "POST":
+                self.current_menu()
+                return {"session": self.sessions.create()}
+            if len(parts) >= 2:
+                return self.session_request(method, parts[1], parts[2:], body)
+        if method == "GET":
+            if parts == ["categories"]:
+                return self.categories(body)
+            if parts == ["analytics"]:
+                return self.sales(body)
+            if len(parts) == 2 and parts[0] == "menu":
+                return self.category_items(parts[1])
+            if len(parts) == 2 and parts[0] == "receipts":
+                return self.get_receipt(parts[1])
+        elif method == "POST":
+            routes = {"price": self.price, "check-budget": self.check_budget,
+                      "combinations": self.combinations, "suggest": self.suggest,
+                      "prices": self.update_prices, "receipts": self.save_receipt}
+            if len(parts) == 1 and parts[0] in routes:
+                return routes[parts[0]](body)
+        else:
+            raise RequestError(405, f"Method {method} is not allowed.")
+        raise RequestError(404, f"No such endpoint: {method} {path}")
+
+
+def response_bytes(status, data, keep_alive):
+    """Encodes a JSON response with the headers needed for keep-alive connections."""
+    body = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'Error')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("ascii") + body
+
+
+async def handle_connection(service, reader, writer):
+    """Serves requests on one connection until the client closes it or asks to close."""
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                break
+
+            lines = head.decode("latin-1").split("\r\n")
+            try:
+                method, path, version = lines[0].split(" ", 2)
+            except ValueError:
+                writer.write(response_bytes(400, {"error": "Malformed request line."}, False))
+                break
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                if name:
+                    headers[name.strip().lower()] = value.strip()
+
+            connection = headers.get("connection", "").lower()
+            keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+            try:
+                length = int(headers.get("content-length", 0) or 0)
+                if length < 0:
+                    raise ValueError(length)
+            except ValueError:
+                writer.write(response_bytes(400, {"error": "Invalid Content-Length."}, False))
+                break
+            if length > MAX_BODY:
+                writer.write(response_bytes(413, {"error": "Request body is too large."}, False))
+                break
+            try:
+                body_bytes = await reader.readexactly(length) if length else b""
+            except asyncio.IncompleteReadError:
+                break  # The client closed the connection part way through the body
+
+            try:
+                body = json.loads(body_bytes) if body_bytes else {}
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                body = None
+            try:
+                if body is None:
+                    raise RequestError(400, "The request body is not valid JSON.")
+                if not isinstance(body, dict):
+                    raise RequestError(400, "The request body must be a JSON object.")
+                status, data = 200, service.handle(method, path.split("?", 1)[0], body)
+                if isinstance(data, Future):
+                    data = await asyncio.wrap_future(data)
+            except RequestError as error:
+                status, data = error.status, {"error": str(error)}
+            except ValueError as error:
+                # A value in the request that a handler could not use. The JSON itself was fine.
+                status, data = 400, {"error": f"Invalid value in the request: {error}"}
+            except Exception as error:
+                status, data = 500, {"error": str(error)}
+
+            # Responses are written in request order, so pipelined requests need no extra work.
+            # Only wait for the socket when the write buffer is full, not after every response.
+            writer.write(response_bytes(status, data, keep_alive))
+            if writer.transport.get_write_buffer_size() > 64 * 1024:
+                await writer.drain()
+            if not keep_alive:
+                break
+        await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host="127.0.0.1", port=8080, service=None):
+    """Starts the service and returns the asyncio server."""
+    if service is None:
+        service = PlannerService()
+    return await asyncio.start_server(lambda reader, writer: handle_connection(service, reader, writer),
+                                      host, port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP service for the menu planner.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: localhost only)")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    async def run():
+        server = await serve(args.host, args.port)
+        print(f"Menu planner service listening on http://{args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# W. Fifita Menu Planner - Price Table
+
+"""
+A compiled price table for answering budget questions in bulk. The menu is turned into one
+price array per category and a sorted array holding the total of every possible meal, so
+"how many meals fit this budget" is a single binary search, and a whole array of budgets can
+be answered in one call. NumPy is used when it is installed; otherwise the same table is
+built from plain lists and the bisect module. NumPy is slow to import, so it is only loaded
+when the first table is built rather than when the planner starts.
+"""
+
+import itertools
+from bisect import bisect_right
+
+from planner_engine import menu
+
+# Set by load_numpy to the numpy module, or left as None if it is not installed
+np = None
+numpy_checked = False
+
+# Refuse to precompute more meal totals than this; use CombinationSolver for bigger menus.
+# A million meals take about 0.13 s and 23 MB to compile; ten million took 2.4 s and 230 MB.
+MAX_COMBINATIONS = 1_000_000
+
+
+def load_numpy():
+    """Imports NumPy the first time a table is built."""
+    global np, numpy_checked
+    if not numpy_checked:
+        numpy_checked = True
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        np = numpy
+
+
+class PriceTable:
+    """
+    Every meal total for a menu, sorted so budgets can be checked with a binary search. Raises
+    ValueError if a category has no items or there are too many meals to precompute.
+    """
+
+    def __init__(self, menu=menu, categories=None):
+        load_numpy()
+        self.categories = list(categories) if categories is not None else list(menu)
+        self.items = [list(menu[category]) for category in self.categories]
+        self.shape = tuple(len(items) for items in self.items)
+
+        size = 1
+        for category, length in zip(self.categories, self.shape):
+            if not length:
+                raise ValueError(f"The {category} category has no items.")
+            size *= length
+        if size > MAX_COMBINATIONS:
+            raise ValueError(f"The menu has {size} meals, which is too many to precompute.")
+
+        if np is not None:
+            self.prices = [np.array([menu[category][item]["price"] for item in items])
+                           for category, items in zip(self.categories, self.items)]
+
+            # Add each category's prices onto every total so far to get all meal totals
+            totals = np.zeros(1, dtype=np.result_type(*self.prices) if self.prices else int)
+            for prices in self.prices:
+                totals = np.add.outer(totals, prices).ravel()
+            self.order = np.argsort(totals, kind="stable")
+            self.sorted_totals = totals[self.order]
+        else:
+            self.prices = [[menu[category][item]["price"] for item in items]
+                           for category, items in zip(self.categories, self.items)]
+            totals = [sum(combination) for combination in itertools.product(*self.prices)]
+            self.order = sorted(range(len(totals)), key=totals.__getitem__)
+            self.sorted_totals = [totals[index] for index in self.order]
+
+    def __len__(self):
+        return len(self.sorted_totals)
+
+    def cheapest_total(self):
+        """Returns the cost of the cheapest meal, or None if the menu has no meals."""
+        if not len(self.sorted_totals):
+            return None
+        return self.sorted_totals[0].item() if np is not None else self.sorted_totals[0]
+
+    def count_within(self, budget):
+        """Returns how many meals cost no more than the budget."""
+        if np is not None:
+            return int(np.searchsorted(self.sorted_totals, budget, side="right"))
+        return bisect_right(self.sorted_totals, budget)
+
+    def count_within_many(self, budgets):
+        """
+        Returns how many meals fit each budget in a list or array of budgets.
+        With NumPy this is one vectorised searchsorted call and returns an array.
+        """
+        if np is not None:
+            return np.searchsorted(self.sorted_totals, np.asarray(budgets), side="right")
+        return [bisect_right(self.sorted_totals, budget) for budget in budgets]
+
+    def fits_many(self, budgets):
+        """Returns whether at least one meal fits each budget."""
+        if np is not None:
+            return self.count_within_many(budgets) > 0
+        return [count > 0 for count in self.count_within_many(budgets)]
+
+    def combinations_within(self, budget, limit=None):
+        """Returns the (total, (food, drink, dessert)) meals within the budget, cheapest first."""
+        count = self.count_within(budget)
+        if limit is not None:
+            count = min(count, limit)
+        found = []
+        for position in range(count):
+            # Turn the flat meal number back into one item index per category
+            index = int(self.order[position])
+            indexes = []
+            for length in reversed(self.shape):
+                index, item_index = divmod(index, length)
+                indexes.append(item_index)
+            indexes.reverse()
+            names = tuple(items[i] for items, i in zip(self.items, indexes))
+
+            total = self.sorted_totals[position]
+            if np is not None:
+                total = total.item()  # Plain Python number rather than a NumPy scalar
+            found.append((total, names))
+        return found
+
+
+def count_within_budgets(budgets, menu=menu):
+    """Bulk API: counts the meals that fit each budget in `budgets`."""
+    return PriceTable(menu).count_within_many(budgets)
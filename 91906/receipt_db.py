@@ -0,0 +1,160 @@
+# W. Fifita Menu Planner - Receipt Database
+
+"""
+An optional SQLite backend for saved receipts. It offers the same append/get/latest methods
+as ReceiptLog, so the planner can use either, and adds indexed reporting queries such as
+"all plans containing Pizza under $15" or "average budget per day". Items, totals and save
+times are indexed, and save_many inserts a whole batch in one transaction. Budgets and totals
+are stored as whole cents.
+
+The chosen items indexed for each receipt are those in the categories of the menu in use,
+which whoever opens the database passes in, so a catalog with its own categories is indexed
+by them.
+"""
+
+import json
+import sqlite3
+import time
+from collections import Counter
+
+from money import receipt_cents
+from planner_engine import menu as default_menu
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS receipts (
+    id INTEGER PRIMARY KEY,
+    saved_at REAL NOT NULL,
+    budget_cents INTEGER,
+    total_cents INTEGER,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS receipt_items (
+    receipt_id INTEGER NOT NULL REFERENCES receipts(id),
+    category TEXT NOT NULL,
+    item TEXT NOT NULL,
+    quantity INTEGER NOT NULL DEFAULT 1
+);
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS receipt_items_item ON receipt_items (item, receipt_id);
+CREATE INDEX IF NOT EXISTS receipts_total ON receipts (total_cents);
+CREATE INDEX IF NOT EXISTS receipts_saved_at ON receipts (saved_at);
+"""
+
+
+class ReceiptDatabase:
+    """
+    Receipts stored in SQLite with indexes on item, total and save time. `categories` are the
+    categories of the menu in use, the receipt keys whose values are chosen items; by default
+    those of the built-in menu.
+    """
+
+    def __init__(self, path="receipts.db", categories=None):
+        self.path = path
+        self.categories = tuple(categories if categories is not None else default_menu)
+        # The GUI opens and uses the database from its background I/O thread
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+        self.connection.executescript(INDEXES)
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self):
+        """Returns how many receipts have been saved."""
+        # Receipts are never deleted, so the largest id is the count
+        count, = self.connection.execute("SELECT MAX(id) FROM receipts").fetchone()
+        return count or 0
+
+    def append(self, receipt):
+        """Saves one receipt and returns its number (0 for the first receipt)."""
+        with self.connection:
+            return self.insert(receipt)
+
+    def save_many(self, receipts):
+        """Saves a batch of receipts in a single transaction and returns how many were saved."""
+        count = 0
+        with self.connection:
+            for receipt in receipts:
+                self.insert(receipt)
+                count += 1
+        return count
+
+    def insert(self, receipt):
+        """Inserts a receipt and its items; the caller is responsible for the transaction."""
+        if "saved_at" not in receipt:
+            receipt = dict(receipt, saved_at=time.time())
+        cursor = self.connection.execute(
+            "INSERT INTO receipts (saved_at, budget_cents, total_cents, data) VALUES (?, ?, ?, ?)",
+            (receipt["saved_at"], receipt_cents(receipt, "budget"), receipt_cents(receipt, "total"),
+             json.dumps(receipt, separators=(",", ":"))))
+        receipt_id = cursor.lastrowid
+        self.index_items(receipt_id, receipt)
+        return receipt_id - 1
+
+    def index_items(self, receipt_id, receipt):
+        """
+        Indexes the items in a receipt with how many of each it holds: the chosen item in each
+        menu category, plus the group order (basket) lines.
+        """
+        quantities = Counter()
+        for category in self.categories:
+            if isinstance(receipt.get(category), str):
+                quantities[(category, receipt[category])] += 1
+        basket = receipt.get("basket")
+        if isinstance(basket, list):
+            for line in basket:
+                if (isinstance(line, list) and len(line) == 3 and line[0] in self.categories
+                        and isinstance(line[1], str) and isinstance(line[2], int)):
+                    quantities[(line[0], line[1])] += line[2]
+        self.connection.executemany(
+            "INSERT INTO receipt_items (receipt_id, category, item, quantity) VALUES (?, ?, ?, ?)",
+            [(receipt_id, category, item, quantity) for (category, item), quantity in quantities.items()])
+
+    def get(self, number):
+        """
+        Returns the receipt with the given number. Negative numbers count back from the latest.
+        Raises IndexError if there is no such receipt.
+        """
+        if number < 0:
+            number += len(self)
+        row = self.connection.execute("SELECT data FROM receipts WHERE id = ?", (number + 1,)).fetchone()
+        if row is None:
+            raise IndexError("No saved receipt with that number.")
+        return json.loads(row[0])
+
+    def latest(self):
+        """Returns the most recently saved receipt, or None if nothing has been saved."""
+        row = self.connection.execute("SELECT data FROM receipts ORDER BY id DESC LIMIT 1").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def __iter__(self):
+        """Streams every receipt in the order they were saved."""
+        for data, in self.connection.execute("SELECT data FROM receipts ORDER BY id"):
+            yield json.loads(data)
+
+    def since(self, number):
+        """Streams the receipts from number `number` on, in the order they were saved."""
+        for data, in self.connection.execute("SELECT data FROM receipts WHERE id > ? ORDER BY id", (number,)):
+            yield json.loads(data)
+
+    def plans_containing(self, item, max_total=None, min_quantity=1):
+        """
+        Returns every saved receipt that includes the item, as a choice or in its group order,
+        optionally under a total in cents or with at least `min_quantity` of the item.
+        """
+        query = ("SELECT receipts.data FROM receipt_items "
+                 "JOIN receipts ON receipts.id = receipt_items.receipt_id "
+                 "WHERE receipt_items.item = ? AND receipt_items.quantity >= ?")
+        parameters = [item, min_quantity]
+        if max_total is not None:
+            query += " AND receipts.total_cents <= ?"
+            parameters.append(max_total)
+        return [json.loads(data) for data, in self.connection.execute(query + " ORDER BY receipts.id", parameters)]
+
+    def average_budget_per_day(self):
+        """Returns a list of (day, average budget in cents) pairs using local dates, oldest day first."""
+        return self.connection.execute(
+            "SELECT date(saved_at, 'unixepoch', 'localtime') AS day, AVG(budget_cents) FROM receipts "
+            "GROUP BY day ORDER BY day").fetchall()
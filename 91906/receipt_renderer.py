@@ -0,0 +1,213 @@
+# W. Fifita Menu Planner - Receipt Renderer
+
+"""
+Turns plans and saved receipts into receipt text, so the GUI's receipt page, the console
+planner and the bulk export all print a receipt the same way.
+
+The line templates are compiled once as %-format strings, and each finished item line is cached
+by (category, item, price) and each group order line by (item, quantity, line total), so a
+receipt is mostly a join of strings that were already built. Keys include the price, so a cached
+line is never stale when the menu changes. Saved receipts are printed with the prices saved on
+them; receipts saved before prices were kept list their items without prices.
+
+export_receipts writes a whole receipt history as text, JSON Lines or CSV in one streaming pass,
+joining each batch of receipts into a single write to a buffered file, so printing every receipt
+at the end of the day takes seconds and memory use stays flat.
+
+Run with:  python receipt_renderer.py --output receipts.txt
+           python receipt_renderer.py receipts.db --format csv --output receipts.csv
+"""
+
+import csv
+import json
+import sys
+
+from money import format_cents, receipt_cents
+
+# Line templates for a receipt, in the order they are printed
+CHOICE_LINE = "%s: %s ($%s)\n"
+UNPRICED_CHOICE_LINE = "%s: %s\n"
+BASKET_HEADING = "\nGroup order (%d items):\n"
+BASKET_LINE = "%d x %s ($%s)\n"
+UNPRICED_BASKET_LINE = "%d x %s\n"
+BASKET_MORE = "...and %d more\n"
+TOTAL_LINE = "\nTotal: $%s"
+
+# Each receipt in a text export is headed with its number and followed by a blank line
+EXPORT_RECEIPT = "Receipt #%d\n%s\n\n"
+
+# Cached lines are dropped once there are this many, so a long-running planner stays small
+FRAGMENT_LIMIT = 10_000
+
+# Receipts joined into each write when exporting
+EXPORT_BATCH = 1000
+
+EXPORT_FORMATS = ("text", "json", "csv")
+
+# CSV export columns; the menu's categories go between these two groups
+CSV_FIRST_COLUMNS = ("number", "saved_at")
+CSV_LAST_COLUMNS = ("group_items", "budget", "total")
+
+
+class ReceiptRenderer:
+    """
+    Renders receipts for a menu's categories. `basket_lines` is how many group order lines are
+    listed before the rest are summarised, or None to list them all.
+    """
+
+    def __init__(self, menu, basket_lines=None):
+        self.categories = list(menu)
+        self.labels = {category: category.capitalize() for category in self.categories}
+        self.csv_columns = CSV_FIRST_COLUMNS + tuple(self.categories) + CSV_LAST_COLUMNS
+        self.basket_lines = basket_lines
+        self.choice_lines = {}  # (category, item, price) -> finished line
+        self.group_lines = {}  # (item, quantity, line total) -> finished line
+
+    def choice_line(self, category, item, price):
+        key = (category, item, price)
+        line = self.choice_lines.get(key)
+        if line is None:
+            if len(self.choice_lines) >= FRAGMENT_LIMIT:
+                self.choice_lines.clear()
+            if price is None:
+                line = UNPRICED_CHOICE_LINE % (self.labels[category], item)
+            else:
+                line = CHOICE_LINE % (self.labels[category], item, format_cents(price))
+            self.choice_lines[key] = line
+        return line
+
+    def group_line(self, item, quantity, line_total):
+        key = (item, quantity, line_total)
+        line = self.group_lines.get(key)
+        if line is None:
+            if len(self.group_lines) >= FRAGMENT_LIMIT:
+                self.group_lines.clear()
+            if line_total is None:
+                line = UNPRICED_BASKET_LINE % (quantity, item)
+            else:
+                line = BASKET_LINE % (quantity, item, format_cents(line_total))
+            self.group_lines[key] = line
+        return line
+
+    def assemble(self, parts, basket, item_count, total):
+        """
+        Adds the group order lines, given as (item, quantity, line total) in the order they were
+        added, and the total line to the item lines in `parts`, and joins them.
+        """
+        if basket:
+            parts.append(BASKET_HEADING % item_count)
+            for number, (item, quantity, line_total) in enumerate(basket):
+                if number == self.basket_lines:
+                    parts.append(BASKET_MORE % (len(basket) - number))
+                    break
+                parts.append(self.group_line(item, quantity, line_total))
+        parts.append(TOTAL_LINE % format_cents(total))
+        return "".join(parts)
+
+    def render_plan(self, plan):
+        """The receipt text for a MenuPlan, as shown on the receipt page. Categories with no choice are left out."""
+        parts = [self.choice_line(category, plan.choices[category], plan.price_of(category))
+                 for category in self.categories if category in plan.choices]
+        basket = [(item, quantity, line_total) for category, item, quantity, price, line_total in plan.basket.lines()]
+        return self.assemble(parts, basket, plan.basket.item_count(), plan.total)
+
+    def render(self, receipt):
+        """
+        The receipt text for a saved receipt, at the prices it was saved with. A receipt saved
+        without its prices lists the items without prices rather than guessing them.
+        """
+        prices = receipt.get("prices")
+        parts = []
+        for category in self.categories:
+            item = receipt.get(category)
+            if item:
+                parts.append(self.choice_line(category, item, None if prices is None else prices.get(category, 0)))
+        lines = receipt.get("basket") or ()
+        unit_prices = receipt.get("basket_prices")
+        if unit_prices is None or len(unit_prices) != len(lines):
+            unit_prices = [None] * len(lines)
+        basket = []
+        item_count = 0
+        for (category, item, quantity), price in zip(lines, unit_prices):
+            basket.append((item, quantity, None if price is None else price * quantity))
+            item_count += quantity
+        return self.assemble(parts, basket, item_count, receipt_cents(receipt, "total") or 0)
+
+    def csv_row(self, number, receipt):
+        """One row of a CSV export, in the order of csv_columns."""
+        budget = receipt_cents(receipt, "budget")
+        total = receipt_cents(receipt, "total")
+        return (number, receipt.get("saved_at", ""), *(receipt.get(category) or "" for category in self.categories),
+                sum(quantity for category, item, quantity in receipt.get("basket") or ()),
+                "" if budget is None else format_cents(budget), "" if total is None else format_cents(total))
+
+
+def export_receipts(store, output, renderer, format="text", start=0):
+    """
+    Writes the receipts in a store from number `start` on to `output` as "text" (the receipt
+    as printed, headed by its number), "json" (one receipt per line, with its number) or "csv"
+    (one column per category of the renderer's menu). Receipts are numbered from 1 as the
+    planner shows them. Returns how many were written.
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {format}")
+    number = start
+    batch = []
+    if format == "csv":
+        writer = csv.writer(output, lineterminator="\n")
+        writer.writerow(renderer.csv_columns)
+        write = writer.writerows
+    else:
+        def write(lines):
+            output.write("".join(lines))
+
+    for receipt in store.since(start):
+        number += 1
+        if format == "text":
+            batch.append(EXPORT_RECEIPT % (number, renderer.render(receipt)))
+        elif format == "json":
+            batch.append(json.dumps(dict(receipt, number=number), separators=(",", ":")) + "\n")
+        else:
+            batch.append(renderer.csv_row(number, receipt))
+        if len(batch) == EXPORT_BATCH:
+            write(batch)
+            batch.clear()
+    if batch:
+        write(batch)
+    return number - start
+
+
+def main():
+    # The GUI imports this module, so the command line's imports wait until they are needed
+    import argparse
+    from batch_planner import open_output
+    from catalog_loader import CatalogLoader
+
+    parser = argparse.ArgumentParser(description="Export the menu planner's saved receipts.")
+    parser.add_argument("path", nargs="?", default="receipts.jsonl",
+                        help="receipt log, or a .db file for the SQLite store (default: receipts.jsonl)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="text", help="export format (default: text)")
+    parser.add_argument("--output", default="-", help="file to write the receipts to (default: stdout)")
+    parser.add_argument("--since", type=int, default=0, metavar="N",
+                        help="skip the first N receipts, e.g. those exported yesterday")
+    args = parser.parse_args()
+
+    menu = CatalogLoader().menu()
+    if args.path.endswith(".db"):
+        from receipt_db import ReceiptDatabase
+        store = ReceiptDatabase(args.path, list(menu))
+    else:
+        from receipt_store import ReceiptLog
+        store = ReceiptLog(args.path, read_only=True)
+
+    output = open_output(args.output)
+    try:
+        count = export_receipts(store, output, ReceiptRenderer(menu), args.format, args.since)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"Exported {count} receipts.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
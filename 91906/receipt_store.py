@@ -0,0 +1,215 @@
+# W. Fifita Menu Planner - Receipt Store
+
+"""
+An append-only history of saved receipts. Each receipt is one line of JSON appended to
+receipts.jsonl, and the byte offset of every line is stored as a fixed 8-byte number in
+receipts.idx. Saving is one appended write to each file, and loading the latest or the Nth
+receipt is a seek into the index and a seek into the log, so neither gets slower as the
+history grows.
+
+Several processes may share one log. Appends, and the repair of a log left behind by a crash,
+take an exclusive lock on receipts.lock so they never interleave. Tools that only read the
+history open the log with read_only=True, which never takes the lock or changes either file.
+"""
+
+import json
+import os
+import struct
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from instrumentation import instrument_methods
+
+# Each index entry is an unsigned 64-bit little-endian byte offset into the log
+OFFSET = struct.Struct("<Q")
+
+
+@contextmanager
+def exclusive_lock(path):
+    """Holds an exclusive lock on the file at `path` (creating it) until the block ends, across processes."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass  # LK_LOCK gives up after 10 seconds, so keep waiting
+        try:
+            yield
+        finally:
+            if fcntl is None:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)  # Closing the file also releases an flock
+
+
+class ReceiptLog:
+    """
+    An append-only JSON Lines receipt log with an offset index for direct lookups. A read-only
+    log can be read while other processes append to it, and never repairs the files.
+    """
+
+    def __init__(self, path="receipts.jsonl", index_path=None, read_only=False):
+        self.path = path
+        self.index_path = index_path if index_path is not None else os.path.splitext(path)[0] + ".idx"
+        self.lock_path = os.path.splitext(path)[0] + ".lock"
+        self.read_only = read_only
+        if not read_only:
+            with exclusive_lock(self.lock_path):
+                if not self.index_is_valid():
+                    self.rebuild_index()
+
+    def __len__(self):
+        """Returns how many receipts have been saved."""
+        try:
+            return os.path.getsize(self.index_path) // OFFSET.size
+        except FileNotFoundError:
+            return 0
+
+    def append(self, receipt):
+        """Appends a receipt to the log and returns its number (0 for the first receipt)."""
+        if "saved_at" not in receipt:
+            receipt = dict(receipt, saved_at=time.time())
+        line = json.dumps(receipt, separators=(",", ":")).encode("utf-8") + b"\n"
+        if self.read_only:
+            raise PermissionError("This receipt log was opened read-only.")
+
+        with exclusive_lock(self.lock_path):
+            with open(self.path, "ab") as log_file:
+                offset = log_file.tell()
+                log_file.write(line)
+            with open(self.index_path, "ab") as index_file:
+                number = index_file.tell() // OFFSET.size
+                index_file.write(OFFSET.pack(offset))
+        return number
+
+    def get(self, number):
+        """
+        Returns the receipt with the given number. Negative numbers count back from the latest.
+        Raises IndexError if there is no such receipt.
+        """
+        count = len(self)
+        if number < 0:
+            number += count
+        if not 0 <= number < count:
+            raise IndexError("No saved receipt with that number.")
+
+        with open(self.index_path, "rb") as index_file:
+            index_file.seek(number * OFFSET.size)
+            offset, = OFFSET.unpack(index_file.read(OFFSET.size))
+        with open(self.path, "rb") as log_file:
+            log_file.seek(offset)
+            return json.loads(log_file.readline())
+
+    def latest(self):
+        """Returns the most recently saved receipt, or None if nothing has been saved."""
+        if len(self) == 0:
+            return None
+        return self.get(-1)
+
+    def __iter__(self):
+        """Streams every receipt in the order they were saved, one line at a time."""
+        try:
+            with open(self.path, "rb") as log_file:
+                for line in log_file:
+                    if not line.endswith(b"\n"):
+                        break  # Still being written by another process
+                    if line.strip():
+                        yield json.loads(line)
+        except FileNotFoundError:
+            return
+
+    def since(self, number):
+        """
+        Streams the receipts from number `number` on, seeking straight to the first one. A last
+        line that is still being written is left for the next call.
+        """
+        if not 0 <= number < len(self):
+            if number <= 0:
+                yield from self
+            return
+        with open(self.index_path, "rb") as index_file:
+            index_file.seek(number * OFFSET.size)
+            offset, = OFFSET.unpack(index_file.read(OFFSET.size))
+        with open(self.path, "rb") as log_file:
+            log_file.seek(offset)
+            for line in log_file:
+                if not line.endswith(b"\n"):
+                    break
+                if line.strip():
+                    yield json.loads(line)
+
+    def index_is_valid(self):
+        """
+        Checks that the index matches the log by looking only at the last entry: it must point
+        at a line that ends exactly at the end of the log.
+        """
+        log_size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        index_size = os.path.getsize(self.index_path) if os.path.exists(self.index_path) else 0
+        if index_size % OFFSET.size:
+            return False
+        if index_size == 0:
+            return log_size == 0
+
+        with open(self.index_path, "rb") as index_file:
+            index_file.seek(index_size - OFFSET.size)
+            offset, = OFFSET.unpack(index_file.read(OFFSET.size))
+        if offset >= log_size:
+            return False
+        with open(self.path, "rb") as log_file:
+            log_file.seek(offset)
+            line = log_file.readline()
+        return line.endswith(b"\n") and offset + len(line) == log_size
+
+    def rebuild_index(self):
+        """
+        Rewrites the index by scanning the log, e.g. after a crash between the two writes. Only
+        called while holding the lock, so no append can be half done.
+        """
+        offsets = bytearray()
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as log_file:
+                offset = 0
+                for line in log_file:
+                    if not line.endswith(b"\n"):
+                        # A half-written last line is cut off so the next append starts cleanly
+                        log_file.close()
+                        with open(self.path, "r+b") as truncate_file:
+                            truncate_file.truncate(offset)
+                        break
+                    if line.strip():
+                        offsets += OFFSET.pack(offset)
+                    offset += len(line)
+        with open(self.index_path, "wb") as index_file:
+            index_file.write(offsets)
+
+
+def open_receipt_store(kind=None, categories=None):
+    """
+    Opens the receipt store the planner should save to. The kind is "json" (the default) or
+    "sqlite", and can also be chosen with the MENU_PLANNER_STORAGE environment variable.
+    `categories` are the menu's categories, which the SQLite store indexes chosen items by.
+    """
+    if kind is None:
+        kind = os.environ.get("MENU_PLANNER_STORAGE", "json")
+    if kind == "sqlite":
+        # Only load sqlite3 when the database backend is actually used
+        from receipt_db import ReceiptDatabase
+        store = ReceiptDatabase("receipts.db", categories)
+    elif kind == "json":
+        store = ReceiptLog("receipts.jsonl")
+    else:
+        raise ValueError(f"Unknown receipt storage: {kind}")
+    # Timed only when MENU_PLANNER_PROFILE is set
+    return instrument_methods(store, ("append", "save_many", "get", "latest"), f"receipts.{kind}")
@@ -0,0 +1,227 @@
+# W. Fifita Menu Planner - Sales Analytics
+
+"""
+Running sales figures over the receipt history: how popular each item and each combo (one item
+from every category of the menu) is, average spend against budget, budget headroom (how much of the budget was left),
+and the same figures over the last hour and the last day.
+
+Receipts are consumed as a stream and every aggregate is updated as each one arrives, so
+nothing is ever recomputed from the history. catch_up() reads whatever has been saved since it
+last ran in a single streaming pass, whether that is a few new receipts or a history of
+millions, and queries only read the aggregates, so they cost the same however long the
+history is. The most popular combos are tracked with a Space-Saving heavy-hitters sketch,
+which keeps a fixed number of counters however many different combos there are, and the
+time windows are rings of fixed-size buckets.
+
+Run with:  python sales_analytics.py                  (summarise receipts.jsonl)
+           python sales_analytics.py --follow 5       (refresh every 5 seconds)
+"""
+
+import argparse
+import json
+import time
+from collections import Counter
+
+from money import receipt_cents
+from planner_engine import menu as default_menu
+
+
+class SpaceSaving:
+    """
+    Approximate top-K counts in a fixed number of counters (the Space-Saving algorithm). A key
+    that is not being counted when the counters are full takes over the smallest counter, so a
+    key's count may be too high by at most its recorded error. Any key seen more than
+    total / capacity times is guaranteed to be counted.
+
+    Keys with the same count are kept together in buckets and the smallest count is tracked,
+    so every update is O(1).
+    """
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.counts = {}  # key -> [count, error]
+        self.buckets = {}  # count -> the keys with that count, as an insertion-ordered dict
+        self.smallest = 0
+
+    def add(self, key):
+        entry = self.counts.get(key)
+        if entry is None:
+            if len(self.counts) < self.capacity:
+                self.counts[key] = [1, 0]
+                self.buckets.setdefault(1, {})[key] = None
+                self.smallest = 1
+                return
+            # Take over the counter of a key with the smallest count, inheriting it as the error
+            evicted = next(iter(self.buckets[self.smallest]))
+            del self.buckets[self.smallest][evicted]
+            self.buckets[self.smallest][key] = None
+            entry = self.counts[key] = self.counts.pop(evicted)
+            entry[1] = entry[0]
+        self.increment(key, entry)
+
+    def increment(self, key, entry):
+        """Moves a key up to the next count's bucket, keeping track of the smallest count."""
+        count = entry[0]
+        bucket = self.buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[count]
+            if count == self.smallest:
+                self.smallest = count + 1
+        entry[0] = count + 1
+        self.buckets.setdefault(count + 1, {})[key] = None
+
+    def top(self, n=10):
+        """Returns up to n (key, count, error) triples, most common first."""
+        ranked = sorted(self.counts.items(), key=lambda pair: pair[1][0], reverse=True)[:n]
+        return [(key, count, error) for key, (count, error) in ranked]
+
+
+class RollingWindow:
+    """
+    Receipt count, spend, budget and headroom over the last `buckets` x `bucket_seconds`
+    seconds, kept in a ring of buckets so old receipts drop out without being stored.
+    """
+
+    def __init__(self, bucket_seconds, buckets):
+        self.bucket_seconds = bucket_seconds
+        self.starts = [None] * buckets  # Bucket number (time // bucket_seconds) held in each slot
+        self.totals = [[0, 0, 0, 0] for _ in range(buckets)]  # receipts, spend, budget, headroom
+
+    def add(self, saved_at, spend, budget, headroom):
+        number = int(saved_at // self.bucket_seconds)
+        slot = number % len(self.starts)
+        start = self.starts[slot]
+        if start != number:
+            if start is not None and start > number:
+                return  # Older than anything the window still covers
+            self.starts[slot] = number
+            self.totals[slot] = [0, 0, 0, 0]
+        totals = self.totals[slot]
+        totals[0] += 1
+        totals[1] += spend
+        totals[2] += budget
+        totals[3] += headroom
+
+    def summary(self, now=None):
+        """Sums the buckets still inside the window ending now."""
+        newest = int((time.time() if now is None else now) // self.bucket_seconds)
+        sums = [0, 0, 0, 0]
+        for start, totals in zip(self.starts, self.totals):
+            if start is not None and newest - len(self.starts) < start <= newest:
+                for field in range(4):
+                    sums[field] += totals[field]
+        return spend_summary(*sums)
+
+
+def spend_summary(receipts, spend, budget, headroom):
+    """Counts and averages (in cents) for a set of receipts."""
+    return {"receipts": receipts,
+            "spend_cents": spend,
+            "average_spend_cents": round(spend / receipts) if receipts else 0,
+            "average_budget_cents": round(budget / receipts) if receipts else 0,
+            "average_headroom_cents": round(headroom / receipts) if receipts else 0}
+
+
+class SalesAnalytics:
+    """
+    Aggregates over every receipt added so far, updated one receipt at a time. `categories` are
+    those of the menu in use; by default those of the built-in menu.
+    """
+
+    def __init__(self, categories=None, top_capacity=100):
+        self.categories = tuple(categories if categories is not None else default_menu)
+        self.receipts = 0  # Also the number of the next receipt catch_up() will read
+        self.spend = 0
+        self.budget = 0
+        self.headroom = 0
+        self.over_budget = 0
+        self.items = {category: Counter() for category in self.categories}
+        self.combos = SpaceSaving(top_capacity)
+        self.last_hour = RollingWindow(60, 60)
+        self.last_day = RollingWindow(3600, 24)
+
+    def add(self, receipt):
+        """Adds one receipt to every aggregate."""
+        spend = receipt_cents(receipt, "total") or 0
+        budget = receipt_cents(receipt, "budget") or 0
+        headroom = budget - spend
+        self.receipts += 1
+        self.spend += spend
+        self.budget += budget
+        self.headroom += headroom
+        if budget and headroom < 0:
+            self.over_budget += 1
+
+        choices = tuple(receipt.get(category) for category in self.categories)
+        for category, item in zip(self.categories, choices):
+            if item:
+                self.items[category][item] += 1
+        for category, item, quantity in receipt.get("basket") or ():
+            if category in self.items:
+                self.items[category][item] += quantity
+        if all(choices):
+            self.combos.add(choices)
+
+        saved_at = receipt.get("saved_at")
+        if saved_at is not None:
+            self.last_hour.add(saved_at, spend, budget, headroom)
+            self.last_day.add(saved_at, spend, budget, headroom)
+
+    def catch_up(self, store):
+        """
+        Reads every receipt saved to the store since the last catch-up in one streaming pass.
+        Returns how many were read.
+        """
+        start = self.receipts
+        for receipt in store.since(start):
+            self.add(receipt)
+        return self.receipts - start
+
+    def top_combos(self, n=10):
+        """The n most popular combos (one item per category) with their counts, most popular first."""
+        return [(combo, count) for combo, count, error in self.combos.top(n)]
+
+    def top_items(self, category, n=5):
+        return self.items[category].most_common(n)
+
+    def summary(self, now=None, top=10):
+        """Every aggregate, ready to be shown or sent as JSON."""
+        summary = spend_summary(self.receipts, self.spend, self.budget, self.headroom)
+        summary["over_budget"] = self.over_budget
+        summary["top_combos"] = [dict(zip(self.categories, combo), count=count) for combo, count in self.top_combos(top)]
+        summary["top_items"] = {category: self.top_items(category) for category in self.categories}
+        summary["last_hour"] = self.last_hour.summary(now)
+        summary["last_day"] = self.last_day.summary(now)
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sales figures from the menu planner's receipt history.")
+    parser.add_argument("path", nargs="?", default="receipts.jsonl",
+                        help="receipt log, or a .db file for the SQLite store (default: receipts.jsonl)")
+    parser.add_argument("--follow", type=float, metavar="SECONDS",
+                        help="keep reading new receipts and print the figures again every SECONDS")
+    args = parser.parse_args()
+
+    # The categories are those of the catalog file the planner uses (menu.json by default)
+    from catalog_loader import CatalogLoader
+    categories = list(CatalogLoader().menu())
+    if args.path.endswith(".db"):
+        from receipt_db import ReceiptDatabase
+        store = ReceiptDatabase(args.path, categories)
+    else:
+        from receipt_store import ReceiptLog
+        store = ReceiptLog(args.path, read_only=True)
+
+    analytics = SalesAnalytics(categories)
+    while True:
+        analytics.catch_up(store)
+        print(json.dumps(analytics.summary(), indent=2))
+        if args.follow is None:
+            break
+        time.sleep(args.follow)
+
+
+if __name__ == "__main__":
+    main()
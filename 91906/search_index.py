@@ -0,0 +1,126 @@
+# W. Fifita Menu Planner - Search Index
+
+"""
+An in-memory inverted index over item names and descriptions. Each word maps to the set of
+(category, item) pairs that contain it, and a sorted list of all words allows prefix matching,
+so "piz" finds Pizza while the user is still typing. Items can be added, removed or changed
+one at a time, and sync() brings the index up to date with a new version of the menu by only
+re-indexing the items that actually changed.
+"""
+
+import re
+from bisect import bisect_left, insort
+
+WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Splits text into lowercase words."""
+    return WORD.findall(text.lower())
+
+
+class SearchIndex:
+    """Maps words to the menu items whose name or description contains them."""
+
+    def __init__(self):
+        self.postings = {}  # word -> set of (category, item)
+        self.words = []  # every indexed word, kept sorted for prefix lookups
+        self.indexed = {}  # (category, item) -> (text it was indexed with, its words)
+
+    @classmethod
+    def from_menu(cls, menu):
+        """Builds an index over every item in the menu."""
+        index = cls()
+        index.sync(menu)
+        return index
+
+    def __len__(self):
+        return len(self.indexed)
+
+    def add_item(self, category, item, description=""):
+        """Indexes an item, replacing it if it is already indexed."""
+        key = (category, item)
+        text = f"{item} {description}"
+        if key in self.indexed:
+            if self.indexed[key][0] == text:
+                return
+            self.remove_item(category, item)
+
+        words = frozenset(tokenize(text))
+        self.indexed[key] = (text, words)
+        for word in words:
+            posting = self.postings.get(word)
+            if posting is None:
+                posting = self.postings[word] = set()
+                insort(self.words, word)
+            posting.add(key)
+
+    def remove_item(self, category, item):
+        """Removes an item from the index, if it is there."""
+        entry = self.indexed.pop((category, item), None)
+        if entry is None:
+            return
+        for word in entry[1]:
+            posting = self.postings[word]
+            posting.discard((category, item))
+            if not posting:
+                # Drop words nothing uses any more so prefix searches stay fast
+                del self.postings[word]
+                del self.words[bisect_left(self.words, word)]
+
+    def sync(self, menu):
+        """Updates the index to match the menu, touching only items that were added, removed or changed."""
+        current = set()
+        for category in menu:
+            for item, details in menu[category].items():
+                current.add((category, item))
+                self.add_item(category, item, details.get("description", ""))
+        for category, item in [key for key in self.indexed if key not in current]:
+            self.remove_item(category, item)
+
+    def words_with_prefix(self, prefix):
+        """Yields every indexed word that starts with the prefix, in alphabetical order."""
+        position = bisect_left(self.words, prefix)
+        while position < len(self.words) and self.words[position].startswith(prefix):
+            yield self.words[position]
+            position += 1
+
+    def search(self, query, limit=50):
+        """
+        Returns up to `limit` (category, item) pairs that match every word in the query.
+        The last word is treated as a prefix, so partly typed words still match.
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+        *whole_words, prefix = words
+
+        # Intersect the exact words starting from the smallest posting set
+        candidates = None
+        for word in sorted(whole_words, key=lambda w: len(self.postings.get(w, ()))):
+            posting = self.postings.get(word)
+            if not posting:
+                return []
+            candidates = set(posting) if candidates is None else candidates & posting
+            if not candidates:
+                return []
+
+        results = []
+        if candidates is not None:
+            # Check the prefix against each remaining candidate's own words
+            for key in candidates:
+                if any(word.startswith(prefix) for word in self.indexed[key][1]):
+                    results.append(key)
+                    if len(results) >= limit:
+                        break
+        else:
+            # Only a prefix was typed, so walk the matching words until there are enough results
+            seen = set()
+            for word in self.words_with_prefix(prefix):
+                for key in self.postings[word]:
+                    if key not in seen:
+                        seen.add(key)
+                        results.append(key)
+                        if len(results) >= limit:
+                            return sorted(results)
+        return sorted(results)
@@ -0,0 +1,209 @@
+# W. Fifita Menu Planner - Session Manager
+
+"""
+Keeps many users' plans apart in one server process. Each session has its own MenuPlan and
+remembers the number of its latest saved receipt. A session's plan stays on the menu snapshot
+it was priced against until the user asks to move it to the current menu with reprice(). Recently used sessions stay in memory in
+least-recently-used order; when there are more than `max_active`, the idlest are written to a
+SQLite table in one batch and dropped from memory, then read back the next time they are used.
+This lets a server hold a very large number of sessions while only the active ones use memory.
+"""
+
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from planner_engine import menu, MenuPlan
+from money import to_cents
+from receipt_store import open_receipt_store
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    last_used REAL NOT NULL
+);
+"""
+
+
+class Session:
+    """
+    One user's plan, when it was last used and the number of their latest saved receipt.
+    `prices_changed` is set when a session read back from disk could not be priced against its
+    own snapshot any more and its total changed.
+    """
+
+    __slots__ = ("plan", "last_used", "receipt_number", "prices_changed")
+
+    def __init__(self, plan, last_used=0.0, receipt_number=None, prices_changed=False):
+        self.plan = plan
+        self.last_used = last_used
+        self.receipt_number = receipt_number
+        self.prices_changed = prices_changed
+
+    def to_json(self):
+        return json.dumps({"plan": self.plan.to_dict(), "receipt": self.receipt_number,
+                           "prices_changed": self.prices_changed}, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text, menu, last_used, snapshot=None):
+        """
+        Reads a session back. Its plan is priced against the snapshot it was saved with if
+        snapshot(version) still returns it, and otherwise against `menu`, which flags the
+        session if that changes its total.
+        """
+        data = json.loads(text)
+        saved = data["plan"]
+        pinned = snapshot(saved.get("catalog_version")) if snapshot is not None else None
+        if pinned is not None:
+            menu = pinned
+        budget = saved["budget_cents"] if "budget_cents" in saved else to_cents(saved["budget"])
+        plan = MenuPlan(menu, budget)
+        plan.choices = {category: item for category, item in saved.items()
+                        if category in menu and item is not None}
+        plan.basket.quantities.update({(category, item): quantity
+                                       for category, item, quantity in saved.get("basket", ())})
+        plan.reprice(menu)  # Prices everything, dropping anything that is no longer on the menu
+        prices_changed = data.get("prices_changed", False) or (
+            pinned is None and saved.get("total_cents", plan.total) != plan.total)
+        return cls(plan, last_used, data["receipt"], prices_changed)
+
+
+class SessionManager:
+    """Independent plans for many sessions, with idle sessions moved out of memory to disk."""
+
+    def __init__(self, menu=menu, path="sessions.db", max_active=10000, receipts=None, snapshot=None):
+        self.menu = menu  # The current menu, which new sessions are priced against
+        self.snapshot = snapshot  # version -> menu snapshot, or None once it is no longer kept
+        self.pinned = {}  # version -> [snapshot, sessions on disk priced against it]
+        self.max_active = max_active
+        self.active = OrderedDict()  # session id -> Session, least recently used first
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+        self.receipts = receipts if receipts is not None else open_receipt_store(categories=list(menu))
+
+    def create(self):
+        """Starts a new session and returns its id."""
+        session_id = secrets.token_hex(8)
+        with self.lock:
+            self.active[session_id] = Session(MenuPlan(self.menu), time.time())
+            self.evict_if_full()
+        return session_id
+
+    def get(self, session_id):
+        """Returns a session, reading it back from disk if it was evicted. Raises KeyError if unknown."""
+        with self.lock:
+            session = self.active.get(session_id)
+            if session is not None:
+                self.active.move_to_end(session_id)
+            else:
+                row = self.connection.execute("SELECT data, last_used FROM sessions WHERE id = ?",
+                                              (session_id,)).fetchone()
+                if row is None:
+                    raise KeyError(session_id)
+                session = Session.from_json(row[0], self.menu, row[1], self.find_snapshot)
+                self.unpin(session.plan.menu)
+                self.active[session_id] = session
+                self.evict_if_full()
+            session.last_used = time.time()
+            return session
+
+    def find_snapshot(self, version):
+        """The menu snapshot with this version, if a session on disk or the catalog still holds it."""
+        entry = self.pinned.get(version)
+        if entry is not None:
+            return entry[0]
+        return self.snapshot(version) if self.snapshot is not None and version is not None else None
+
+    def pin(self, menu):
+        """Keeps a session's snapshot alive while the session is on disk."""
+        version = getattr(menu, "version", None)
+        if version is not None:
+            self.pinned.setdefault(version, [menu, 0])[1] += 1
+
+    def unpin(self, menu):
+        entry = self.pinned.get(getattr(menu, "version", None))
+        if entry is not None and entry[0] is menu:
+            entry[1] -= 1
+            if not entry[1]:
+                del self.pinned[menu.version]
+
+    def reprice(self, session_id):
+        """
+        Moves a session's plan to the current menu. Returns the (category, item, old price, new
+        price) changes, with None as the new price of anything dropped from the plan.
+        """
+        with self.lock:
+            session = self.get(session_id)
+            changes = session.plan.price_changes(self.menu)
+            session.plan.reprice(self.menu)
+            session.prices_changed = False
+            return changes
+
+    def plan(self, session_id):
+        """Returns the MenuPlan for a session."""
+        return self.get(session_id).plan
+
+    def delete(self, session_id):
+        """Forgets a session entirely."""
+        with self.lock:
+            session = self.active.pop(session_id, None)
+            if session is None:
+                row = self.connection.execute("SELECT data FROM sessions WHERE id = ?", (session_id,)).fetchone()
+                if row is not None:
+                    self.unpin(self.find_snapshot(json.loads(row[0])["plan"].get("catalog_version")))
+            with self.connection:
+                self.connection.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def evict_if_full(self):
+        """Moves the idlest tenth of the sessions to disk once there are too many in memory."""
+        if len(self.active) > self.max_active:
+            self.evict(max(1, self.max_active // 10))
+
+    def evict(self, count):
+        """Writes the `count` least recently used sessions to disk in one transaction."""
+        with self.lock:
+            rows = []
+            for _ in range(min(count, len(self.active))):
+                session_id, session = self.active.popitem(last=False)
+                self.pin(session.plan.menu)
+                rows.append((session_id, session.to_json(), session.last_used))
+            with self.connection:
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO sessions (id, data, last_used) VALUES (?, ?, ?)", rows)
+
+    def evict_idle(self, max_idle_seconds):
+        """Moves every session not used for `max_idle_seconds` to disk."""
+        cutoff = time.time() - max_idle_seconds
+        with self.lock:
+            idle = 0
+            for session in self.active.values():
+                if session.last_used >= cutoff:
+                    break  # Sessions are in least recently used order, so the rest are newer
+                idle += 1
+            self.evict(idle)
+
+    def close(self):
+        """Writes every session in memory to disk and closes the database."""
+        self.evict(len(self.active))
+        self.connection.close()
+
+    def save_receipt(self, session_id):
+        """Saves the session's plan as a receipt tagged with the session id and returns its number."""
+        with self.lock:
+            session = self.get(session_id)
+            number = self.receipts.append(dict(session.plan.to_dict(), session=session_id))
+            session.receipt_number = number
+            return number
+
+    def latest_receipt(self, session_id):
+        """Returns the session's most recently saved receipt, or None if it has not saved one."""
+        with self.lock:
+            session = self.get(session_id)
+            if session.receipt_number is None:
+                return None
+            return self.receipts.get(session.receipt_number)
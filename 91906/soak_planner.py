@@ -0,0 +1,331 @@
+# W. Fifita Menu Planner - GUI Soak Test
+
+"""
+Drives the iteration 3 MenuPlanner through thousands of scripted customer sessions without
+anyone clicking, the way a kiosk runs all day. Each session calls the app's own callbacks:
+setting a budget, searching, visiting the food, drink and dessert pages and choosing items,
+sometimes adding to the group order or asking for a suggested plan, viewing the receipt,
+saving it and loading a previous plan. Dialogs are answered by a stand-in for messagebox so
+nothing waits for a click.
+
+Every session starts a new plan and is given a budget that covers what it will choose, so each
+one should end with a saved receipt. Sessions are meant to time the planner's normal path: an
+error or warning dialog, or a session whose receipt was not saved, is listed as a problem.
+
+The report gives latency percentiles for every action (the callback plus the redraw it
+causes), and samples the number of live widgets and the process's resident memory (RSS) as
+the run goes on. Widgets or memory that keep growing, or actions that get slower towards the
+end of the run, are listed as problems and make the exit status 1, so leaks and slowdowns are
+caught before the planner is deployed.
+
+It needs a display. If none can be opened and Xvfb is installed, a virtual display is started
+for the run; otherwise use `xvfb-run python soak_planner.py`.
+
+Run with:  python soak_planner.py --sessions 2000
+           python soak_planner.py --items 300 --output soak-report.json
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+from benchmark_planner import CATEGORIES, load_gui_module, synthetic_menu
+
+# Growth between the first and last samples that is reported as a problem
+MAX_WIDGET_GROWTH = 0
+MAX_RSS_GROWTH = 20 * 1024 * 1024
+
+# An action is reported as slowing down when its median over the last tenth of the sessions is
+# this many times its median over the first tenth, and at least SLOWDOWN_FLOOR seconds slower
+MAX_SLOWDOWN = 1.5
+SLOWDOWN_FLOOR = 0.001
+
+
+class ScriptedDialogs:
+    """Stands in for tkinter.messagebox: counts each dialog by title and says yes to every question."""
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def showinfo(self, title, message=None, **options):
+        self.counts[f"info: {title}"] += 1
+
+    def showwarning(self, title, message=None, **options):
+        self.counts[f"warning: {title}"] += 1
+
+    def showerror(self, title, message=None, **options):
+        self.counts[f"error: {title}"] += 1
+
+    def askyesno(self, title, message=None, **options):
+        self.counts[f"question: {title}"] += 1
+        return True
+
+
+def rss_bytes():
+    """The process's resident memory in bytes, or None where it cannot be read."""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # The peak, the best macOS offers
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def count_widgets(widget):
+    """Counts a widget and every widget inside it."""
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+
+def start_virtual_display():
+    """
+    Starts Xvfb on a free display number and points DISPLAY at it. Returns the process, or None
+    if Xvfb is not installed or did not start.
+    """
+    if shutil.which("Xvfb") is None:
+        return None
+    for number in range(99, 120):
+        if os.path.exists(f"/tmp/.X{number}-lock"):
+            continue
+        process = subprocess.Popen(["Xvfb", f":{number}", "-screen", "0", "1024x768x24", "-nolisten", "tcp"],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and process.poll() is None:
+            if os.path.exists(f"/tmp/.X11-unix/X{number}"):
+                os.environ["DISPLAY"] = f":{number}"
+                return process
+            time.sleep(0.05)
+        process.kill()
+    return None
+
+
+def percentile(ordered, fraction):
+    """The nearest-rank percentile of an already sorted list."""
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class SoakTest:
+    """One MenuPlanner window and the scripted sessions run against it."""
+
+    def __init__(self, root, menu, seed=1):
+        self.root = root
+        self.menu = menu
+        self.rng = random.Random(seed)
+        self.module = load_gui_module()
+        self.app = self.module.MenuPlanner(root)
+        self.dialogs = self.module.messagebox = ScriptedDialogs()
+        self.app.worker.poll_ms = 1  # Check for finished background jobs straight away
+        self.timings = defaultdict(list)  # action -> (session number, seconds) for each call
+        self.session = 0
+        self.saved = 0  # Receipts saved, one per session when nothing goes wrong
+        self.cheapest = sum(min(details["price"] for details in menu[category].values()) for category in CATEGORIES)
+        self.words = sorted({word for category in CATEGORIES for item in menu[category] for word in item.split()})
+        self.wait_for_worker()
+
+    def wait_for_worker(self):
+        """Lets the background worker finish its jobs and run their callbacks."""
+        while self.app.worker.pending:
+            self.root.update()
+            time.sleep(0.001)
+
+    def act(self, name, callback, *args):
+        """Calls one of the app's callbacks and times it together with the redraw it causes."""
+        start = time.perf_counter()
+        callback(*args)
+        self.root.update()
+        self.timings[name].append((self.session, time.perf_counter() - start))
+
+    def type_into(self, entry, text):
+        entry.delete(0, "end")
+        entry.insert(0, text)
+
+    def run_session(self):
+        """
+        One customer: budget, search, choose a meal or take a suggested plan, maybe a group
+        order, then the receipt. The items are drawn first so the budget can cover them.
+        """
+        app, rng = self.app, self.rng
+        self.session += 1
+
+        people = rng.randint(1, 4) if rng.random() < 0.1 else None
+        meal = {category: rng.choice(list(self.menu[category])) for category in CATEGORIES}
+        group_item, quantity = None, 0
+        if rng.random() < 0.2:
+            group_item, quantity = rng.choice(list(self.menu["food"])), rng.randint(1, 5)
+        if people:
+            # Any budget that covers the cheapest meal for everyone has a suggested plan
+            cost = self.cheapest * people
+        else:
+            cost = sum(self.menu[category][item]["price"] for category, item in meal.items())
+            if group_item:
+                cost += self.menu["food"][group_item]["price"] * quantity
+        budget = rng.randint(cost, cost * 2)
+
+        # Each customer starts with the New Plan button rather than adding to the last one's plan
+        self.act("new_plan", app.new_plan)
+        self.wait_for_worker()
+        self.type_into(app.budget_entry, f"{budget // 100}.{budget % 100:02d}")
+        self.act("set_budget", app.set_budget)
+        self.wait_for_worker()
+        self.act("search", app.search_text.set, rng.choice(self.words)[:rng.randint(1, 4)])
+        self.act("search_clear", app.search_text.set, "")
+
+        if people:
+            self.type_into(app.people_box, str(people))
+            self.act("suggest_plan", app.suggest_plan)
+            self.wait_for_worker()
+        elif group_item:
+            self.act("create_food_page", app.create_food_page)
+            app.group_order.set(True)
+            self.type_into(app.quantity_box, str(quantity))
+            self.act("add_to_group_order", app.choose_item, "food", group_item, app.set_food_choice)
+            app.group_order.set(False)
+
+        for category in CATEGORIES:
+            self.act(f"create_{category}_page", getattr(app, f"create_{category}_page"))
+            if not people:  # Visit the pages but keep the suggested meal
+                self.act(f"set_{category}_choice", getattr(app, f"set_{category}_choice"), meal[category])
+        self.act("create_receipt_page", app.create_receipt_page)
+
+        receipts = len(app.receipts) if app.receipts is not None else 0
+        self.act("save_receipt", app.save_receipt)
+        self.wait_for_worker()
+        self.saved += len(app.receipts) - receipts if app.receipts is not None else 0
+        if rng.random() < 0.2:
+            self.act("load_previous_menu", app.load_previous_menu)
+            self.wait_for_worker()
+        if group_item or (people or 0) > 1:
+            self.act("clear_group_order", app.clear_group_order)
+        self.act("create_welcome_page", app.create_welcome_page)
+
+    def sample(self, session, started):
+        return {"session": session, "seconds": round(time.perf_counter() - started, 3),
+                "widgets": count_widgets(self.root), "rss_bytes": rss_bytes()}
+
+    def run(self, sessions, sample_every=50):
+        """Runs the sessions and returns the report."""
+        started = time.perf_counter()
+        self.run_session()  # Builds every page, so the first sample is taken after warming up
+        samples = [self.sample(1, started)]
+        for session in range(2, sessions + 1):
+            self.run_session()
+            if session % sample_every == 0 or session == sessions:
+                samples.append(self.sample(session, started))
+        return {"sessions": sessions, "seconds": round(time.perf_counter() - started, 3),
+                "actions": self.action_summary(), "samples": samples,
+                "dialogs": dict(self.dialogs.counts), "receipts_saved": self.saved,
+                "problems": self.problems(samples, sessions)}
+
+    def action_summary(self):
+        summary = {}
+        for name, calls in sorted(self.timings.items()):
+            ordered = sorted(seconds for session, seconds in calls)
+            summary[name] = {"calls": len(ordered),
+                             "p50_ms": round(percentile(ordered, 0.5) * 1000, 3),
+                             "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+                             "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+                             "max_ms": round(ordered[-1] * 1000, 3)}
+        return summary
+
+    def problems(self, samples, sessions):
+        """
+        Sessions that did not save their receipt or raised an error or warning, widget or memory
+        growth between the first and last samples, and actions that slowed down.
+        """
+        problems = []
+        if self.saved != sessions:
+            problems.append(f"Only {self.saved} of {sessions} sessions saved their receipt.")
+        for title, count in sorted(self.dialogs.counts.items()):
+            if title.startswith(("error:", "warning:")):
+                problems.append(f'{count} sessions showed "{title}".')
+        first, last = samples[0], samples[-1]
+        if last["widgets"] - first["widgets"] > MAX_WIDGET_GROWTH:
+            problems.append(f"Widgets grew from {first['widgets']} to {last['widgets']}.")
+        if first["rss_bytes"] is not None and last["rss_bytes"] - first["rss_bytes"] > MAX_RSS_GROWTH:
+            problems.append(f"Memory grew by {(last['rss_bytes'] - first['rss_bytes']) / 2 ** 20:.1f} MB.")
+
+        tenth = max(1, sessions // 10)
+        for name, calls in self.timings.items():
+            # The first session is left out of the early calls, it builds each page for the first time
+            early = sorted(seconds for session, seconds in calls if 1 < session <= tenth + 1)
+            late = sorted(seconds for session, seconds in calls if session > sessions - tenth)
+            if not early or not late:
+                continue
+            before, after = percentile(early, 0.5), percentile(late, 0.5)
+            if after > before * MAX_SLOWDOWN and after - before > SLOWDOWN_FLOOR:
+                problems.append(f"{name} slowed down from {before * 1000:.2f} ms to {after * 1000:.2f} ms.")
+        return problems
+
+
+def open_window():
+    """Opens a hidden Tk window, starting a virtual display if there is no real one."""
+    import tkinter as tk
+    try:
+        return tk.Tk(), None
+    except tk.TclError:
+        display = start_virtual_display()
+        if display is None:
+            raise
+        return tk.Tk(), display
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test the menu planner's GUI with scripted sessions.")
+    parser.add_argument("--sessions", type=int, default=1000, help="number of customer sessions (default: 1000)")
+    parser.add_argument("--items", type=int, default=30, help="items per category in the test catalog (default: 30)")
+    parser.add_argument("--sample-every", type=int, default=50,
+                        help="sessions between widget and memory samples (default: 50)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="-", help="file for the JSON report (default: print it)")
+    args = parser.parse_args()
+
+    try:
+        root, display = open_window()
+    except Exception as error:
+        print(f"Tkinter could not open a window: {error}\nInstall Xvfb or run under xvfb-run.", file=sys.stderr)
+        return 2
+
+    menu = synthetic_menu(args.items)
+    previous_folder = os.getcwd()
+    with tempfile.TemporaryDirectory() as folder:
+        # The app reads the catalog and writes receipts and autosaves relative to the working folder
+        catalog_path = os.path.join(folder, "menu.json")
+        with open(catalog_path, "w") as file:
+            json.dump(menu, file)
+        os.environ["MENU_PLANNER_CATALOG"] = catalog_path
+        os.chdir(folder)
+        try:
+            root.withdraw()
+            report = SoakTest(root, menu, args.seed).run(args.sessions, args.sample_every)
+        finally:
+            os.chdir(previous_folder)
+            root.destroy()
+            if display is not None:
+                display.terminate()
+
+    text = json.dumps(report, indent=4)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    for problem in report["problems"]:
+        print(f"PROBLEM {problem}", file=sys.stderr)
+    if not report["problems"]:
+        print(f"No leaks or slowdowns in {args.sessions} sessions.", file=sys.stderr)
+    return 1 if report["problems"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
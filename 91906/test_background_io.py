@@ -0,0 +1,113 @@
+# W. Fifita Menu Planner - Background I/O Tests
+
+"""Checks the background worker and autosaver with a stand-in for the Tk root."""
+
+import time
+
+import pytest
+
+from background_io import Autosaver, BackgroundWorker, read_json
+
+
+class FakeRoot:
+    """The parts of a Tk root the worker uses. Scheduled callbacks only run when run_due() says so."""
+
+    def __init__(self):
+        self.scheduled = {}
+        self.next_id = 0
+        self.errors = []
+
+    def after(self, ms, callback):
+        self.next_id += 1
+        self.scheduled[self.next_id] = callback
+        return self.next_id
+
+    def after_cancel(self, timer):
+        self.scheduled.pop(timer, None)
+
+    def report_callback_exception(self, kind, error, traceback):
+        self.errors.append(error)
+
+    def run_due(self):
+        callbacks, self.scheduled = list(self.scheduled.values()), {}
+        for callback in callbacks:
+            callback()
+
+    def run_until(self, done, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not done():
+            assert time.monotonic() < deadline, "timed out waiting for the worker"
+            time.sleep(0.001)
+            self.run_due()
+
+
+@pytest.fixture
+def root():
+    return FakeRoot()
+
+
+@pytest.fixture
+def worker(root):
+    worker = BackgroundWorker(root)
+    yield worker
+    worker.close()
+
+
+def test_callbacks_run_in_order_on_the_polling_thread(root, worker):
+    results = []
+    for number in range(5):
+        worker.submit(lambda number=number: number * number, results.append)
+    assert results == []  # Nothing runs until the main loop polls
+    root.run_until(lambda: len(results) == 5)
+    assert results == [0, 1, 4, 9, 16]
+    assert worker.pending == 0 and root.scheduled == {}
+
+
+def test_errors_go_to_on_error(root, worker):
+    errors = []
+    worker.submit(lambda: 1 / 0, on_error=errors.append)
+    root.run_until(lambda: errors)
+    assert isinstance(errors[0], ZeroDivisionError)
+
+
+def test_a_failing_callback_does_not_stop_polling(root, worker):
+    results = []
+
+    def fail(result):
+        raise RuntimeError("callback failed")
+
+    worker.submit(lambda: 1, fail)
+    worker.submit(lambda: 2, results.append)
+    root.run_until(lambda: results)
+    assert results == [2]
+    assert [str(error) for error in root.errors] == ["callback failed"]
+
+
+def test_autosaver_coalesces_changes(root, worker, tmp_path):
+    path = str(tmp_path / "autosave.json")
+    saver = Autosaver(root, worker, path)
+    for budget in range(10):
+        saver.schedule({"budget": budget})
+    assert len(root.scheduled) == 1
+    root.run_due()  # The delay is up
+    root.run_until(lambda: worker.pending == 0)
+    assert read_json(path) == {"budget": 9}
+
+    loaded = []
+    saver.load(loaded.append)
+    root.run_until(lambda: loaded)
+    assert loaded == [{"budget": 9}]
+
+
+def test_clear_cancels_the_pending_save_and_deletes_the_file(root, worker, tmp_path):
+    path = tmp_path / "autosave.json"
+    saver = Autosaver(root, worker, str(path))
+    saver.schedule({"budget": 1})
+    saver.flush()
+    root.run_until(lambda: worker.pending == 0)
+    assert path.exists()
+    saver.schedule({"budget": 2})
+    saver.clear()
+    root.run_until(lambda: worker.pending == 0)
+    assert not path.exists()
+    assert root.scheduled == {}
@@ -0,0 +1,102 @@
+# W. Fifita Menu Planner - Batch Planner Tests
+
+"""Checks that batch orders are validated and priced like the interactive planner prices them."""
+
+import argparse
+import importlib.util
+import io
+import json
+import os
+
+import pytest
+
+from batch_planner import read_chunks, run_batch, run_batch_parallel
+
+MENU = {
+    "food": {"Burger": {"price": 500}, "Pizza": {"price": 750}},
+    "drink": {"Water": {"price": 100}},
+    "dessert": {"Cake": {"price": 350}},
+}
+
+ORDERS = """budget,food,drink,dessert
+12,burger,Water,CAKE
+{"budget": 12.5, "food": "Pizza", "drink": "Water", "dessert": "Cake"}
+
+5,Burger,Water,Cake
+abc,Burger,Water,Cake
+0,Burger,Water,Cake
+12,Steak,Water,Cake
+12,Burger,Water
+{"budget": 12
+"""
+
+
+def load_iteration_1():
+    """Imports menu-planner_iteration-1.py, whose name is not a valid module name."""
+    path = os.path.join(os.path.dirname(__file__), "menu-planner_iteration-1.py")
+    spec = importlib.util.spec_from_file_location("menu_planner_iteration_1", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def batch(text, menu=MENU):
+    output = io.StringIO()
+    counts = run_batch(io.StringIO(text), output, menu)
+    return counts, [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def test_orders_are_priced_in_cents():
+    counts, results = batch(ORDERS)
+    assert counts == (8, 6)
+    assert results[0] == {"line": 2, "food": "Burger", "drink": "Water", "dessert": "Cake",
+                          "budget_cents": 1200, "total_cents": 950, "remaining_cents": 250}
+    assert results[1]["budget_cents"] == 1250 and results[1]["remaining_cents"] == 50
+
+
+def test_each_bad_line_gets_its_own_error():
+    counts, results = batch(ORDERS)
+    assert [(result["line"], result["error"]) for result in results[2:]] == [
+        (5, "Selections exceed the budget."),
+        (6, "Budget must be a dollar amount."),
+        (7, "Budget must be greater than zero."),
+        (8, "Invalid food choice: Steak"),
+        (9, "Expected 4 values: budget, food, drink, dessert."),
+        (10, "Invalid JSON."),
+    ]
+    assert results[2]["total_cents"] == 950
+
+
+def test_quoted_values_and_other_categories():
+    menu = {"main": {"Fish, chips": {"price": 900}}, "side": {"Peas": {"price": 150}}}
+    counts, results = batch('20,"fish, chips",Peas\n', menu)
+    assert counts == (1, 0)
+    assert results == [{"line": 1, "main": "Fish, chips", "side": "Peas",
+                        "budget_cents": 2000, "total_cents": 1050, "remaining_cents": 950}]
+
+
+def test_chunks_end_on_line_breaks():
+    data = b"".join(b"%d,Burger,Water,Cake\n" % budget for budget in range(100)) + b"7,Burger"
+    chunks = list(read_chunks(io.BytesIO(data), 64))
+    assert b"".join(chunk for first_line, chunk in chunks) == data
+    assert all(chunk.endswith(b"\n") for first_line, chunk in chunks[:-1])
+    for first_line, chunk in chunks:
+        assert data.split(b"\n")[first_line - 1] == chunk.split(b"\n")[0]
+
+
+def test_parallel_output_matches_one_process():
+    orders = ORDERS * 50
+    expected = io.StringIO()
+    counts = run_batch(io.StringIO(orders), expected, MENU)
+    output = io.StringIO()
+    assert run_batch_parallel(io.BytesIO(orders.encode()), output, MENU, workers=2, chunk_bytes=100) == counts
+    assert output.getvalue() == expected.getvalue()
+
+
+def test_worker_count():
+    worker_count = load_iteration_1().worker_count
+    assert worker_count("3") == 3
+    assert worker_count("0") == worker_count("auto") == (os.cpu_count() or 1)
+    for text in ["-1", "two", ""]:
+        with pytest.raises(argparse.ArgumentTypeError):
+            worker_count(text)
@@ -0,0 +1,123 @@
+# W. Fifita Menu Planner - Catalog Loader Tests
+
+"""Checks that catalogs load from CSV and JSON lazily, and are only reloaded when the file changes."""
+
+import json
+
+import pytest
+
+from catalog_loader import CatalogError, CatalogLoader, check_item, load_csv, load_json
+from planner_engine import menu as default_menu
+
+CATALOG = {
+    "food": {"Burger": {"price": 500, "description": "Beef burger", "rating": 4.5},
+             "Pizza": {"price": 750, "description": "Cheese pizza"}},
+    "drink": {"Water": {"price": 100, "description": "Still water"}},
+}
+
+CSV = """category,item,price_cents,description,rating
+food,Burger,500,Beef burger,4.5
+drink,Water,100,Still water,
+food,Pizza,750,Cheese pizza
+"""
+
+
+def test_json_catalog(tmp_path):
+    path = tmp_path / "menu.json"
+    path.write_text(json.dumps(CATALOG))
+    assert dict(load_json(str(path))) == CATALOG
+
+
+def test_csv_catalog(tmp_path):
+    path = tmp_path / "menu.csv"
+    path.write_text(CSV)
+    assert dict(load_csv(str(path))) == CATALOG
+
+
+def test_csv_categories_are_parsed_when_first_used(tmp_path):
+    path = tmp_path / "menu.csv"
+    path.write_text(CSV)
+    menu = load_csv(str(path))
+    assert menu.loaded is None
+    assert list(menu) == ["food", "drink"]
+    assert menu.parsed == {}
+    assert menu["drink"]["Water"]["price"] == 100
+    assert list(menu.parsed) == ["drink"]
+
+
+def test_quoted_category_with_a_comma(tmp_path):
+    path = tmp_path / "menu.csv"
+    path.write_text('category,item,price_cents,description\n"Sides, hot",Chips,300,"Salted, crisp"\n')
+    assert load_csv(str(path))["Sides, hot"]["Chips"] == {"price": 300, "description": "Salted, crisp"}
+
+
+def test_missing_file_uses_the_built_in_menu(tmp_path):
+    loader = CatalogLoader(str(tmp_path / "missing.json"))
+    assert dict(loader.menu()) == dict(default_menu)
+
+
+def test_reloads_only_when_the_file_changes(tmp_path):
+    path = tmp_path / "menu.json"
+    path.write_text(json.dumps(CATALOG))
+    loader = CatalogLoader(str(path))
+    menu = loader.menu()
+    assert loader.menu() is menu
+    assert not loader.has_changed()
+    changed = json.loads(json.dumps(CATALOG))
+    changed["food"]["Burger"]["price"] = 5000
+    path.write_text(json.dumps(changed))
+    assert loader.has_changed()
+    assert loader.menu()["food"]["Burger"]["price"] == 5000
+
+
+def test_csv_prices_in_dollars_are_read_as_cents(tmp_path):
+    path = tmp_path / "menu.csv"
+    path.write_text("category,item,price,description\nfood,Burger,4.50,Beef burger\nfood,Pizza,7,Cheese pizza\n")
+    assert load_csv(str(path))["food"] == {"Burger": {"price": 450, "description": "Beef burger"},
+                                           "Pizza": {"price": 700, "description": "Cheese pizza"}}
+
+
+@pytest.mark.parametrize("details", [
+    {"description": ""},
+    {"price": 500},
+    {"price": 0, "description": ""},
+    {"price": -5, "description": ""},
+    {"price": 4.5, "description": ""},
+    {"price": True, "description": ""},
+    {"price": "500", "description": ""},
+    {"price": 500, "description": None},
+    {"price": 500, "description": "", "rating": 6},
+    {"price": 500, "description": "", "rating": "good"},
+    "Burger",
+])
+def test_bad_items_are_rejected(details):
+    with pytest.raises(CatalogError, match="Burger"):
+        check_item("food", "Burger", details)
+
+
+def test_a_null_rating_is_left_out():
+    assert check_item("food", "Burger", {"price": 500, "description": "", "rating": None}) == \
+        {"price": 500, "description": ""}
+    assert check_item("food", "Burger", {"price": 500, "description": "", "rating": 0})["rating"] == 0
+
+
+@pytest.mark.parametrize("text", [
+    "category,item,price_cents,description\nfood,Burger,4.50,Beef burger\n",
+    "category,item,price_cents,description\nfood,Burger,0,Beef burger\n",
+    "category,item,price_cents,description\nfood,Burger,500\n",
+    "category,item,price_cents,description,rating\nfood,Burger,500,Beef,lots\n",
+])
+def test_bad_csv_rows_are_rejected_when_their_category_loads(tmp_path, text):
+    path = tmp_path / "menu.csv"
+    path.write_text(text)
+    menu = load_csv(str(path))
+    with pytest.raises(CatalogError):
+        menu["food"]
+
+
+@pytest.mark.parametrize("text", ["{nope", "[]", "{}", '{"food": {}}', '{"food": {"Burger": {"price": 4.5, "description": ""}}}'])
+def test_bad_json_catalogs_are_rejected(tmp_path, text):
+    path = tmp_path / "menu.json"
+    path.write_text(text)
+    with pytest.raises(CatalogError):
+        list(load_json(str(path)))
@@ -0,0 +1,70 @@
+# W. Fifita Menu Planner - Catalog Snapshot Tests
+
+"""Checks that price updates make new snapshots and leave older ones, and plans on them, unchanged."""
+
+import gc
+import json
+
+import pytest
+
+from catalog_loader import CatalogLoader
+from catalog_snapshot import CatalogSnapshot, new_version
+from planner_engine import MenuPlan
+
+MENU = {
+    "food": {"Burger": {"price": 500, "description": "Beef"}, "Pizza": {"price": 800, "description": "Cheese"}},
+    "drink": {"Water": {"price": 100, "description": "Still"}},
+}
+
+
+def test_versions_always_increase():
+    versions = [new_version() for _ in range(1000)]
+    assert versions == sorted(set(versions))
+
+
+def test_price_updates_copy_only_what_changed():
+    old = CatalogSnapshot(MENU)
+    new = old.with_prices({"food": {"Pizza": 900}})
+    assert new.version > old.version
+    assert new["food"]["Pizza"] == {"price": 900, "description": "Cheese"}
+    assert old["food"]["Pizza"]["price"] == 800
+    assert new["food"]["Burger"] is MENU["food"]["Burger"]
+    assert new["drink"] is MENU["drink"]
+    assert list(new) == list(MENU) and list(new["food"]) == list(MENU["food"])
+
+    newer = new.with_prices({"food": {"Burger": 550}})
+    assert {item: details["price"] for item, details in newer["food"].items()} == {"Burger": 550, "Pizza": 900}
+    assert newer["food"].unchanged is MENU["food"]  # Overlays do not stack up
+    assert new["food"]["Burger"]["price"] == 500
+
+
+@pytest.mark.parametrize("changes, error", [
+    ({"food": {"Steak": 900}}, KeyError),
+    ({"dessert": {"Cake": 900}}, KeyError),
+    ({"food": {"Pizza": 0}}, ValueError),
+    ({"food": {"Pizza": -100}}, ValueError),
+    ({"food": {"Pizza": 9.5}}, ValueError),
+    ({"food": {"Pizza": True}}, ValueError),
+])
+def test_bad_updates_are_rejected(changes, error):
+    with pytest.raises(error):
+        CatalogSnapshot(MENU).with_prices(changes)
+
+
+def test_plans_keep_the_prices_they_were_made_with(tmp_path):
+    path = tmp_path / "menu.json"
+    path.write_text(json.dumps(MENU))
+    loader = CatalogLoader(str(path))
+    plan = MenuPlan(loader.menu())
+    plan.set_choice("food", "Pizza")
+    version = plan.menu.version
+
+    snapshot = loader.update_prices({"food": {"Pizza": 1000}})
+    assert loader.menu() is snapshot
+    assert plan.total == 800 and plan.menu["food"]["Pizza"]["price"] == 800
+    assert loader.snapshot(version) is plan.menu
+    assert plan.price_changes(snapshot) == [("food", "Pizza", 800, 1000)]
+
+    del plan
+    gc.collect()
+    assert loader.snapshot(version) is None  # Nothing uses the old snapshot any more
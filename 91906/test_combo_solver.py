@@ -0,0 +1,52 @@
+# W. Fifita Menu Planner - Combination Solver Tests
+
+"""Checks CombinationSolver against trying every meal on small random menus."""
+
+import random
+
+import pytest
+
+from combo_solver import CombinationSolver, affordable_combinations
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_count_matches_brute_force(seed, random_menu, every_meal):
+    rng = random.Random(seed)
+    menu = random_menu(rng, categories=rng.randint(1, 5))
+    solver = CombinationSolver(menu)
+    totals = [total for total, items in every_meal(menu)]
+    for budget in sorted(set(totals)) + [0, min(totals) - 1, max(totals) + 1]:
+        assert solver.count(budget) == sum(total <= budget for total in totals)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_combinations_are_every_affordable_meal_cheapest_first(seed, random_menu, every_meal):
+    rng = random.Random(seed)
+    menu = random_menu(rng, categories=rng.randint(1, 4))
+    solver = CombinationSolver(menu)
+    meals = every_meal(menu)
+    budget = rng.choice(meals)[0]
+    found = solver.combinations(budget)
+    assert [total for total, items in found] == sorted(total for total, items in meals if total <= budget)
+    assert sorted(found) == sorted(meal for meal in meals if meal[0] <= budget)
+    assert solver.combinations(budget, limit=2) == found[:2]
+
+
+def test_cheapest_total(random_menu, every_meal):
+    menu = random_menu(random.Random(1))
+    assert CombinationSolver(menu).cheapest_total() == min(total for total, items in every_meal(menu))
+
+
+def test_budget_below_the_cheapest_meal(random_menu):
+    menu = random_menu(random.Random(2))
+    solver = CombinationSolver(menu)
+    cheapest = solver.cheapest_total()
+    assert solver.count(cheapest - 1) == 0
+    assert solver.combinations(cheapest - 1) == []
+    assert affordable_combinations(cheapest, menu) == solver.combinations(cheapest)
+
+
+def test_empty_category_is_rejected():
+    menu = {"food": {"Burger": {"price": 500, "description": ""}}, "drink": {}}
+    with pytest.raises(ValueError, match="drink"):
+        CombinationSolver(menu)
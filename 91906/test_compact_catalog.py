@@ -0,0 +1,91 @@
+# W. Fifita Menu Planner - Compact Catalog Tests
+
+"""Checks that a CompactCatalog reads like the menu dict it replaces, however it is loaded."""
+
+import io
+import json
+import random
+
+import pytest
+
+import catalog_loader
+from catalog_loader import CatalogError, CatalogLoader, load_compact, read_json_catalog, stream_json_catalog
+from compact_catalog import CompactCatalog, StringTable
+
+
+def as_dict(menu):
+    return {category: {item: dict(menu[category][item]) for item in menu[category]} for category in menu}
+
+
+def test_reads_like_the_menu_dict(random_menu):
+    rng = random.Random(4)
+    for _ in range(20):
+        menu = random_menu(rng, categories=rng.randint(1, 4), most_items=30, rated=True)
+        for items in menu.values():
+            for details in items.values():
+                if details.get("rating") is None:
+                    details.pop("rating", None)
+        catalog = CompactCatalog.from_menu(menu)
+        assert as_dict(catalog) == menu
+        assert list(catalog) == list(menu)
+        for category in menu:
+            assert len(catalog[category]) == len(menu[category])
+            assert "missing" not in catalog[category]
+
+
+def test_same_name_in_two_categories_and_updates():
+    catalog = CompactCatalog()
+    first = catalog.add_item("food", "Special", 900, "Chef's choice", 4.5)
+    second = catalog.add_item("dessert", "Special", 400, "Chef's choice")
+    assert first != second
+    assert catalog.item(first) == ("food", "Special") and catalog.item(second) == ("dessert", "Special")
+    assert catalog.add_item("food", "Special", 950, "New recipe") == first
+    assert catalog["food"]["Special"] == {"price": 950, "description": "New recipe"}
+    assert catalog["dessert"]["Special"] == {"price": 400, "description": "Chef's choice"}
+    assert len(catalog.descriptions) == 2
+    with pytest.raises(KeyError):
+        catalog.item_id("food", "Nothing")
+
+
+def test_string_table_grows_and_interns():
+    table = StringTable()
+    numbers = [table.intern(f"word {i % 500}") for i in range(2000)]
+    assert len(table) == 500
+    assert numbers[:500] == list(range(500)) and numbers[500:1000] == list(range(500))
+    assert table.find("word 42") == 42 and table[42] == "word 42"
+    assert table.find("word 500") == -1
+
+
+def test_streamed_json_matches_parsing_it_whole(tmp_path, random_menu, monkeypatch):
+    monkeypatch.setattr(catalog_loader, "JSON_CHUNK", 7)  # Values are split across many chunks
+    menu = random_menu(random.Random(8), categories=3, most_items=40)
+    menu["food \"quoted\""] = {"Café {latte}": {"price": 450, "description": "Line\nbreak, \"quote\"", "rating": 0}}
+    text = json.dumps(menu, indent=1)
+    path = tmp_path / "menu.json"
+    path.write_text(text, encoding="utf-8")
+    assert as_dict(load_compact(str(path))) == read_json_catalog(io.BytesIO(text.encode()))
+
+
+def test_csv_loads_compact(tmp_path):
+    path = tmp_path / "menu.csv"
+    path.write_text("category,item,price_cents,description,rating\nfood,Burger,500,Beef,4.5\ndrink,Water,100,Still,\n")
+    assert as_dict(load_compact(str(path))) == {"food": {"Burger": {"price": 500, "description": "Beef", "rating": 4.5}},
+                                                "drink": {"Water": {"price": 100, "description": "Still"}}}
+
+
+@pytest.mark.parametrize("text", [
+    "", "[]", "{}", '{"food": []}', '{"food": {}}', '{"food": {"Burger": {"price": 500}}}',
+    '{"food": {"Burger": {"price": 500, "description": ""}}', '{"food": {"Burger": {"price": 500, "description": ""}}} x',
+])
+def test_bad_json_is_rejected_while_streaming(text):
+    with pytest.raises(CatalogError):
+        list(stream_json_catalog(io.StringIO(text)))
+
+
+def test_loader_chooses_compact_for_big_files(tmp_path, monkeypatch):
+    path = tmp_path / "menu.json"
+    path.write_text(json.dumps({"food": {"Burger": {"price": 500, "description": ""}}}))
+    assert not isinstance(CatalogLoader(str(path)).menu().base, CompactCatalog)
+    monkeypatch.setattr(catalog_loader, "COMPACT_BYTES", 10)
+    assert isinstance(CatalogLoader(str(path)).menu().base, CompactCatalog)
+    assert isinstance(CatalogLoader(str(path), compact=True).menu().base, CompactCatalog)
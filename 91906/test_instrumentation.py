@@ -0,0 +1,72 @@
+# W. Fifita Menu Planner - Instrumentation Tests
+
+"""Checks the latency histograms and that nothing is wrapped while instrumentation is off."""
+
+import pytest
+
+import instrumentation
+from instrumentation import Histogram, callback_name, instrument_methods, timed
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    """Turns instrumentation on with empty histograms for one test."""
+    monkeypatch.setattr(instrumentation, "ENABLED", True)
+    monkeypatch.setattr(instrumentation, "histograms", {})
+    return instrumentation.histograms
+
+
+def add(x, y):
+    return x + y
+
+
+class Store:
+    def append(self, receipt):
+        return 7
+
+
+def test_off_by_default_and_adds_no_wrapper(monkeypatch):
+    monkeypatch.setattr(instrumentation, "ENABLED", False)
+    assert timed("add")(add) is add
+    store = Store()
+    instrument_methods(store, ["append"], "store")
+    assert "append" not in vars(store)
+
+
+def test_timed_calls_are_recorded(enabled):
+    timed_add = timed("add")(add)
+    assert timed_add.__name__ == "add"
+    assert [timed_add(1, number) for number in range(3)] == [1, 2, 3]
+    store = instrument_methods(Store(), ["append", "missing"], "store")
+    assert store.append({}) == 7
+    assert enabled["add"].count == 3
+    assert enabled["store.append"].count == 1
+    assert "store.missing" not in enabled
+    lines = instrumentation.report().splitlines()
+    assert len(lines) == 3 and lines[0].startswith("call")
+
+
+def test_failing_calls_are_timed_too(enabled):
+    @timed()
+    def fail():
+        raise KeyError("x")
+
+    with pytest.raises(KeyError):
+        fail()
+    assert enabled["test_failing_calls_are_timed_too.<locals>.fail"].count == 1
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    for microseconds in [10] * 90 + [5000] * 10:
+        histogram.add(microseconds / 1e6)
+    assert histogram.count == 100
+    assert histogram.longest == pytest.approx(0.005)
+    assert 10e-6 <= histogram.percentile(0.5) <= 16e-6
+    assert histogram.percentile(0.95) == pytest.approx(0.005)
+    assert Histogram().percentile(0.5) == 0
+
+
+def test_callback_names():
+    assert callback_name(Store().append) == "Store.append"
+    assert callback_name(add) == "add"
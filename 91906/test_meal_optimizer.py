@@ -0,0 +1,142 @@
+# W. Fifita Menu Planner - Meal Optimizer Tests
+
+"""Checks MealOptimizer's plans against trying every group plan on small random menus."""
+
+import itertools
+import random
+import time
+
+import pytest
+
+import meal_optimizer
+from meal_optimizer import MealOptimizer, suggest_plan, upper_hull
+
+
+def small_menu(random_menu, rng):
+    """1 to 3 categories of up to 4 rated items, small enough to try every group plan."""
+    return random_menu(rng, categories=rng.randint(1, 3), most_items=4, rated=True)
+
+
+def best_score(menu, budget, people):
+    """The best total rating of any plan within the budget, by brute force, or None if none fits."""
+    meals = itertools.product(*([(details["price"], details.get("rating") or 0) for details in menu[category].values()]
+                                for category in menu))
+    best = None
+    for plan in itertools.combinations_with_replacement(list(meals), people):
+        cost = sum(price for meal in plan for price, score in meal)
+        score = sum(score for meal in plan for price, score in meal)
+        if cost <= budget and (best is None or score > best):
+            best = score
+    return best
+
+
+def check_plan(menu, budget, people, result):
+    """The plan's meals are real items, one meal per person, and cost what it says within budget."""
+    score, cost, meals = result
+    assert len(meals) == people
+    assert all(len(meal) == len(menu) for meal in meals)
+    assert cost == sum(menu[category][item]["price"] for meal in meals for category, item in zip(menu, meal))
+    assert cost <= budget
+    assert score == pytest.approx(sum(menu[category][item].get("rating") or 0
+                                      for meal in meals for category, item in zip(menu, meal)))
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_best_plan_matches_brute_force(random_menu, seed):
+    rng = random.Random(seed)
+    menu = small_menu(random_menu, rng)
+    people = rng.randint(1, 3)
+    budget = rng.randint(0, 900)
+    expected = best_score(menu, budget, people)
+    result = MealOptimizer(menu).best_plan(budget, people)
+    if expected is None:
+        assert result is None
+    else:
+        assert result[0] == pytest.approx(expected)
+        check_plan(menu, budget, people, result)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_search_and_greedy_plans(random_menu, seed):
+    rng = random.Random(seed)
+    menu = small_menu(random_menu, rng)
+    people = rng.randint(1, 3)
+    optimizer = MealOptimizer(menu)
+    budget = optimizer.cheapest_meal * people + rng.randint(0, 500)
+    expected = best_score(menu, budget, people)
+
+    result = optimizer.search_plan(budget, people)
+    assert optimizer.exhaustive
+    assert result[0] == pytest.approx(expected)
+    check_plan(menu, budget, people, result)
+
+    score, cost, choices = optimizer.greedy_plan(budget, people)
+    assert cost <= budget
+    assert score <= expected + 1e-9
+    assert len(choices) == people * len(menu)
+
+
+def test_search_cut_short_still_returns_a_plan(monkeypatch):
+    # Every strategy runs out of time straight away, so the greedy plan is what comes back
+    monkeypatch.setattr(meal_optimizer, "TIME_LIMIT", -1)
+    rng = random.Random(7)
+    menu = {category: {f"{category}{i}": {"price": rng.randint(50, 600), "description": "",
+                                          "rating": rng.uniform(1, 5)} for i in range(30)}
+            for category in ("food", "drink", "dessert")}
+    optimizer = MealOptimizer(menu)
+    result = optimizer.best_plan(10_000, 30)
+    assert not optimizer.exhaustive
+    check_plan(menu, 10_000, 30, result)
+    assert not optimizer.memo  # A plan that is not proven best is not remembered
+
+
+def test_memo_is_bounded(random_menu, monkeypatch):
+    monkeypatch.setattr(meal_optimizer, "MEMO_SIZE", 3)
+    menu = small_menu(random_menu, random.Random(3))
+    optimizer = MealOptimizer(menu)
+    for budget in range(1000, 1010):
+        optimizer.best_plan(budget)
+    assert list(optimizer.memo) == [(1007, 1), (1008, 1), (1009, 1)]
+    optimizer.best_plan(1007)
+    optimizer.best_plan(1010)
+    assert list(optimizer.memo) == [(1009, 1), (1007, 1), (1010, 1)]
+
+
+def test_no_plan_fits():
+    menu = {"food": {"Burger": {"price": 500, "description": "", "rating": 4}}}
+    assert suggest_plan(499, 1, menu) is None
+    assert suggest_plan(999, 2, menu) is None
+    assert suggest_plan(1000, 0, menu) is None
+    assert suggest_plan(1000, 2, menu) == (8, 1000, [("Burger",), ("Burger",)])
+
+
+def test_upper_hull():
+    options = [(100, 1, "a"), (200, 3, "b"), (300, 4, "c"), (400, 5, "d"), (500, 8, "e")]
+    assert upper_hull(options) == [0, 1, 4]
+    assert upper_hull(options[:1]) == [0]
+
+
+def correlated_menu(rng, items):
+    """Ratings that rise with price, so almost every item is on its category's Pareto frontier."""
+    return {category: {f"{category}{i}": {"price": price, "description": "", "rating": price / 600 + rng.uniform(0, 0.01)}
+                       for i, price in enumerate(rng.sample(range(100, 3000), items))}
+            for category in ("food", "drink", "dessert")}
+
+
+@pytest.mark.parametrize("people", [30, 400])
+def test_large_groups_finish_in_time(people):
+    menu = correlated_menu(random.Random(people), 1000)
+    optimizer = MealOptimizer(menu)
+    assert min(len(options) for options in optimizer.options) > 500
+    start = time.perf_counter()
+    result = optimizer.best_plan(people * 1500, people)
+    assert time.perf_counter() - start < meal_optimizer.TIME_LIMIT + 0.5
+    check_plan(menu, people * 1500, people, result)
+
+
+def test_greedy_plan_stops_at_its_deadline():
+    menu = correlated_menu(random.Random(5), 1000)
+    optimizer = MealOptimizer(menu)
+    score, cost, choices = optimizer.greedy_plan(10**9, 50, deadline=0)
+    assert choices == [0] * 150  # Everyone is still on the cheapest meal
+    assert cost == optimizer.cheapest_meal * 50
@@ -0,0 +1,46 @@
+# W. Fifita Menu Planner - Money Tests
+
+"""Checks the conversions between dollar amounts and whole cents."""
+
+import pytest
+
+from money import format_cents, parse_cents, receipt_cents, to_cents
+
+
+@pytest.mark.parametrize("text, cents", [
+    ("12", 1200), ("12.5", 1250), ("12.50", 1250), ("$12.05", 1205), (" 1,200 ", 120000),
+    (".5", 50), ("7.", 700), ("-3.25", -325), ("0", 0),
+])
+def test_parse_cents(text, cents):
+    assert parse_cents(text) == cents
+
+
+@pytest.mark.parametrize("text", ["", "$", "abc", "1.234", "1.2.3", "12a", "--1", "1e3"])
+def test_parse_cents_rejects(text):
+    with pytest.raises(ValueError):
+        parse_cents(text)
+
+
+@pytest.mark.parametrize("amount, cents", [(12, 1200), (8.95, 895), (0.1 + 0.2, 30), (12.5, 1250), ("4.50", 450)])
+def test_to_cents(amount, cents):
+    assert to_cents(amount) == cents
+
+
+@pytest.mark.parametrize("amount", [True, None, float("nan"), float("inf"), "twelve"])
+def test_to_cents_rejects(amount):
+    with pytest.raises(ValueError):
+        to_cents(amount)
+
+
+def test_format_round_trips():
+    for cents in range(-1000, 1000, 7):
+        assert parse_cents(format_cents(cents)) == cents
+    assert format_cents(5) == "0.05"
+    assert format_cents(-1250) == "-12.50"
+
+
+def test_receipt_cents_reads_old_and_new_receipts():
+    assert receipt_cents({"total_cents": 1150, "total": 99}, "total") == 1150
+    assert receipt_cents({"total": 11.5}, "total") == 1150
+    assert receipt_cents({"budget": None}, "budget") is None
+    assert receipt_cents({}, "budget") is None
@@ -0,0 +1,170 @@
+# W. Fifita Menu Planner - Planning Engine Tests
+
+"""Checks that MenuPlan and Basket keep their running totals right through every kind of change."""
+
+import random
+
+import pytest
+
+from planner_engine import Basket, MenuPlan, menu
+
+
+def recount(plan):
+    """The plan's total summed from scratch, to compare with the running total."""
+    return (sum(plan.menu[category][item]["price"] for category, item in plan.choices.items())
+            + sum(plan.menu[category][item]["price"] * quantity
+                  for (category, item), quantity in plan.basket.quantities.items()))
+
+
+def repriced(changes):
+    """A copy of the default menu with some prices changed ({(category, item): cents})."""
+    new_menu = {category: {item: dict(details) for item, details in items.items()} for category, items in menu.items()}
+    for (category, item), price in changes.items():
+        new_menu[category][item]["price"] = price
+    return new_menu
+
+
+def test_running_total_follows_choices():
+    plan = MenuPlan(menu, 2000)
+    plan.set_choice("food", "Burger")
+    plan.set_choice("drink", "Juice")
+    assert plan.total == 800
+    plan.set_choice("food", "Pizza")  # Changing a choice replaces its price
+    assert plan.total == 1100
+    assert plan.remaining == 900
+    assert plan.price_of("food") == 800
+    assert plan.price_of("dessert") == 0
+    plan.clear_choice("drink")
+    plan.clear_choice("drink")
+    assert plan.total == 800
+    assert plan.choices == {"food": "Pizza"}
+
+
+def test_unknown_item_leaves_the_plan_alone():
+    plan = MenuPlan(menu, 2000)
+    plan.set_choice("food", "Burger")
+    with pytest.raises(KeyError):
+        plan.set_choice("food", "Steak")
+    with pytest.raises(KeyError):
+        plan.add_item("drink", "Wine")
+    assert plan.total == 500
+    assert plan.choices == {"food": "Burger"}
+
+
+@pytest.mark.parametrize("budget", [0, -100, 12.5, "1200"])
+def test_budget_must_be_positive_cents(budget):
+    with pytest.raises(ValueError):
+        MenuPlan(menu).set_budget(budget)
+
+
+def test_complete_and_over_budget():
+    plan = MenuPlan(menu, 1000)
+    plan.set_choice("food", "Pizza")
+    plan.set_choice("drink", "Water")
+    assert not plan.is_complete()
+    assert not plan.is_over_budget()
+    plan.set_choice("dessert", "Pie")
+    assert plan.is_complete()
+    assert plan.is_over_budget()
+    plan.reset()
+    assert (plan.budget, plan.total, plan.choices, len(plan.basket)) == (0, 0, {}, 0)
+
+
+def test_basket_quantities():
+    basket = Basket(menu)
+    assert basket.add("food", "Burger", 3) == 1500
+    basket.add("drink", "Soda")
+    basket.add("food", "Burger", 2)
+    assert basket.quantity("food", "Burger") == 5
+    assert basket.item_count() == 6
+    assert len(basket) == 2
+    assert basket.total == 2700
+    assert list(basket.lines()) == [("food", "Burger", 5, 500, 2500), ("drink", "Soda", 1, 200, 200)]
+    assert basket.to_list() == [["food", "Burger", 5], ["drink", "Soda", 1]]
+    assert basket.price_list() == [500, 200]
+
+    assert basket.remove("food", "Burger", 2) == 1000
+    assert basket.remove("drink", "Soda") == 200
+    assert basket.remove("drink", "Soda") == 0
+    assert basket.to_list() == [["food", "Burger", 3]]
+    assert basket.total == 1500
+
+
+@pytest.mark.parametrize("quantity", [0, -1, 1.5, "2"])
+def test_basket_quantity_must_be_positive(quantity):
+    with pytest.raises(ValueError):
+        Basket(menu).add("food", "Burger", quantity)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_running_total_after_random_changes(seed):
+    rng = random.Random(seed)
+    plan = MenuPlan(menu, 5000)
+    items = [(category, item) for category in menu for item in menu[category]]
+    for _ in range(200):
+        category, item = rng.choice(items)
+        action = rng.randrange(5)
+        if action == 0:
+            plan.set_choice(category, item)
+        elif action == 1:
+            plan.clear_choice(category)
+        elif action == 2:
+            plan.add_item(category, item, rng.randint(1, 4))
+        elif action == 3:
+            plan.remove_item(category, item, rng.choice([None, 1, 2]))
+        else:
+            plan.clear_basket()
+        assert plan.total == recount(plan)
+        assert plan.basket.total == recount(plan) - sum(plan.prices.values())
+
+
+def test_price_changes_and_reprice():
+    plan = MenuPlan(menu, 5000)
+    plan.set_choice("food", "Burger")
+    plan.set_choice("drink", "Soda")
+    plan.add_item("food", "Burger", 2)
+    plan.add_item("dessert", "Pie", 1)
+
+    new_menu = repriced({("food", "Burger"): 550})
+    del new_menu["dessert"]["Pie"]
+    del new_menu["drink"]["Soda"]
+    assert plan.price_changes(menu) == []
+    assert plan.price_changes(new_menu) == [("food", "Burger", 500, 550), ("drink", "Soda", 200, None),
+                                            ("dessert", "Pie", 300, None)]
+
+    assert plan.reprice(new_menu) == ["drink", "Pie"]
+    assert plan.menu is new_menu
+    assert plan.choices == {"food": "Burger"}
+    assert plan.basket.to_list() == [["food", "Burger", 2]]
+    assert plan.total == recount(plan) == 1650
+
+
+def test_round_trip_through_a_receipt():
+    plan = MenuPlan(menu, 3000)
+    plan.set_choice("food", "Salad")
+    plan.set_choice("dessert", "Cake")
+    plan.add_item("drink", "Juice", 3)
+    data = plan.to_dict()
+    assert data["prices"] == {"food": 600, "dessert": 500}
+    assert data["basket_prices"] == [300]
+    assert data["drink"] is None
+
+    again = MenuPlan.from_dict(data, menu)
+    assert again.to_dict() == data
+    assert again.total == plan.total == 2000
+
+
+def test_receipt_saved_in_dollars():
+    plan = MenuPlan.from_dict({"food": "Pizza", "drink": "Water", "dessert": "Pie", "budget": 12.5}, menu)
+    assert plan.budget == 1250
+    assert plan.total == 1200
+
+
+def test_receipt_lists_every_category_of_the_menu():
+    four = dict(menu, side={"Fries": {"price": 300, "description": ""}})
+    plan = MenuPlan(four, 3000)
+    plan.set_choice("side", "Fries")
+    data = plan.to_dict()
+    assert [category for category in data if category in four] == list(four)
+    assert data["side"] == "Fries"
+    assert MenuPlan.from_dict(data, four).choices == {"side": "Fries"}
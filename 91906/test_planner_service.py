@@ -0,0 +1,164 @@
+# W. Fifita Menu Planner - Planning Service Tests
+
+"""Sends well-formed and malformed HTTP requests to a running service and checks each reply."""
+
+import asyncio
+import json
+
+import pytest
+
+from catalog_loader import CatalogLoader
+from meal_optimizer import MAX_PEOPLE
+from planner_service import MAX_LIMIT, PlannerService, serve
+
+MENU = {
+    "food": {"Burger": {"price": 500, "description": "", "rating": 4.5}},
+    "drink": {"Water": {"price": 100, "description": "", "rating": 3}},
+    "dessert": {"Cake": {"price": 500, "description": "", "rating": 4.7}},
+}
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    # Receipts and sessions are written to the working folder
+    monkeypatch.chdir(tmp_path)
+    with open("menu.json", "w") as file:
+        json.dump(MENU, file)
+    return PlannerService(catalog=CatalogLoader("menu.json"))
+
+
+def exchange(service, *requests, close_early=False):
+    """
+    Sends each request on its own connection and returns the (status, JSON body) replies, or
+    None where the server closed the connection without replying.
+    """
+    async def send_all():
+        server = await serve("127.0.0.1", 0, service)
+        port = server.sockets[0].getsockname()[1]
+        replies = []
+        try:
+            for request in requests:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(request)
+                if close_early:
+                    writer.write_eof()
+                data = await asyncio.wait_for(reader.read(), 10)
+                writer.close()
+                replies.append(parse_replies(data)[0] if data else None)
+        finally:
+            server.close()
+            await server.wait_closed()
+        return replies
+
+    return asyncio.run(send_all())
+
+
+def parse_replies(data):
+    """Splits the bytes of one or more responses into (status, JSON body) pairs."""
+    replies = []
+    while data:
+        head, _, data = data.partition(b"\r\n\r\n")
+        lines = head.decode("ascii").split("\r\n")
+        length = int(next(line for line in lines if line.lower().startswith("content-length")).split(":")[1])
+        body, data = data[:length], data[length:]
+        replies.append((int(lines[0].split()[1]), json.loads(body)))
+    return replies
+
+
+def request(method, path, body=None, headers=""):
+    data = b"" if body is None else json.dumps(body).encode()
+    return (f"{method} {path} HTTP/1.1\r\nConnection: close\r\nContent-Length: {len(data)}\r\n{headers}\r\n"
+            .encode() + data)
+
+
+def test_price_a_plan(service):
+    [(status, body)] = exchange(service, request("POST", "/price", {"food": "Burger", "drink": "Water"}))
+    assert status == 200
+    assert body["total_cents"] == 600
+
+
+def test_pipelined_requests_are_answered_in_order(service):
+    keep_alive = b"GET /categories HTTP/1.1\r\n\r\n"
+    data = json.dumps({"food": "Burger"}).encode()
+    last = b"POST /price HTTP/1.1\r\nConnection: close\r\nContent-Length: %d\r\n\r\n%s" % (len(data), data)
+
+    async def send():
+        server = await serve("127.0.0.1", 0, service)
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.sockets[0].getsockname()[1])
+        writer.write(keep_alive + last)
+        data = await asyncio.wait_for(reader.read(), 10)
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return data
+
+    (first_status, categories), (second_status, priced) = parse_replies(asyncio.run(send()))
+    assert (first_status, second_status) == (200, 200)
+    assert categories["categories"] == list(MENU)
+    assert priced["total_cents"] == 500
+
+
+@pytest.mark.parametrize("raw, status", [
+    (b"NONSENSE\r\n\r\n", 400),
+    (b"POST /price HTTP/1.1\r\nContent-Length: lots\r\n\r\n", 400),
+    (b"POST /price HTTP/1.1\r\nContent-Length: -5\r\n\r\n", 400),
+    (b"POST /price HTTP/1.1\r\nContent-Length: 99999999\r\n\r\n", 413),
+    (b"POST /price HTTP/1.1\r\nConnection: close\r\nContent-Length: 5\r\n\r\n{nope", 400),
+    (b"POST /price HTTP/1.1\r\nConnection: close\r\nContent-Length: 2\r\n\r\n\xff\xfe", 400),
+    (b"POST /price HTTP/1.1\r\nConnection: close\r\nContent-Length: 2\r\n\r\n[]", 400),
+    (b"GET /nowhere HTTP/1.1\r\nConnection: close\r\n\r\n", 404),
+    (b"DELETE /price HTTP/1.1\r\nConnection: close\r\n\r\n", 405),
+])
+def test_malformed_requests_get_an_error_status(service, raw, status):
+    [(reply_status, body)] = exchange(service, raw)
+    assert reply_status == status
+    assert "error" in body
+
+
+def test_bad_values_get_400(service):
+    replies = exchange(service,
+                       request("POST", "/price", {"food": "Nothing"}),
+                       request("POST", "/check-budget", {"food": "Burger"}),
+                       request("POST", "/combinations", {"budget": 20, "limit": "x"}),
+                       request("POST", "/combinations", {"budget": 20, "limit": MAX_LIMIT + 1}),
+                       request("POST", "/combinations", {"budget": 20, "limit": -1}),
+                       request("GET", "/receipts/12"))
+    assert [status for status, body in replies] == [400, 400, 400, 400, 400, 404]
+    assert str(MAX_LIMIT) in replies[3][1]["error"]
+
+
+def test_suggest_limits_the_group_size(service):
+    replies = exchange(service,
+                       request("POST", "/suggest", {"budget": 100, "people": 3}),
+                       request("POST", "/suggest", {"budget": 10**6, "people": MAX_PEOPLE + 1}),
+                       request("POST", "/suggest", {"budget": 100, "people": 0}))
+    assert [status for status, body in replies] == [200, 400, 400]
+    assert replies[0][1]["meals"] == [{"food": "Burger", "drink": "Water", "dessert": "Cake"}] * 3
+    assert str(MAX_PEOPLE) in replies[1][1]["error"]
+
+
+def test_handler_errors_are_not_blamed_on_the_json(service, monkeypatch):
+    def fail(body):
+        raise ValueError("quantity must be positive")
+
+    monkeypatch.setattr(service, "price", fail)
+    [(status, body)] = exchange(service, request("POST", "/price", {"food": "Burger"}))
+    assert status == 400
+    assert "quantity must be positive" in body["error"]
+    assert "JSON" not in body["error"]
+    [(status, body)] = exchange(service, b"POST /price HTTP/1.1\r\nConnection: close\r\nContent-Length: 5\r\n\r\n{nope")
+    assert body["error"] == "The request body is not valid JSON."
+
+
+def test_truncated_body_closes_the_connection_quietly(service):
+    truncated = b"POST /price HTTP/1.1\r\nContent-Length: 50\r\n\r\n{\"food\""
+    replies = exchange(service, truncated, request("GET", "/categories"), close_early=True)
+    assert replies[0] is None
+    assert replies[1][0] == 200  # The server is still answering
+
+
+def test_analytics_counts_saved_receipts(service):
+    plan = {"food": "Burger", "drink": "Water", "dessert": "Cake", "budget": 20}
+    replies = exchange(service, request("POST", "/receipts", plan), request("GET", "/analytics"))
+    assert [status for status, body in replies] == [200, 200]
+    assert replies[1][1]["receipts"] == 1
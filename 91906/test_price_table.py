@@ -0,0 +1,64 @@
+# W. Fifita Menu Planner - Price Table Tests
+
+"""Checks PriceTable, with and without NumPy, against trying every meal on small random menus."""
+
+import random
+
+import pytest
+
+import price_table
+from price_table import PriceTable
+
+
+@pytest.fixture(params=["numpy", "lists"])
+def table_kind(request, monkeypatch):
+    """Runs a test with NumPy (if it is installed) and again with the plain list tables."""
+    if request.param == "numpy":
+        price_table.load_numpy()
+        if price_table.np is None:
+            pytest.skip("NumPy is not installed")
+    else:
+        monkeypatch.setattr(price_table, "np", None)
+        monkeypatch.setattr(price_table, "numpy_checked", True)
+    return request.param
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_counts_match_brute_force(seed, table_kind, random_menu, every_meal):
+    rng = random.Random(seed)
+    menu = random_menu(rng, categories=rng.randint(1, 4), most_items=6)
+    table = PriceTable(menu)
+    totals = [total for total, items in every_meal(menu)]
+    budgets = sorted(set(totals)) + [0, max(totals) + 1]
+    expected = [sum(total <= budget for total in totals) for budget in budgets]
+    assert len(table) == len(totals)
+    assert [table.count_within(budget) for budget in budgets] == expected
+    assert list(table.count_within_many(budgets)) == expected
+    assert list(table.fits_many(budgets)) == [count > 0 for count in expected]
+    assert table.cheapest_total() == min(totals)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_combinations_within_match_brute_force(seed, table_kind, random_menu, every_meal):
+    rng = random.Random(seed)
+    menu = random_menu(rng, most_items=6)
+    meals = every_meal(menu)
+    budget = rng.choice(meals)[0]
+    found = PriceTable(menu).combinations_within(budget)
+    assert [total for total, items in found] == sorted(total for total, items in meals if total <= budget)
+    assert sorted(found) == sorted(meal for meal in meals if meal[0] <= budget)
+    assert all(type(total) is int for total, items in found)
+    assert PriceTable(menu).combinations_within(budget, limit=3) == found[:3]
+
+
+def test_empty_category_is_rejected(table_kind):
+    with pytest.raises(ValueError, match="drink"):
+        PriceTable({"food": {"Burger": {"price": 500, "description": ""}}, "drink": {}})
+
+
+def test_too_many_meals_is_rejected(monkeypatch):
+    monkeypatch.setattr(price_table, "MAX_COMBINATIONS", 8)
+    menu = {category: {f"{category}{i}": {"price": 100, "description": ""} for i in range(3)}
+            for category in ("food", "drink")}
+    with pytest.raises(ValueError, match="too many"):
+        PriceTable(menu)
@@ -0,0 +1,79 @@
+# W. Fifita Menu Planner - Receipt Database Tests
+
+"""Checks the SQLite receipt store's lookups and its item index."""
+
+import time
+
+import pytest
+
+from receipt_db import ReceiptDatabase
+
+
+def receipt(food, drink, dessert, total, basket=(), **extra):
+    return dict({"food": food, "drink": drink, "dessert": dessert, "basket": [list(line) for line in basket],
+                 "budget_cents": 2000, "total_cents": total, "saved_at": 0}, **extra)
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = ReceiptDatabase(str(tmp_path / "receipts.db"))
+    yield database
+    database.close()
+
+
+def test_append_and_look_up(database):
+    assert len(database) == 0
+    assert database.latest() is None
+    saved = [receipt("Burger", "Water", "Cake", 1100), receipt("Pizza", "Soda", "Pie", 1300)]
+    assert [database.append(entry) for entry in saved] == [0, 1]
+    assert len(database) == 2
+    assert database.get(0) == saved[0]
+    assert database.get(-1) == database.latest() == saved[1]
+    assert list(database) == saved
+    assert list(database.since(1)) == saved[1:]
+    with pytest.raises(IndexError):
+        database.get(2)
+
+
+def test_save_many_in_one_transaction(database):
+    assert database.save_many(receipt("Burger", "Water", "Cake", total) for total in range(5)) == 5
+    assert [entry["total_cents"] for entry in database] == list(range(5))
+
+
+def test_plans_containing_an_item(database):
+    database.append(receipt("Pizza", "Water", "Cake", 1400))
+    database.append(receipt("Burger", "Water", "Cake", 1100, basket=[("food", "Pizza", 3)]))
+    database.append(receipt("Burger", "Soda", "Pie", 1000))
+    assert [entry["total_cents"] for entry in database.plans_containing("Pizza")] == [1400, 1100]
+    assert [entry["total_cents"] for entry in database.plans_containing("Pizza", max_total=1200)] == [1100]
+    assert [entry["total_cents"] for entry in database.plans_containing("Pizza", min_quantity=2)] == [1100]
+    assert database.plans_containing("Steak") == []
+
+
+def test_only_menu_items_are_indexed(database):
+    database.append(receipt("Burger", "Water", None, 600, session="Pizza", saved_by="Pizza"))
+    assert database.plans_containing("Pizza") == []
+    assert len(database.plans_containing("Burger")) == 1
+
+
+def test_categories_of_the_menu_in_use(tmp_path):
+    database = ReceiptDatabase(str(tmp_path / "receipts.db"), categories=["main", "side"])
+    database.append({"main": "Curry", "side": "Rice", "food": "Burger", "total_cents": 900, "saved_at": 0})
+    assert len(database.plans_containing("Rice")) == 1
+    assert database.plans_containing("Burger") == []
+    database.close()
+
+
+def test_receipts_saved_in_dollars_are_stored_in_cents(database):
+    database.append({"food": "Burger", "budget": 20, "total": 11.5, "saved_at": 0})
+    assert database.plans_containing("Burger", max_total=1150)
+    assert not database.plans_containing("Burger", max_total=1149)
+
+
+def test_average_budget_per_day(database):
+    now = time.time()
+    for budget in (1000, 2000):
+        database.append({"food": "Burger", "budget_cents": budget, "total_cents": 500, "saved_at": now})
+    [(day, average)] = database.average_budget_per_day()
+    assert day == time.strftime("%Y-%m-%d", time.localtime(now))
+    assert average == 1500
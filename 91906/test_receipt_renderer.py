@@ -0,0 +1,107 @@
+# W. Fifita Menu Planner - Receipt Renderer Tests
+
+"""Checks that plans and saved receipts print the same way, and the bulk export in each format."""
+
+import csv
+import io
+import json
+
+import pytest
+
+import receipt_renderer
+from planner_engine import MenuPlan
+from receipt_renderer import ReceiptRenderer, export_receipts
+from receipt_store import ReceiptLog
+
+MENU = {
+    "food": {"Burger": {"price": 500, "description": ""}, "Pizza": {"price": 800, "description": ""}},
+    "drink": {"Water": {"price": 100, "description": ""}},
+    "dessert": {"Cake": {"price": 350, "description": ""}},
+    "side": {"Chips": {"price": 250, "description": ""}},
+}
+
+
+def full_plan():
+    plan = MenuPlan(MENU, 5000)
+    for category, item in [("food", "Burger"), ("drink", "Water"), ("dessert", "Cake"), ("side", "Chips")]:
+        plan.set_choice(category, item)
+    plan.add_item("food", "Pizza", 2)
+    plan.add_item("side", "Chips")
+    return plan
+
+
+def test_plans_and_saved_receipts_print_the_same():
+    renderer = ReceiptRenderer(MENU)
+    plan = full_plan()
+    text = renderer.render_plan(plan)
+    assert text == ("Food: Burger ($5.00)\nDrink: Water ($1.00)\nDessert: Cake ($3.50)\nSide: Chips ($2.50)\n"
+                    "\nGroup order (3 items):\n2 x Pizza ($16.00)\n1 x Chips ($2.50)\n\nTotal: $30.50")
+    assert renderer.render(plan.to_dict()) == text
+
+
+def test_saved_receipts_keep_their_prices():
+    renderer = ReceiptRenderer(MENU)
+    receipt = full_plan().to_dict()
+    cheaper = {category: {item: dict(details, price=1) for item, details in items.items()}
+               for category, items in MENU.items()}
+    assert ReceiptRenderer(cheaper).render(receipt) == renderer.render(receipt)
+
+
+def test_old_receipts_without_prices():
+    receipt = {"food": "Burger", "drink": "Water", "dessert": None, "basket": [["food", "Pizza", 2]], "total": 21}
+    assert ReceiptRenderer(MENU).render(receipt) == \
+        "Food: Burger\nDrink: Water\n\nGroup order (2 items):\n2 x Pizza\n\nTotal: $21.00"
+
+
+def test_long_group_orders_are_summarised():
+    plan = MenuPlan(MENU, 100_000)
+    for item in ("Burger", "Pizza"):
+        plan.add_item("food", item)
+    plan.add_item("drink", "Water", 3)
+    text = ReceiptRenderer(MENU, basket_lines=2).render_plan(plan)
+    assert "1 x Pizza ($8.00)\n...and 1 more\n" in text
+    assert "Water" not in text
+
+
+def test_line_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(receipt_renderer, "FRAGMENT_LIMIT", 3)
+    renderer = ReceiptRenderer(MENU)
+    for price in range(10):
+        renderer.choice_line("food", "Burger", price)
+    assert len(renderer.choice_lines) <= 3
+
+
+@pytest.fixture
+def log(tmp_path):
+    log = ReceiptLog(str(tmp_path / "receipts.jsonl"))
+    for _ in range(3):
+        log.append(dict(full_plan().to_dict(), saved_at=7))
+    return log
+
+
+def test_export_text_and_json(log):
+    renderer = ReceiptRenderer(MENU)
+    output = io.StringIO()
+    assert export_receipts(log, output, renderer, "text", start=1) == 2
+    assert output.getvalue().startswith("Receipt #2\nFood: Burger ($5.00)\n")
+    assert output.getvalue().count("Receipt #") == 2
+
+    output = io.StringIO()
+    assert export_receipts(log, output, renderer, "json") == 3
+    rows = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [row["number"] for row in rows] == [1, 2, 3]
+    assert rows[0]["side"] == "Chips"
+
+
+def test_csv_export_has_a_column_per_category(log):
+    output = io.StringIO()
+    export_receipts(log, output, ReceiptRenderer(MENU), "csv")
+    rows = list(csv.reader(io.StringIO(output.getvalue())))
+    assert rows[0] == ["number", "saved_at", "food", "drink", "dessert", "side", "group_items", "budget", "total"]
+    assert rows[1] == ["1", "7", "Burger", "Water", "Cake", "Chips", "3", "50.00", "30.50"]
+    assert len(rows) == 4
+
+
+def test_unknown_format(log):
+    with pytest.raises(ValueError):
+        export_receipts(log, io.StringIO(), ReceiptRenderer(MENU), "xml")
@@ -0,0 +1,137 @@
+# W. Fifita Menu Planner - Receipt Store Tests
+
+"""Checks ReceiptLog's lookups, its repair after a crash, read-only logs and appends from several processes."""
+
+import json
+import multiprocessing
+import os
+
+import pytest
+
+from receipt_store import OFFSET, ReceiptLog
+
+
+def receipt(number):
+    return {"food": "Burger", "drink": "Water", "dessert": "Cake", "total_cents": number, "saved_at": 0}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "receipts.jsonl")
+
+
+def test_append_and_look_up(path):
+    log = ReceiptLog(path)
+    assert len(log) == 0
+    assert log.latest() is None
+    assert list(log) == []
+    for number in range(5):
+        assert log.append(receipt(number)) == number
+    assert len(log) == 5
+    assert log.get(0) == receipt(0)
+    assert log.get(3) == receipt(3)
+    assert log.get(-1) == log.latest() == receipt(4)
+    assert list(log) == [receipt(number) for number in range(5)]
+    assert list(log.since(2)) == [receipt(number) for number in range(2, 5)]
+    assert list(log.since(5)) == []
+    with pytest.raises(IndexError):
+        log.get(5)
+    with pytest.raises(IndexError):
+        log.get(-6)
+
+
+def test_saved_at_is_added(path):
+    log = ReceiptLog(path)
+    log.append({"food": "Burger"})
+    assert "saved_at" in log.latest()
+
+
+def test_crash_before_the_index_write_is_repaired(path):
+    log = ReceiptLog(path)
+    log.append(receipt(0))
+    # The receipt reached the log but the process died before writing its index entry
+    with open(path, "ab") as log_file:
+        log_file.write(json.dumps(receipt(1)).encode() + b"\n")
+    assert len(ReceiptLog(path)) == 2
+    assert ReceiptLog(path).get(1) == receipt(1)
+
+
+def test_half_written_line_is_cut_off(path):
+    log = ReceiptLog(path)
+    log.append(receipt(0))
+    with open(path, "ab") as log_file:
+        log_file.write(b'{"food": "Bur')
+    log = ReceiptLog(path)
+    assert len(log) == 1
+    assert log.append(receipt(1)) == 1
+    assert list(log) == [receipt(0), receipt(1)]
+
+
+def test_torn_index_is_rebuilt(path):
+    log = ReceiptLog(path)
+    for number in range(3):
+        log.append(receipt(number))
+    with open(log.index_path, "ab") as index_file:
+        index_file.write(b"\x01\x02\x03")
+    log = ReceiptLog(path)
+    assert os.path.getsize(log.index_path) == 3 * OFFSET.size
+    assert log.get(2) == receipt(2)
+
+
+def test_read_only_log_never_changes_the_files(path):
+    log = ReceiptLog(path)
+    log.append(receipt(0))
+    with open(path, "ab") as log_file:
+        log_file.write(b'{"food": "Bur')
+    size = os.path.getsize(path)
+
+    reader = ReceiptLog(path, read_only=True)
+    assert list(reader) == [receipt(0)]  # The line still being written is left out
+    assert reader.latest() == receipt(0)
+    with pytest.raises(PermissionError):
+        reader.append(receipt(1))
+    assert os.path.getsize(path) == size
+
+
+def test_since_leaves_a_line_still_being_written(path):
+    log = ReceiptLog(path)
+    log.append(receipt(0))
+    log.append(receipt(1))
+    reader = ReceiptLog(path, read_only=True)
+    # The log line is written before its index entry, so a reader can see it half done
+    with open(path, "ab") as log_file:
+        log_file.write(json.dumps(receipt(2)).encode()[:10])
+    assert list(reader.since(1)) == [receipt(1)]
+
+
+def test_read_only_log_of_a_missing_file(path):
+    reader = ReceiptLog(path, read_only=True)
+    assert len(reader) == 0
+    assert list(reader) == []
+    assert not os.path.exists(path)
+
+
+def append_receipts(path, start, count):
+    """Runs in a separate process: opens the log (as a new process would) for each append."""
+    for number in range(start, start + count):
+        ReceiptLog(path).append(receipt(number))
+
+
+def test_appends_from_several_processes(path):
+    ReceiptLog(path)
+    processes = [multiprocessing.Process(target=append_receipts, args=(path, worker * 1000, 50))
+                 for worker in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert all(process.exitcode == 0 for process in processes)
+
+    log = ReceiptLog(path)
+    assert len(log) == 200
+    saved = list(log)
+    assert sorted(entry["total_cents"] for entry in saved) == [worker * 1000 + number
+                                                               for worker in range(4) for number in range(50)]
+    # Every index entry points at the start of the right line
+    assert [log.get(number) for number in range(len(log))] == saved
+    assert log.index_is_valid()
@@ -0,0 +1,104 @@
+# W. Fifita Menu Planner - Sales Analytics Tests
+
+"""Checks the running sales figures against recounting every receipt."""
+
+import random
+from collections import Counter
+
+from receipt_store import ReceiptLog
+from sales_analytics import RollingWindow, SalesAnalytics, SpaceSaving
+
+
+def random_receipts(rng, menu, count, now):
+    receipts = []
+    for _ in range(count):
+        receipt = {category: rng.choice([None] + list(menu[category])) for category in menu}
+        receipt["basket"] = [[category, rng.choice(list(menu[category])), rng.randint(1, 3)]
+                             for category in rng.sample(list(menu), rng.randint(0, 2))]
+        receipt["total_cents"] = rng.randint(100, 3000)
+        receipt["budget_cents"] = rng.randint(100, 3000)
+        receipt["saved_at"] = now - rng.uniform(0, 2 * 86400)
+        receipts.append(receipt)
+    return receipts
+
+
+def test_figures_match_a_recount(random_menu):
+    rng = random.Random(2)
+    now = 1_000_000_000
+    for categories in (3, 4):
+        menu = random_menu(rng, categories=categories, most_items=3)
+        receipts = random_receipts(rng, menu, 500, now)
+        analytics = SalesAnalytics(list(menu))
+        for receipt in receipts:
+            analytics.add(receipt)
+        summary = analytics.summary(now)
+
+        assert summary["receipts"] == 500
+        assert summary["spend_cents"] == sum(receipt["total_cents"] for receipt in receipts)
+        assert summary["over_budget"] == sum(receipt["total_cents"] > receipt["budget_cents"] for receipt in receipts)
+        for category in menu:
+            counted = Counter()
+            for receipt in receipts:
+                if receipt[category]:
+                    counted[receipt[category]] += 1
+                for line_category, item, quantity in receipt["basket"]:
+                    if line_category == category:
+                        counted[item] += quantity
+            top = summary["top_items"][category]
+            assert all(counted[item] == count for item, count in top)
+            assert [count for item, count in top] == [count for item, count in counted.most_common(5)]
+        combos = Counter(tuple(receipt[category] for category in menu) for receipt in receipts
+                         if all(receipt[category] for category in menu))
+        # Every combo fits in the sketch's 100 counters, so its counts are exact
+        assert len(combos) <= 100
+        top = summary["top_combos"]
+        assert all(combos[tuple(combo[category] for category in menu)] == combo["count"] for combo in top)
+        assert [combo["count"] for combo in top] == [count for combo, count in combos.most_common(10)]
+        # The last day is the 24 hourly buckets up to and including the current hour
+        in_day = [receipt for receipt in receipts if receipt["saved_at"] // 3600 > now // 3600 - 24]
+        assert summary["last_day"]["receipts"] == len(in_day)
+        assert summary["last_day"]["spend_cents"] == sum(receipt["total_cents"] for receipt in in_day)
+
+
+def test_old_receipts_in_dollars():
+    analytics = SalesAnalytics()
+    analytics.add({"food": "Burger", "drink": "Water", "dessert": "Cake", "budget": 20, "total": 11.5})
+    summary = analytics.summary()
+    assert summary["spend_cents"] == 1150 and summary["average_headroom_cents"] == 850
+    assert summary["top_combos"] == [{"food": "Burger", "drink": "Water", "dessert": "Cake", "count": 1}]
+
+
+def test_space_saving_counts_heavy_hitters():
+    rng = random.Random(5)
+    stream = ["common"] * 300 + ["often"] * 150 + [f"rare{i}" for i in range(1000)]
+    rng.shuffle(stream)
+    sketch = SpaceSaving(capacity=20)
+    for key in stream:
+        sketch.add(key)
+    assert len(sketch.counts) == 20
+    (first, count, error), (second, second_count, second_error) = sketch.top(2)
+    assert (first, second) == ("common", "often")
+    assert count - error <= 300 <= count
+    assert second_count - second_error <= 150 <= second_count
+
+
+def test_rolling_window_drops_old_buckets():
+    window = RollingWindow(60, 60)
+    window.add(0, 100, 200, 100)
+    window.add(3599, 300, 400, 100)
+    assert window.summary(3599)["receipts"] == 2
+    assert window.summary(3600)["receipts"] == 1
+    window.add(10, 100, 100, 0)  # Older than the window now covers
+    assert window.summary(3600)["spend_cents"] == 300
+
+
+def test_catch_up_reads_only_new_receipts(tmp_path):
+    log = ReceiptLog(str(tmp_path / "receipts.jsonl"))
+    analytics = SalesAnalytics()
+    assert analytics.catch_up(log) == 0
+    for total in (500, 700):
+        log.append({"food": "Burger", "total_cents": total, "budget_cents": 1000, "saved_at": 0})
+    assert analytics.catch_up(log) == 2
+    log.append({"food": "Pizza", "total_cents": 900, "budget_cents": 1000, "saved_at": 0})
+    assert analytics.catch_up(log) == 1
+    assert analytics.summary()["spend_cents"] == 2100
@@ -0,0 +1,63 @@
+# W. Fifita Menu Planner - Search Index Tests
+
+"""Checks searches against a scan of every item, including after items change."""
+
+import random
+
+from search_index import SearchIndex, tokenize
+
+MENU = {
+    "food": {"Pizza": {"description": "Cheese pizza with tomato"},
+             "Burger": {"description": "Beef burger with cheese"}},
+    "drink": {"Pineapple juice": {"description": "Fresh juice"}},
+}
+
+
+def scan(menu, query):
+    """The items matching every whole word and the last word as a prefix, found the slow way."""
+    *whole_words, prefix = tokenize(query)
+    found = set()
+    for category in menu:
+        for item, details in menu[category].items():
+            words = set(tokenize(f"{item} {details.get('description', '')}"))
+            if all(word in words for word in whole_words) and any(word.startswith(prefix) for word in words):
+                found.add((category, item))
+    return found
+
+
+def test_whole_words_and_prefix():
+    index = SearchIndex.from_menu(MENU)
+    assert len(index) == 3
+    assert set(index.search("piz")) == {("food", "Pizza")}
+    assert set(index.search("cheese")) == {("food", "Pizza"), ("food", "Burger")}
+    assert set(index.search("cheese bu")) == {("food", "Burger")}
+    assert set(index.search("pi")) == {("food", "Pizza"), ("drink", "Pineapple juice")}
+    assert index.search("steak") == []
+    assert index.search("  ") == []
+
+
+def test_limit():
+    assert len(SearchIndex.from_menu(MENU).search("c", limit=1)) == 1
+
+
+def test_sync_reindexes_changed_items_only():
+    index = SearchIndex.from_menu(MENU)
+    changed = {"food": {"Pizza": {"description": "Vegan pizza"}}, "drink": MENU["drink"]}
+    index.sync(changed)
+    assert index.search("burger") == []
+    assert index.search("cheese") == []
+    assert index.search("vegan") == [("food", "Pizza")]
+    assert "burger" not in index.postings
+    assert index.words == sorted(index.postings)
+
+
+def test_random_menus_match_a_scan():
+    rng = random.Random(9)
+    words = ["red", "rice", "ripe", "roast", "bean", "beef", "bun", "cake"]
+    for _ in range(30):
+        menu = {category: {f"{category} {rng.choice(words)} {i}": {"description": " ".join(rng.sample(words, 2))}
+                           for i in range(rng.randint(1, 6))}
+                for category in ("food", "drink")}
+        index = SearchIndex.from_menu(menu)
+        for query in ["r", "ri", "bean", "beef b", "red ri", "food c", "cake"]:
+            assert set(index.search(query, limit=100)) == scan(menu, query), query
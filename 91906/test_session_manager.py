@@ -0,0 +1,123 @@
+# W. Fifita Menu Planner - Session Manager Tests
+
+"""Checks that sessions survive being moved to disk and keep the prices they were made with."""
+
+import gc
+import json
+
+import pytest
+
+from catalog_loader import CatalogLoader
+from receipt_store import ReceiptLog
+from session_manager import SessionManager
+
+MENU = {
+    "food": {"Burger": {"price": 500, "description": ""}, "Pizza": {"price": 800, "description": ""}},
+    "drink": {"Water": {"price": 100, "description": ""}},
+    "dessert": {"Cake": {"price": 500, "description": ""}},
+}
+
+
+@pytest.fixture
+def folder(tmp_path):
+    with open(tmp_path / "menu.json", "w") as file:
+        json.dump(MENU, file)
+    return tmp_path
+
+
+def open_manager(folder, catalog, max_active=10000):
+    return SessionManager(catalog.menu(), path=str(folder / "sessions.db"), max_active=max_active,
+                          receipts=ReceiptLog(str(folder / "receipts.jsonl")), snapshot=catalog.snapshot)
+
+
+def fill_plan(plan):
+    plan.set_budget(3000)
+    plan.set_choice("food", "Burger")
+    plan.set_choice("drink", "Water")
+    plan.add_item("food", "Pizza", 2)
+
+
+def test_session_round_trip_through_disk(folder):
+    catalog = CatalogLoader(str(folder / "menu.json"))
+    sessions = open_manager(folder, catalog)
+    session_id = sessions.create()
+    fill_plan(sessions.plan(session_id))
+    number = sessions.save_receipt(session_id)
+    before = sessions.plan(session_id).to_dict()
+
+    sessions.evict(1)
+    assert session_id not in sessions.active
+    assert sessions.plan(session_id).to_dict() == before
+    assert sessions.get(session_id).receipt_number == number
+    assert sessions.latest_receipt(session_id)["session"] == session_id
+
+
+def test_eviction_keeps_the_most_recently_used(folder):
+    sessions = open_manager(folder, CatalogLoader(str(folder / "menu.json")), max_active=10)
+    ids = [sessions.create() for _ in range(11)]
+    assert len(sessions.active) == 10
+    assert ids[0] not in sessions.active
+    sessions.get(ids[0])  # Read back from disk on use, moving the idlest one out instead
+    assert ids[0] in sessions.active
+    assert len(sessions.active) == 10
+
+
+def test_unknown_session(folder):
+    sessions = open_manager(folder, CatalogLoader(str(folder / "menu.json")))
+    with pytest.raises(KeyError):
+        sessions.get("no-such-session")
+
+
+def test_evicted_session_keeps_its_prices_after_a_price_change(folder):
+    catalog = CatalogLoader(str(folder / "menu.json"))
+    sessions = open_manager(folder, catalog)
+    session_id = sessions.create()
+    fill_plan(sessions.plan(session_id))
+    total = sessions.plan(session_id).total
+
+    sessions.menu = catalog.update_prices({"food": {"Burger": 900}})
+    sessions.evict(1)
+    gc.collect()  # Only the pin keeps the old snapshot alive now
+    session = sessions.get(session_id)
+    assert session.plan.total == total
+    assert not session.prices_changed
+    assert session.plan.menu is not sessions.menu
+    assert not sessions.pinned  # Unpinned once the session is back in memory
+
+    assert sessions.reprice(session_id) == [("food", "Burger", 500, 900)]
+    assert sessions.plan(session_id).total == total + 400
+    assert sessions.plan(session_id).menu is sessions.menu
+
+
+def test_session_is_repriced_and_flagged_after_a_restart(folder):
+    catalog = CatalogLoader(str(folder / "menu.json"))
+    sessions = open_manager(folder, catalog)
+    session_id = sessions.create()
+    fill_plan(sessions.plan(session_id))
+    total = sessions.plan(session_id).total
+    sessions.close()
+
+    # A new process with a changed catalog file no longer has the snapshot the plan was made with
+    menu = json.loads(json.dumps(MENU))
+    menu["food"]["Burger"]["price"] = 900
+    with open(folder / "menu.json", "w") as file:
+        json.dump(menu, file)
+    sessions = open_manager(folder, CatalogLoader(str(folder / "menu.json")))
+    session = sessions.get(session_id)
+    assert session.plan.total == total + 400
+    assert session.prices_changed
+    sessions.reprice(session_id)
+    assert not sessions.get(session_id).prices_changed
+
+
+def test_deleting_an_evicted_session_unpins_its_snapshot(folder):
+    catalog = CatalogLoader(str(folder / "menu.json"))
+    sessions = open_manager(folder, catalog)
+    session_id = sessions.create()
+    sessions.menu = catalog.update_prices({"food": {"Burger": 900}})
+    sessions.evict(1)
+    assert len(sessions.pinned) == 1
+    sessions.delete(session_id)
+    assert not sessions.pinned
+    with pytest.raises(KeyError):
+        sessions.get(session_id)
@@ -0,0 +1,117 @@
+# W. Fifita Menu Planner - Virtual List
+
+"""
+A scrollable list for Tkinter that only creates widgets for the rows that can be seen.
+Scrolling changes which items the existing row buttons show instead of creating a button per
+item, so a list of 10,000 items takes about as long to show as a list of 10.
+"""
+
+import tkinter as tk
+
+
+class VirtualListView(tk.Frame):
+    """
+    A list of clickable rows backed by any sequence of items. Supports the scrollbar, mouse
+    wheel and the Up/Down, Page Up/Page Down, Home/End and Return keys.
+    """
+
+    def __init__(self, master, visible_rows=3, format_row=str, command=None, **options):
+        super().__init__(master, **options)
+        self.format_row = format_row  # Turns an item into the text shown on its row
+        self.command = command  # Called with the item when a row is clicked or Return is pressed
+        self.items = []
+        self.top = 0  # Index of the item shown in the first row
+        self.active = 0  # Index of the item selected with the keyboard
+
+        # Only `visible_rows` buttons are ever created, whatever the number of items
+        self.rows_frame = tk.Frame(self, bg=options.get("bg"))
+        self.rows_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.rows = []
+        for row in range(visible_rows):
+            row_button = tk.Button(self.rows_frame, font=("Arial", 12), bg="white", fg="black",
+                                   command=lambda r=row: self.choose(self.top + r))
+            row_button.pack(pady=5, fill=tk.X)
+            row_button.bind("<MouseWheel>", self.on_mouse_wheel)
+            row_button.bind("<Button-4>", lambda event: self.scroll(-1))
+            row_button.bind("<Button-5>", lambda event: self.scroll(1))
+            self.rows.append(row_button)
+
+        self.scrollbar = tk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # Keyboard navigation
+        for widget in [self] + self.rows:
+            widget.bind("<Up>", lambda event: self.move_active(-1))
+            widget.bind("<Down>", lambda event: self.move_active(1))
+            widget.bind("<Prior>", lambda event: self.move_active(-len(self.rows)))
+            widget.bind("<Next>", lambda event: self.move_active(len(self.rows)))
+            widget.bind("<Home>", lambda event: self.move_active(-len(self.items)))
+            widget.bind("<End>", lambda event: self.move_active(len(self.items)))
+            widget.bind("<Return>", lambda event: self.choose(self.active))
+        self.bind("<MouseWheel>", self.on_mouse_wheel)
+
+    def set_items(self, items, format_row=None, command=None):
+        """Shows a new sequence of items, scrolled back to the top."""
+        self.items = items
+        if format_row is not None:
+            self.format_row = format_row
+        if command is not None:
+            self.command = command
+        self.top = 0
+        self.active = 0
+        self.refresh()
+
+    def refresh(self):
+        """Updates the row buttons to show the items from `self.top` onwards."""
+        for row, row_button in enumerate(self.rows):
+            index = self.top + row
+            if index < len(self.items):
+                relief = tk.SUNKEN if index == self.active else tk.RAISED
+                row_button.config(text=self.format_row(self.items[index]), state=tk.NORMAL, relief=relief)
+            else:
+                row_button.config(text="", state=tk.DISABLED, relief=tk.FLAT)
+
+        # Tell the scrollbar which fraction of the list is showing
+        if self.items:
+            self.scrollbar.set(self.top / len(self.items),
+                               min(1.0, (self.top + len(self.rows)) / len(self.items)))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def scroll_to(self, top):
+        """Scrolls so that the item at `top` is in the first row, keeping the last page full."""
+        top = max(0, min(top, len(self.items) - len(self.rows)))
+        if top != self.top:
+            self.top = top
+            self.refresh()
+
+    def scroll(self, rows):
+        self.scroll_to(self.top + rows)
+
+    def yview(self, *args):
+        """Handles the scrollbar's "moveto" and "scroll" commands."""
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * len(self.items)))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            self.scroll(amount * len(self.rows) if args[2] == "pages" else amount)
+
+    def on_mouse_wheel(self, event):
+        self.scroll(-1 if event.delta > 0 else 1)
+
+    def move_active(self, step):
+        """Moves the keyboard selection, scrolling if it leaves the visible rows."""
+        if not self.items:
+            return
+        self.active = max(0, min(self.active + step, len(self.items) - 1))
+        if self.active < self.top:
+            self.top = self.active
+        elif self.active >= self.top + len(self.rows):
+            self.top = self.active - len(self.rows) + 1
+        self.refresh()
+
+    def choose(self, index):
+        """Calls the command for the item at `index`, if there is one."""
+        if 0 <= index < len(self.items) and self.command is not None:
+            self.active = index
+            self.command(self.items[index])